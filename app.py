@@ -1,8 +1,20 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
 import locale
-import math
+import os
+import time
+
+from diarias import (
+    VALORES_DIARIAS,
+    formatar_centavos,
+    formatar_duracao,
+    renderizar_item,
+)
+from diarias.cache import calcular_diaria_em_cache
+from diarias.metricas import registro_metricas
+
+# Início da execução do script (instrumentação opcional, ver diarias.metricas)
+inicio_execucao = time.perf_counter()
 
 # Configuração da página
 st.set_page_config(
@@ -12,75 +24,20 @@ st.set_page_config(
     initial_sidebar_state="expanded"  # Sidebar expandida por padrão
 )
 
-# Configurar formatação brasileira
-import os
-os.environ['LC_ALL'] = 'pt_BR.UTF-8'
-
-# Tentar configurar locale para português brasileiro
-try:
-    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-except:
-    try:
-        locale.setlocale(locale.LC_ALL, 'pt_BR')
-    except:
+# Configurar formatação brasileira uma única vez por processo (o locale é
+# global; os valores monetários são formatados manualmente de qualquer forma)
+@st.cache_resource
+def configurar_locale():
+    # Tentar configurar locale para português brasileiro
+    for nome in ('pt_BR.UTF-8', 'pt_BR', 'Portuguese_Brazil.1252'):
         try:
-            locale.setlocale(locale.LC_ALL, 'Portuguese_Brazil.1252')
-        except:
-            # Se não conseguir, usar formato manual
-            pass
-
-# Função para truncar valores em vez de arredondar
-def truncar_valor(valor, casas_decimais=2):
-    """Trunca um valor para o número especificado de casas decimais (sem arredondamento)"""
-    multiplicador = 10 ** casas_decimais
-    return math.floor(valor * multiplicador) / multiplicador
-
-# Função para formatar duração em dias + horas
-def formatar_duracao(total_horas):
-    """Converte horas totais para formato 'x dias + y horas'"""
-    dias_completos = int(total_horas // 24)
-    horas_restantes = total_horas % 24
-    
-    # Formatar horas sem casa decimal se for número inteiro
-    if horas_restantes == int(horas_restantes):
-        horas_str = f"{int(horas_restantes)} horas" if horas_restantes != 1 else "1 hora"
-    else:
-        horas_str = f"{horas_restantes:.1f} horas"
-    
-    if dias_completos == 0:
-        return horas_str
-    elif horas_restantes == 0:
-        if dias_completos == 1:
-            return "1 dia"
-        else:
-            return f"{dias_completos} dias"
-    else:
-        if dias_completos == 1:
-            return f"1 dia + {horas_str}"
-        else:
-            return f"{dias_completos} dias + {horas_str}"
-
-# Função para formatar moeda
-def format_currency(value):
-    """Formata valor para moeda brasileira: R$ 1.234,56"""
-    # Converter para float se necessário
-    if isinstance(value, str):
-        value = float(value)
-    
-    # Formatação manual para garantir padrão brasileiro
-    valor_str = f"{value:.2f}"  # Formato: 1234.56
-    partes = valor_str.split('.')
-    inteira = partes[0]
-    decimal = partes[1]
-    
-    # Adicionar pontos para milhares
-    if len(inteira) > 3:
-        # Reverter string, adicionar pontos a cada 3 dígitos, reverter novamente
-        inteira_invertida = inteira[::-1]
-        inteira_com_pontos = '.'.join([inteira_invertida[i:i+3] for i in range(0, len(inteira_invertida), 3)])
-        inteira = inteira_com_pontos[::-1]
-    
-    return f"R$ {inteira},{decimal}"
+            return locale.setlocale(locale.LC_ALL, nome)
+        except locale.Error:
+            continue
+    # Se não conseguir, usar formato manual
+    return None
+
+configurar_locale()
 
 # Título principal
 st.title("💰 Calculadora de Diárias de Viagem")
@@ -99,25 +56,6 @@ st.info("""
 
 st.markdown("---")
 
-# Valores da tabela conforme o decreto
-VALORES_DIARIAS = {
-    "Distrito Federal": {
-        "alimentacao": 140.43,
-        "pousada": 327.68,
-        "total": 468.12
-    },
-    "Capitais de Estado": {
-        "alimentacao": 111.38,
-        "pousada": 259.88,
-        "total": 371.26
-    },
-    "Demais Municípios": {
-        "alimentacao": 87.17,
-        "pousada": 203.39,
-        "total": 290.55
-    }
-}
-
 # CSS personalizado para melhorar a formatação
 st.markdown("""
 <style>
@@ -247,73 +185,84 @@ document.addEventListener('click', function(e) {
 # Sidebar para inputs
 st.sidebar.header("📋 Dados da Viagem")
 
-# Destino
-destino = st.sidebar.selectbox(
-    "Destino da viagem:",
-    ["Demais Municípios", "Distrito Federal", "Capitais de Estado"],
-    index=0  # Demais Municípios como padrão
-)
-
-# Datas da viagem
-st.sidebar.subheader("📅 Período da Viagem")
-
-data_ida = st.sidebar.date_input(
-    "Data de ida:",
-    value=datetime.now().date(),
-    min_value=datetime.now().date() - timedelta(days=365),
-    max_value=datetime.now().date() + timedelta(days=365),
-    format="DD/MM/YYYY"
-)
-
-# Horário de saída
-st.sidebar.subheader("⏰ Horário de Saída")
-col_hora, col_min = st.sidebar.columns(2)
-with col_hora:
-    hora_saida = st.selectbox(
-        "Hora:",
-        options=list(range(0, 24)),
-        index=8,  # 8h como padrão
-        format_func=lambda x: f"{x:02d}"
+# Os campos ficam em um formulário: alterar um campo não reexecuta a página,
+# o cálculo é refeito apenas quando o usuário clica em "Calcular"
+with st.sidebar.form("dados_viagem"):
+    # Destino
+    destino = st.selectbox(
+        "Destino da viagem:",
+        ["Demais Municípios", "Distrito Federal", "Capitais de Estado"],
+        index=0  # Demais Municípios como padrão
     )
-with col_min:
-    minuto_saida = st.selectbox(
-        "Minuto:",
-        options=[0, 15, 30, 45],
-        index=0,  # 00 como padrão
-        format_func=lambda x: f"{x:02d}"
-    )
-
-# Definir valor padrão para retorno (sempre >= data de ida)
-valor_padrao_retorno = max(data_ida, datetime.now().date())
 
-data_retorno = st.sidebar.date_input(
-    "Data de retorno:",
-    value=valor_padrao_retorno,
-    min_value=data_ida,
-    max_value=datetime.now().date() + timedelta(days=365),
-    format="DD/MM/YYYY"
-)
+    # Datas da viagem
+    st.subheader("📅 Período da Viagem")
 
-# Horário de retorno (sempre mostrar)
-st.sidebar.subheader("🔙 Horário de Chegada no Retorno")
-col_hora_ret, col_min_ret = st.sidebar.columns(2)
-with col_hora_ret:
-    hora_retorno = st.selectbox(
-        "Hora:",
-        options=list(range(0, 24)),
-        index=17,  # 17h como padrão
-        format_func=lambda x: f"{x:02d}",
-        key="hora_retorno"
+    data_ida = st.date_input(
+        "Data de ida:",
+        value=datetime.now().date(),
+        min_value=datetime.now().date() - timedelta(days=365),
+        max_value=datetime.now().date() + timedelta(days=365),
+        format="DD/MM/YYYY"
     )
-with col_min_ret:
-    minuto_retorno = st.selectbox(
-        "Minuto:",
-        options=[0, 15, 30, 45],
-        index=0,  # 00 como padrão
-        format_func=lambda x: f"{x:02d}",
-        key="minuto_retorno"
+
+    # Horário de saída
+    st.subheader("⏰ Horário de Saída")
+    col_hora, col_min = st.columns(2)
+    with col_hora:
+        hora_saida = st.selectbox(
+            "Hora:",
+            options=list(range(0, 24)),
+            index=8,  # 8h como padrão
+            format_func=lambda x: f"{x:02d}"
+        )
+    with col_min:
+        minuto_saida = st.selectbox(
+            "Minuto:",
+            options=[0, 15, 30, 45],
+            index=0,  # 00 como padrão
+            format_func=lambda x: f"{x:02d}"
+        )
+
+    # Retorno não pode ser anterior à ida; a validação abaixo garante isso,
+    # já que dentro do formulário a data de ida só é conhecida no envio
+    data_retorno = st.date_input(
+        "Data de retorno:",
+        value=datetime.now().date(),
+        min_value=datetime.now().date() - timedelta(days=365),
+        max_value=datetime.now().date() + timedelta(days=365),
+        format="DD/MM/YYYY"
     )
 
+    # Horário de retorno (sempre mostrar)
+    st.subheader("🔙 Horário de Chegada no Retorno")
+    col_hora_ret, col_min_ret = st.columns(2)
+    with col_hora_ret:
+        hora_retorno = st.selectbox(
+            "Hora:",
+            options=list(range(0, 24)),
+            index=17,  # 17h como padrão
+            format_func=lambda x: f"{x:02d}",
+            key="hora_retorno"
+        )
+    with col_min_ret:
+        minuto_retorno = st.selectbox(
+            "Minuto:",
+            options=[0, 15, 30, 45],
+            index=0,  # 00 como padrão
+            format_func=lambda x: f"{x:02d}",
+            key="minuto_retorno"
+        )
+
+    # Alimentação e hospedagem gratuitas
+    col1, col2 = st.columns(2)
+    with col1:
+        alimentacao_gratuita = st.checkbox("Alimentação gratuita fornecida")
+    with col2:
+        hospedagem_gratuita = st.checkbox("Hospedagem gratuita fornecida")
+
+    st.form_submit_button("Calcular", type="primary", use_container_width=True)
+
 # Validação de datas e horários
 if data_retorno < data_ida:
     st.sidebar.error("❌ A data de retorno não pode ser anterior à data de ida!")
@@ -339,142 +288,10 @@ num_dias = (data_retorno - data_ida).days + 1
 # Mostrar informações calculadas
 st.sidebar.success(f"⏱️ Duração total: {formatar_duracao(total_horas)}")
 
-# Alimentação e hospedagem gratuitas
-col1, col2 = st.sidebar.columns(2)
-with col1:
-    alimentacao_gratuita = st.checkbox("Alimentação gratuita fornecida")
-with col2:
-    hospedagem_gratuita = st.checkbox("Hospedagem gratuita fornecida")
-
-# Função para calcular a diária baseada em horários
-def calcular_diaria_por_horario(destino, datetime_saida, datetime_retorno, total_horas, num_dias, alimentacao_gratuita, hospedagem_gratuita):
-    valores = VALORES_DIARIAS[destino]
-    valor_alimentacao = valores["alimentacao"]
-    valor_pousada = valores["pousada"]
-    valor_total_dia = valores["total"]
-    
-    # Inicializar valores
-    total_viagem = 0
-    observacoes = []
-    detalhamento = []
-    
-    # Determinar tipo de viagem baseado nas horas
-    if total_horas <= 6:
-        # Até 6 horas - sem diária
-        observacoes.append(f"Deslocamento de {formatar_duracao(total_horas)} - inferior a 6 horas, sem direito à diária")
-        return {
-            "total_viagem": 0,
-            "observacoes": observacoes,
-            "detalhamento": ["• Nenhuma diária calculada (menos de 6 horas)"],
-            "tipo_calculado": "Até 6 horas (sem diária)"
-        }
-    
-    elif total_horas <= 8:
-        # 6 a 8 horas - 50% alimentação (TRUNCAR em vez de arredondar)
-        if not alimentacao_gratuita:
-            diaria = truncar_valor(valor_alimentacao * 0.5)
-            total_viagem = diaria
-            detalhamento.append(f"• Alimentação (50%): {diaria:.2f}")
-            observacoes.append(f"Deslocamento de {formatar_duracao(total_horas)} - 50% da diária de alimentação")
-        else:
-            observacoes.append("Alimentação gratuita fornecida - sem diária")
-            detalhamento.append("• Alimentação gratuita fornecida")
-        
-        return {
-            "total_viagem": total_viagem,
-            "observacoes": observacoes,
-            "detalhamento": detalhamento,
-            "tipo_calculado": "6 a 8 horas (50% alimentação)"
-        }
-    
-    elif num_dias == 1:
-        # Mais de 8 horas no mesmo dia - 100% alimentação
-        if not alimentacao_gratuita:
-            diaria = valor_alimentacao
-            total_viagem = diaria
-            detalhamento.append(f"• Alimentação (100%): {diaria:.2f}")
-            observacoes.append(f"Deslocamento de {formatar_duracao(total_horas)} no mesmo dia - 100% da diária de alimentação")
-        else:
-            observacoes.append("Alimentação gratuita fornecida - sem diária")
-            detalhamento.append("• Alimentação gratuita fornecida")
-        
-        return {
-            "total_viagem": total_viagem,
-            "observacoes": observacoes,
-            "detalhamento": detalhamento,
-            "tipo_calculado": "Mais de 8 horas (100% alimentação)"
-        }
-    
-    else:
-        # Viagem com pernoite - lógica especial baseada no marco temporal
-        observacoes.append(f"Viagem com pernoite - {formatar_duracao(total_horas)} totais em {num_dias} dia(s)")
-        
-        # Calcular diárias por período de 24h a partir do horário de saída
-        data_atual = datetime_saida.date()
-        horario_marco = datetime_saida.time()
-        
-        while data_atual < datetime_retorno.date():
-            # Período de 24h completo - diária completa
-            if not alimentacao_gratuita and not hospedagem_gratuita:
-                diaria_dia = valor_total_dia
-            else:
-                diaria_dia = 0
-                if not alimentacao_gratuita:
-                    diaria_dia += valor_alimentacao
-                if not hospedagem_gratuita:
-                    diaria_dia += valor_pousada
-            
-            total_viagem += diaria_dia
-            data_str = data_atual.strftime('%d/%m/%Y')
-            detalhamento.append(f"• {data_str} (24h completas): {diaria_dia:.2f}")
-            
-            data_atual += timedelta(days=1)
-        
-        # Último dia - calcular horas restantes e aplicar regras do marco temporal
-        inicio_ultimo_dia = datetime.combine(data_atual, horario_marco)
-        horas_ultimo_dia = (datetime_retorno - inicio_ultimo_dia).total_seconds() / 3600
-        
-        if horas_ultimo_dia <= 6:
-            # Menos de 6h no último dia - sem diária
-            data_str = data_atual.strftime('%d/%m/%Y')
-            # Formatar horas sem casa decimal se for número inteiro
-            horas_formatadas = f"{int(horas_ultimo_dia)} horas" if horas_ultimo_dia == int(horas_ultimo_dia) else f"{horas_ultimo_dia:.1f} horas"
-            detalhamento.append(f"• {data_str} ({horas_formatadas} - menos de 6h): 0.00")
-        elif horas_ultimo_dia <= 8:
-            # 6 a 8h no último dia - 50% da diária de alimentação (TRUNCAR)
-            if not alimentacao_gratuita:
-                diaria_ultimo = truncar_valor(valor_alimentacao * 0.5)
-                total_viagem += diaria_ultimo
-                data_str = data_atual.strftime('%d/%m/%Y')
-                horas_formatadas = f"{int(horas_ultimo_dia)} horas" if horas_ultimo_dia == int(horas_ultimo_dia) else f"{horas_ultimo_dia:.1f} horas"
-                detalhamento.append(f"• {data_str} ({horas_formatadas} - 50% alimentação): {diaria_ultimo:.2f}")
-            else:
-                data_str = data_atual.strftime('%d/%m/%Y')
-                horas_formatadas = f"{int(horas_ultimo_dia)} horas" if horas_ultimo_dia == int(horas_ultimo_dia) else f"{horas_ultimo_dia:.1f} horas"
-                detalhamento.append(f"• {data_str} ({horas_formatadas} - alimentação gratuita): 0.00")
-        else:
-            # Mais de 8h no último dia - 100% da diária de alimentação
-            if not alimentacao_gratuita:
-                diaria_ultimo = valor_alimentacao
-                total_viagem += diaria_ultimo
-                data_str = data_atual.strftime('%d/%m/%Y')
-                horas_formatadas = f"{int(horas_ultimo_dia)} horas" if horas_ultimo_dia == int(horas_ultimo_dia) else f"{horas_ultimo_dia:.1f} horas"
-                detalhamento.append(f"• {data_str} ({horas_formatadas} - 100% alimentação): {diaria_ultimo:.2f}")
-            else:
-                data_str = data_atual.strftime('%d/%m/%Y')
-                horas_formatadas = f"{int(horas_ultimo_dia)} horas" if horas_ultimo_dia == int(horas_ultimo_dia) else f"{horas_ultimo_dia:.1f} horas"
-                detalhamento.append(f"• {data_str} ({horas_formatadas} - alimentação gratuita): 0.00")
-        
-        return {
-            "total_viagem": total_viagem,
-            "observacoes": observacoes,
-            "detalhamento": detalhamento,
-            "tipo_calculado": "Viagem com pernoite (marco temporal)",
-            "horas_ultimo_dia": horas_ultimo_dia
-        }
-
-# Calcular resultado usando a nova função
-resultado = calcular_diaria_por_horario(destino, datetime_saida, datetime_retorno, total_horas, num_dias, alimentacao_gratuita, hospedagem_gratuita)
+# Calcular resultado (cache compartilhado entre reruns e sessões)
+with registro_metricas.medir("pagina_calculo"):
+    resultado = calcular_diaria_em_cache(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita)
+inicio_renderizacao = time.perf_counter()
 
 # Layout principal com colunas
 col1, col2 = st.columns([2, 1])
@@ -483,25 +300,26 @@ with col1:
     st.subheader("📊 Resultado do Cálculo")
     
     # Resultado do cálculo
-    if resultado["total_viagem"] > 0:
-        st.success(f"**💰 Valor total da viagem: {format_currency(resultado['total_viagem'])}**")
+    if resultado.total_centavos > 0:
+        st.success(f"**💰 Valor total da viagem: {formatar_centavos(resultado.total_centavos)}**")
         
-        # Detalhamento baseado no novo sistema
-        if len(resultado["detalhamento"]) > 1:
+        # Detalhamento: itens estruturados do resultado, convertidos em texto aqui
+        itens = list(resultado.itens())
+        if len(itens) > 1:
             st.write("**📋 Detalhamento por período:**")
-            for item in resultado["detalhamento"]:
-                st.write(item)
-        elif len(resultado["detalhamento"]) == 1:
+            for item in itens:
+                st.write(renderizar_item(item))
+        elif len(itens) == 1:
             st.write("**📋 Composição:**")
-            st.write(resultado["detalhamento"][0])
+            st.write(renderizar_item(itens[0]))
             
     else:
         st.warning("⚠️ Nenhuma diária calculada para esta situação")
     
     # Observações
-    if resultado["observacoes"]:
+    if resultado.observacoes:
         st.subheader("📝 Observações")
-        for obs in resultado["observacoes"]:
+        for obs in resultado.observacoes:
             st.write(f"• {obs}")
 
 with col2:
@@ -516,7 +334,61 @@ with col2:
     st.write(f"**Duração:** {formatar_duracao(total_horas)}")
     
     st.markdown("**💰 Valor Total**")
-    st.markdown(f"### {format_currency(resultado['total_viagem'])}")
+    st.markdown(f"### {formatar_centavos(resultado.total_centavos)}")
+
+registro_metricas.observar("pagina_resultado", time.perf_counter() - inicio_renderizacao)
+
+# Simulação de custos para todos os horários (calculada apenas quando solicitada)
+DIAS_MAXIMOS_SIMULACAO = 10
+# O cache é compartilhado por todas as sessões e cada simulação ocupa até
+# ~8 MB (96 x 96 horários por dia): limitar a quantidade e a validade
+SIMULACOES_EM_CACHE = 16
+VALIDADE_SIMULACAO_SEGUNDOS = 30 * 60
+
+@st.cache_data(max_entries=SIMULACOES_EM_CACHE, ttl=VALIDADE_SIMULACAO_SEGUNDOS)
+def simulacao_custos(destino, data_saida, dias_maximos, alimentacao_gratuita, hospedagem_gratuita):
+    # numpy e pandas só são importados quando a simulação é exibida
+    from diarias.simulacao import simular_custos
+
+    return simular_custos(destino, data_saida, dias_maximos, alimentacao_gratuita, hospedagem_gratuita)
+
+st.subheader("🔎 Simulação de Custos por Horário")
+if st.toggle("Simular todos os horários de saída e retorno a partir da data de ida"):
+    import altair as alt
+    from diarias.lote import formatar_centavos_lote
+    from diarias.simulacao import resumo_por_dias
+
+    dias_simulacao = st.slider(
+        "Dias entre a saída e o retorno:",
+        min_value=0,
+        max_value=DIAS_MAXIMOS_SIMULACAO,
+        value=min(num_dias - 1, DIAS_MAXIMOS_SIMULACAO),
+    )
+    with registro_metricas.medir("pagina_simulacao"):
+        custos = simulacao_custos(destino, data_ida, dias_simulacao, alimentacao_gratuita, hospedagem_gratuita)
+        selecao = custos[custos["dias"] == dias_simulacao].assign(
+            valor=lambda df: df["total_centavos"] / 100,
+            valor_formatado=lambda df: formatar_centavos_lote(df["total_centavos"]),
+            tipo_calculado=lambda df: df["tipo_calculado"].astype(str),
+        )
+        mapa = alt.Chart(selecao).mark_rect().encode(
+            x=alt.X("hora_retorno:O", title="Horário de retorno"),
+            y=alt.Y("hora_saida:O", title="Horário de saída"),
+            color=alt.Color("valor:Q", title="Total (R$)"),
+            tooltip=[
+                alt.Tooltip("hora_saida:N", title="Saída"),
+                alt.Tooltip("hora_retorno:N", title="Retorno"),
+                alt.Tooltip("valor_formatado:N", title="Total"),
+                alt.Tooltip("tipo_calculado:N", title="Regra"),
+            ],
+        )
+        st.altair_chart(mapa, use_container_width=True)
+
+        # Faixa de valores para cada duração em dias, da mesma simulação
+        resumo = resumo_por_dias(custos).apply(formatar_centavos_lote)
+        resumo.columns = ["Menor total", "Maior total"]
+        resumo.index.name = "Dias entre saída e retorno"
+        st.dataframe(resumo, use_container_width=True)
 
 # Seção de informações legais
 st.subheader("⚖️ Base Legal")
@@ -537,16 +409,29 @@ with st.expander("Ver detalhes do Decreto nº 6.358/2024"):
     **V** - 80% (oitenta por cento) do valor limite diário, ao beneficiário exercendo função de tripulante de aeronave, para despesas com uso de dia de hospedagem e alimentação, quando houver interrupção da jornada de trabalho fora da base de origem, quando o período for superior a 6h e inferior a 10h consecutivas, nos termos da Lei Federal nº 13.475, de 28 de agosto de 2017, desde que não se enquadre nos incisos I a IV deste artigo.
     """)
 
-# Tabela de referência
+# Tabela de referência (montada uma vez e reaproveitada entre reruns e sessões)
+@st.cache_data
+def tabela_valores_formatada():
+    # pandas só é importado quando a tabela é montada pela primeira vez
+    import pandas as pd
+
+    df_valores = pd.DataFrame(VALORES_DIARIAS).T
+    # Aplicar formatação de moeda
+    for col in df_valores.columns:
+        df_valores[col] = df_valores[col].apply(formatar_centavos)
+    df_valores.columns = ['Alimentação', 'Hospedagem', 'Total']
+    df_valores.index.name = 'Destino'
+    return df_valores
+
 st.subheader("📊 Tabela Completa de Valores")
-df_valores = pd.DataFrame(VALORES_DIARIAS).T
-# Aplicar formatação de moeda
-for col in df_valores.columns:
-    df_valores[col] = df_valores[col].apply(format_currency)
-df_valores.columns = ['Alimentação', 'Hospedagem', 'Total']
-df_valores.index.name = 'Destino'
-st.dataframe(df_valores, use_container_width=True)
+with registro_metricas.medir("pagina_tabela"):
+    st.dataframe(tabela_valores_formatada(), use_container_width=True)
 
 # Footer
 st.markdown("---")
 st.caption("Calculadora baseada no Decreto nº 6.358/2024 - Tabela de Valores Limites para Diárias em Viagens em Território Nacional")
+
+# Métricas da execução
+registro_metricas.observar("pagina_execucao", time.perf_counter() - inicio_execucao)
+if registro_metricas.ativo and os.environ.get("DIARIAS_METRICAS_ARQUIVO"):
+    registro_metricas.gravar(os.environ["DIARIAS_METRICAS_ARQUIVO"])
@@ -0,0 +1,232 @@
+"""Suíte de benchmarks do motor de cálculo, da formatação e da página.
+
+Mede:
+
+- `calcular_diaria_por_horario` por classe de viagem (até 6h, 6 a 8h, mais
+  de 8h no mesmo dia, pernoite curto e muito longo), com e sem gratuidades e
+  com e sem detalhamento;
+- `format_currency`, `formatar_centavos` e `formatar_duracao` em massa, e
+  as versões vetorizadas de `diarias.lote`;
+- vazão do cálculo em lote (`diarias.lote`) com 10 mil e 1 milhão de linhas,
+  também sobre os arrays compactos de `diarias.registros`;
+- a simulação de custos por horário (`diarias.simulacao`) para até 7 dias;
+- um rerun completo de `app.py` pelo harness de testes do Streamlit.
+
+Os resultados são gravados em JSON para comparação entre versões:
+
+    python benchmarks/executar.py --saida resultados.json
+    python benchmarks/executar.py --comparar resultados.json --tolerancia 0.2
+
+Com `--comparar`, o script termina com código 1 se algum benchmark ficar mais
+lento que a referência além da tolerância.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from diarias import calcular_diaria_por_horario, format_currency, formatar_centavos, formatar_duracao  # noqa: E402
+
+_SAIDA = datetime(2024, 5, 2, 8, 0)
+
+# Classes de viagem: (nome, duração)
+CLASSES_VIAGEM = [
+    ("ate_6h", timedelta(hours=5)),
+    ("6_a_8h", timedelta(hours=7, minutes=30)),
+    ("mais_8h_mesmo_dia", timedelta(hours=10)),
+    ("pernoite_curto", timedelta(days=2, hours=9)),
+    ("pernoite_longo", timedelta(days=240, hours=7)),
+]
+
+GRATUIDADES = [
+    ("sem_gratuidade", False, False),
+    ("com_gratuidades", True, True),
+]
+
+TAMANHOS_LOTE = [10_000, 1_000_000]
+
+
+def _medir(funcao, repeticoes=5):
+    """Menor tempo por chamada (segundos) entre `repeticoes` rodadas do timeit"""
+    temporizador = timeit.Timer(funcao)
+    numero, _ = temporizador.autorange()
+    return min(temporizador.repeat(repeat=repeticoes, number=numero)) / numero
+
+
+def _registro(nome, segundos, itens=1):
+    return {
+        "nome": nome,
+        "segundos": segundos,
+        "itens_por_segundo": itens / segundos if segundos > 0 else None,
+    }
+
+
+def benchmarks_motor():
+    resultados = []
+    for nome_classe, duracao in CLASSES_VIAGEM:
+        retorno = _SAIDA + duracao
+        total_horas = duracao.total_seconds() / 3600
+        num_dias = (retorno.date() - _SAIDA.date()).days + 1
+        for nome_gratuidade, alimentacao, hospedagem in GRATUIDADES:
+            for detalhar in (True, False):
+                nome = f"motor/{nome_classe}/{nome_gratuidade}/{'detalhado' if detalhar else 'sem_detalhe'}"
+                segundos = _medir(
+                    lambda: calcular_diaria_por_horario(
+                        "Capitais de Estado", _SAIDA, retorno, total_horas, num_dias,
+                        alimentacao, hospedagem, detalhar=detalhar,
+                    )
+                )
+                resultados.append(_registro(nome, segundos))
+    return resultados
+
+
+def benchmarks_formatacao(quantidade=100_000):
+    centavos = [(i * 7919) % 10_000_000 for i in range(quantidade)]
+    reais = [valor / 100 for valor in centavos]
+    horas = [(i * 0.25) % 2000 for i in range(quantidade)]
+    resultados = [
+        _registro("formatacao/format_currency", _medir(lambda: [format_currency(v) for v in reais], 3), quantidade),
+        _registro("formatacao/formatar_centavos", _medir(lambda: [formatar_centavos(v) for v in centavos], 3), quantidade),
+        _registro("formatacao/formatar_duracao", _medir(lambda: [formatar_duracao(h) for h in horas], 3), quantidade),
+    ]
+    try:
+        import numpy as np
+
+        from diarias.lote import formatar_centavos_lote, formatar_duracao_lote, formatar_moeda_lote
+    except ImportError:
+        return resultados
+    centavos, reais, horas = np.array(centavos), np.array(reais), np.array(horas)
+    resultados += [
+        _registro("formatacao/formatar_moeda_lote", _medir(lambda: formatar_moeda_lote(reais), 3), quantidade),
+        _registro("formatacao/formatar_centavos_lote", _medir(lambda: formatar_centavos_lote(centavos), 3), quantidade),
+        _registro("formatacao/formatar_duracao_lote", _medir(lambda: formatar_duracao_lote(horas), 3), quantidade),
+    ]
+    return resultados
+
+
+def _viagens_aleatorias(quantidade, semente=0):
+    import numpy as np
+    import pandas as pd
+
+    gerador = np.random.default_rng(semente)
+    saida = pd.Timestamp("2024-01-01") + pd.to_timedelta(gerador.integers(0, 365 * 96, quantidade) * 15, "m")
+    retorno = saida + pd.to_timedelta(gerador.integers(1, 96 * 30, quantidade) * 15, "m")
+    destino = gerador.choice(["Distrito Federal", "Capitais de Estado", "Demais Municípios"], quantidade)
+    return destino, saida, retorno, gerador.random(quantidade) < 0.3, gerador.random(quantidade) < 0.3
+
+
+def benchmarks_lote(tamanhos=TAMANHOS_LOTE):
+    try:
+        from diarias.lote import calcular_lote
+        from diarias.registros import calcular_registros, empacotar_viagens
+    except ImportError:
+        return []
+    resultados = []
+    for tamanho in tamanhos:
+        colunas = _viagens_aleatorias(tamanho)
+        segundos = _medir(lambda: calcular_lote(*colunas), repeticoes=3)
+        resultados.append(_registro(f"lote/{tamanho}", segundos, tamanho))
+        viagens = empacotar_viagens(*colunas)
+        segundos = _medir(lambda: calcular_registros(viagens), repeticoes=3)
+        resultados.append(_registro(f"registros/{tamanho}", segundos, tamanho))
+    return resultados
+
+
+def benchmarks_simulacao(dias_maximos=7):
+    try:
+        from diarias.simulacao import simular_custos
+    except ImportError:
+        return []
+    segundos = _medir(lambda: simular_custos("Capitais de Estado", _SAIDA.date(), dias_maximos), repeticoes=3)
+    return [_registro(f"simulacao/{dias_maximos}_dias", segundos)]
+
+
+def benchmarks_pagina(repeticoes=10):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return []
+    pagina = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=60)
+    pagina.run()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        pagina.run()
+        tempos.append(time.perf_counter() - inicio)
+    return [_registro("pagina/rerun", min(tempos))]
+
+
+def _versao():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(rapido=False):
+    """Executa a suíte e devolve o relatório (dicionário serializável)"""
+    resultados = []
+    resultados += benchmarks_motor()
+    resultados += benchmarks_formatacao(10_000 if rapido else 100_000)
+    resultados += benchmarks_lote(TAMANHOS_LOTE[:1] if rapido else TAMANHOS_LOTE)
+    resultados += benchmarks_simulacao()
+    resultados += benchmarks_pagina()
+    return {
+        "versao": _versao(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+
+
+def comparar(relatorio, referencia, tolerancia):
+    """Lista (nome, razão) dos benchmarks mais lentos que a referência além da tolerância"""
+    base = {r["nome"]: r["segundos"] for r in referencia["resultados"]}
+    regressoes = []
+    for resultado in relatorio["resultados"]:
+        anterior = base.get(resultado["nome"])
+        if anterior:
+            razao = resultado["segundos"] / anterior
+            if razao > 1 + tolerancia:
+                regressoes.append((resultado["nome"], razao))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da calculadora de diárias.")
+    parser.add_argument("--saida", help="arquivo JSON onde gravar os resultados")
+    parser.add_argument("--comparar", help="relatório JSON de referência")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="lentidão aceita frente à referência (0.2 = 20%%)")
+    parser.add_argument("--rapido", action="store_true", help="tamanhos reduzidos (sem o lote de 1 milhão)")
+    args = parser.parse_args(argv)
+
+    relatorio = executar(rapido=args.rapido)
+    for resultado in relatorio["resultados"]:
+        vazao = resultado["itens_por_segundo"]
+        print(f"{resultado['nome']:<60} {resultado['segundos'] * 1e6:14.2f} µs  {vazao:16,.0f} itens/s")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(relatorio, json.load(arquivo), args.tolerancia)
+        for nome, razao in regressoes:
+            print(f"REGRESSÃO {nome}: {razao:.2f}x mais lento", file=sys.stderr)
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
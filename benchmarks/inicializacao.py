@@ -0,0 +1,96 @@
+"""Orçamento de tempo de inicialização e de rerun da página.
+
+Mede, em processos novos:
+
+- importação do motor (`import diarias`), sem Streamlit nem pandas;
+- primeira execução de `app.py` (partida a frio: importações, locale,
+  montagem da tabela de referência);
+- reruns seguintes da página, já com os caches preenchidos.
+
+Cada medida é comparada ao orçamento abaixo; o script termina com código 1 se
+algum for excedido. Uso:
+
+    python benchmarks/inicializacao.py [--repeticoes N] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamentos em segundos
+ORCAMENTO = {
+    "importacao_motor": 0.05,
+    "primeira_execucao": 1.0,
+    "rerun": 0.1,
+}
+
+_MEDIR_IMPORTACAO = """
+import time
+inicio = time.perf_counter()
+import diarias
+print(time.perf_counter() - inicio)
+"""
+
+_MEDIR_PAGINA = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+pagina = AppTest.from_file(sys.argv[1], default_timeout=60)
+inicio = time.perf_counter()
+pagina.run()
+primeira = time.perf_counter() - inicio
+reruns = []
+for _ in range(int(sys.argv[2])):
+    inicio = time.perf_counter()
+    pagina.run()
+    reruns.append(time.perf_counter() - inicio)
+if pagina.exception:
+    raise SystemExit(str(pagina.exception))
+print(json.dumps({"primeira_execucao": primeira, "reruns": reruns}))
+"""
+
+
+def _executar(codigo, *argumentos):
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo, *argumentos],
+        cwd=RAIZ,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return saida.stdout.strip().splitlines()[-1]
+
+
+def medir(repeticoes=5):
+    """Executa as medições e devolve um dicionário {medida: segundos}"""
+    importacoes = [float(_executar(_MEDIR_IMPORTACAO)) for _ in range(repeticoes)]
+    pagina = json.loads(_executar(_MEDIR_PAGINA, os.path.join(RAIZ, "app.py"), str(repeticoes)))
+    return {
+        "importacao_motor": statistics.median(importacoes),
+        "primeira_execucao": pagina["primeira_execucao"],
+        "rerun": statistics.median(pagina["reruns"]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="saída em JSON")
+    args = parser.parse_args(argv)
+
+    medidas = medir(args.repeticoes)
+    excedidos = [nome for nome, valor in medidas.items() if valor > ORCAMENTO[nome]]
+    if args.json:
+        print(json.dumps({"medidas": medidas, "orcamento": ORCAMENTO, "excedidos": excedidos}, indent=2))
+    else:
+        for nome, valor in medidas.items():
+            situacao = "EXCEDIDO" if nome in excedidos else "ok"
+            print(f"{nome:<20} {valor * 1000:8.1f} ms  (orçamento {ORCAMENTO[nome] * 1000:.0f} ms)  {situacao}")
+    return 1 if excedidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
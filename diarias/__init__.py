@@ -0,0 +1,37 @@
+"""Calculadora de diárias de viagem (Decreto nº 6.358/2024).
+
+O pacote não importa Streamlit nem pandas: o motor de cálculo pode ser usado
+diretamente por processos em lote e serviços.
+"""
+from .calculo import (
+    VALORES_DIARIAS,
+    ItemDetalhamento,
+    ResultadoDiaria,
+    calcular_diaria,
+    calcular_diaria_por_horario,
+    format_currency,
+    formatar_centavos,
+    formatar_duracao,
+    renderizar_item,
+    truncar_percentual,
+    truncar_valor,
+)
+from .tabelas import IndiceTabelas, TabelaValores, carregar_tabelas, indice_tabelas
+
+__all__ = [
+    "VALORES_DIARIAS",
+    "IndiceTabelas",
+    "ItemDetalhamento",
+    "ResultadoDiaria",
+    "TabelaValores",
+    "calcular_diaria",
+    "calcular_diaria_por_horario",
+    "carregar_tabelas",
+    "format_currency",
+    "formatar_centavos",
+    "formatar_duracao",
+    "indice_tabelas",
+    "renderizar_item",
+    "truncar_percentual",
+    "truncar_valor",
+]
@@ -0,0 +1,137 @@
+"""Totais correntes de diárias por servidor, centro de custo, destino e mês.
+
+Mantém o valor de cada viagem e somas por dimensão, de modo que incluir,
+editar ou cancelar uma viagem recalcula apenas essa viagem e ajusta apenas
+as somas das chaves afetadas, sem percorrer as demais. O mês de uma viagem
+é o da data de saída ("AAAA-MM").
+
+O valor de cada viagem vem de `consultar_grade`, que usa a tabela
+pré-calculada para horários na grade de 15 minutos e o motor exato nos
+demais casos.
+"""
+from collections import namedtuple
+from threading import Lock
+
+from .grade import consultar_grade
+
+DIMENSOES = ("servidor", "centro_custo", "destino", "mes")
+
+Viagem = namedtuple(
+    "Viagem",
+    [
+        "id_viagem",
+        "servidor",
+        "centro_custo",
+        "destino",
+        "saida",
+        "retorno",
+        "alimentacao_gratuita",
+        "hospedagem_gratuita",
+    ],
+)
+
+TotalAgregado = namedtuple("TotalAgregado", ["total_centavos", "viagens"])
+
+
+def _chaves(viagem):
+    """Chave da viagem em cada dimensão, na ordem de DIMENSOES"""
+    return (
+        viagem.servidor,
+        viagem.centro_custo,
+        viagem.destino,
+        f"{viagem.saida.year:04d}-{viagem.saida.month:02d}",
+    )
+
+
+class AgregadorDiarias:
+    """Viagens lançadas e seus totais por dimensão, atualizados incrementalmente
+
+    É seguro compartilhar uma instância entre threads.
+    """
+
+    def __init__(self, viagens=()):
+        self._viagens = {}
+        self._totais = {dimensao: {} for dimensao in DIMENSOES}
+        self._total_centavos = 0
+        self._trava = Lock()
+        for viagem in viagens:
+            self.adicionar(viagem)
+
+    def _calcular(self, viagem):
+        return consultar_grade(
+            viagem.destino, viagem.saida, viagem.retorno, viagem.alimentacao_gratuita, viagem.hospedagem_gratuita
+        ).total_centavos
+
+    def _somar(self, viagem, total_centavos, sinal):
+        for dimensao, chave in zip(DIMENSOES, _chaves(viagem)):
+            totais = self._totais[dimensao]
+            soma, quantidade = totais.get(chave, (0, 0))
+            soma += sinal * total_centavos
+            quantidade += sinal
+            if quantidade:
+                totais[chave] = (soma, quantidade)
+            else:
+                del totais[chave]
+        self._total_centavos += sinal * total_centavos
+
+    def adicionar(self, viagem):
+        """Lança uma nova viagem (`Viagem`) e devolve seu valor em centavos"""
+        total_centavos = self._calcular(viagem)
+        with self._trava:
+            if viagem.id_viagem in self._viagens:
+                raise ValueError(f"Viagem já lançada: {viagem.id_viagem}")
+            self._viagens[viagem.id_viagem] = (viagem, total_centavos)
+            self._somar(viagem, total_centavos, 1)
+        return total_centavos
+
+    def editar(self, id_viagem, **alteracoes):
+        """Altera campos de uma viagem lançada e devolve seu novo valor em centavos
+
+        O cálculo roda fora da trava; se outra thread alterou a viagem nesse
+        meio tempo, as alterações são reaplicadas sobre a versão atual.
+        """
+        if "id_viagem" in alteracoes:
+            raise ValueError("O identificador da viagem não pode ser alterado")
+        while True:
+            with self._trava:
+                registro = self._viagens[id_viagem]
+            anterior, total_anterior = registro
+            nova = anterior._replace(**alteracoes)
+            total_centavos = self._calcular(nova)
+            with self._trava:
+                if self._viagens[id_viagem] is not registro:
+                    continue
+                self._somar(anterior, total_anterior, -1)
+                self._viagens[id_viagem] = (nova, total_centavos)
+                self._somar(nova, total_centavos, 1)
+            return total_centavos
+
+    def cancelar(self, id_viagem):
+        """Remove uma viagem lançada e devolve o valor que ela somava"""
+        with self._trava:
+            viagem, total_centavos = self._viagens.pop(id_viagem)
+            self._somar(viagem, total_centavos, -1)
+        return total_centavos
+
+    def viagem(self, id_viagem):
+        """Viagem lançada e seu valor em centavos"""
+        with self._trava:
+            return self._viagens[id_viagem]
+
+    def totais(self, dimensao):
+        """Dicionário chave -> `TotalAgregado` de uma dimensão (servidor, centro_custo, destino ou mes)"""
+        with self._trava:
+            return {chave: TotalAgregado(*valores) for chave, valores in self._totais[dimensao].items()}
+
+    def total(self, dimensao, chave):
+        """`TotalAgregado` de uma chave (zero se não houver viagens)"""
+        with self._trava:
+            return TotalAgregado(*self._totais[dimensao].get(chave, (0, 0)))
+
+    @property
+    def total_centavos(self):
+        """Soma de todas as viagens lançadas"""
+        return self._total_centavos
+
+    def __len__(self):
+        return len(self._viagens)
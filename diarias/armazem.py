@@ -0,0 +1,361 @@
+"""Armazém persistente de resultados em arquivo colunar mapeado em memória.
+
+Grava os resultados calculados (total, tipo_calculado, horas_ultimo_dia e
+composição do valor) de cada viagem, com identificador, servidor e horários,
+em um único arquivo binário organizado por colunas. A leitura mapeia o arquivo em
+memória (`mmap`) e consulta as colunas diretamente, sem carregá-las: cada
+consulta lê apenas as posições que visita.
+
+O arquivo traz três índices ordenados, gravados junto com os dados, para
+busca binária:
+
+- por identificador da viagem (`buscar_viagem`);
+- por servidor e data de saída (`por_servidor`);
+- por data de saída (`por_periodo`).
+
+Layout: cabeçalho (`_CABECALHO`), tabela de seções (deslocamento e tamanho
+em bytes de cada item de SECOES) e as seções, alinhadas em 8 bytes. Textos
+(identificadores e servidores) ficam em áreas de bytes UTF-8 com um vetor de
+deslocamentos. Horários são gravados em segundos desde 01/01/1970, sem fuso
+horário.
+
+O detalhamento é gravado como as partes compactas do resultado
+(`ParteDetalhamento`), em colunas de largura fixa (data ordinal, dias, horas,
+código da categoria, código do destino e centavos), com um vetor de
+deslocamentos por registro: uma viagem longa ocupa algumas partes, e não uma
+linha de texto por dia. O texto é montado na leitura
+(`RegistroArmazenado.detalhamento`).
+
+Os índices são ordenados com NumPy sobre cópias de largura fixa dos textos,
+de modo que a gravação usa memória proporcional a registros × maior texto,
+sem um objeto Python por registro.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from .calculo import (
+    CATEGORIAS_DETALHAMENTO,
+    TIPOS_CALCULO,
+    VALORES_DIARIAS,
+    ParteDetalhamento,
+    itens_partes,
+    renderizar_item,
+)
+
+MAGICO = b"DIARIAS\x00"
+VERSAO = 2
+
+# Seções do arquivo, na ordem de gravação, com o typecode de `array`
+SECOES = (
+    ("id_posicoes", "q"),
+    ("id_textos", "B"),
+    ("servidor_posicoes", "q"),
+    ("servidor_textos", "B"),
+    ("saida", "q"),
+    ("retorno", "q"),
+    ("total_centavos", "q"),
+    ("tipo", "b"),
+    ("horas_ultimo_dia", "d"),
+    ("partes_posicoes", "q"),
+    ("parte_data", "i"),
+    ("parte_dias", "i"),
+    ("parte_horas", "d"),
+    ("parte_categoria", "b"),
+    ("parte_destino", "b"),
+    ("parte_centavos", "q"),
+    ("indice_id", "q"),
+    ("indice_servidor", "q"),
+    ("indice_saida", "q"),
+)
+
+# Mágico, versão, ordem dos bytes (0 = little, 1 = big) e quantidade de registros
+_CABECALHO = struct.Struct("<8sHHQ")
+_SECAO = struct.Struct("<QQ")
+_ORDEM_BYTES = {"little": 0, "big": 1}
+
+_EPOCA = datetime(1970, 1, 1)
+_UM_SEGUNDO = timedelta(seconds=1)
+_MINIMO = -(2 ** 63)
+_MAXIMO = 2 ** 63 - 1
+
+_DESTINOS = tuple(VALORES_DIARIAS)
+_CODIGOS_DESTINO = {destino: codigo for codigo, destino in enumerate(_DESTINOS)}
+_CODIGOS_CATEGORIA = {categoria: codigo for codigo, categoria in enumerate(CATEGORIAS_DETALHAMENTO)}
+
+
+class RegistroArmazenado(
+    namedtuple(
+        "RegistroArmazenado",
+        [
+            "id_viagem",
+            "servidor",
+            "saida",
+            "retorno",
+            "total_centavos",
+            "tipo_calculado",
+            "horas_ultimo_dia",
+            "partes",
+        ],
+    )
+):
+    """Registro lido do armazém; `partes` é a composição compacta do valor"""
+
+    __slots__ = ()
+
+    def itens(self):
+        """Itens de detalhamento, um por dia (ver `ResultadoDiaria.itens`)"""
+        return itens_partes(self.partes)
+
+    @property
+    def detalhamento(self):
+        """Linhas de detalhamento ("• ..."), montadas a partir das partes"""
+        return [renderizar_item(item) for item in self.itens()]
+
+
+def _segundos(momento):
+    return (momento - _EPOCA) // _UM_SEGUNDO
+
+
+def _momento(segundos):
+    return _EPOCA + timedelta(seconds=segundos)
+
+
+def _acrescentar_texto(posicoes, textos, texto):
+    textos.extend(texto.encode("utf-8"))
+    posicoes.append(len(textos))
+
+
+def gravar_armazem(caminho, registros):
+    """Grava um arquivo do armazém e devolve o número de registros
+
+    `registros` é um iterável de (id_viagem, servidor, saida, retorno,
+    resultado), em que `resultado` é um `ResultadoDiaria`. Identificadores
+    repetidos levantam ValueError. O arquivo é gravado em um temporário e
+    substituído de forma atômica.
+    """
+    colunas = {nome: array(tipo) for nome, tipo in SECOES}
+    for nome in ("id_textos", "servidor_textos"):
+        colunas[nome] = bytearray()
+    for nome in ("id_posicoes", "servidor_posicoes", "partes_posicoes"):
+        colunas[nome].append(0)
+    codigo_tipo = {tipo: codigo for codigo, tipo in enumerate(TIPOS_CALCULO)}
+
+    for id_viagem, servidor, saida, retorno, resultado in registros:
+        _acrescentar_texto(colunas["id_posicoes"], colunas["id_textos"], str(id_viagem))
+        _acrescentar_texto(colunas["servidor_posicoes"], colunas["servidor_textos"], str(servidor))
+        for parte in resultado.partes:
+            colunas["parte_data"].append(parte.data.toordinal() if parte.data is not None else 0)
+            colunas["parte_dias"].append(parte.dias)
+            colunas["parte_horas"].append(parte.horas)
+            colunas["parte_categoria"].append(_CODIGOS_CATEGORIA[parte.categoria])
+            colunas["parte_destino"].append(_CODIGOS_DESTINO[parte.destino] if parte.destino is not None else -1)
+            colunas["parte_centavos"].append(parte.valor_centavos)
+        colunas["partes_posicoes"].append(len(colunas["parte_dias"]))
+        colunas["saida"].append(_segundos(saida))
+        colunas["retorno"].append(_segundos(retorno))
+        colunas["total_centavos"].append(resultado.total_centavos)
+        colunas["tipo"].append(codigo_tipo[resultado.tipo_calculado])
+        horas = resultado.horas_ultimo_dia
+        colunas["horas_ultimo_dia"].append(float("nan") if horas is None else horas)
+
+    quantidade = len(colunas["saida"])
+    ids = _textos_largura_fixa(colunas["id_posicoes"], colunas["id_textos"])
+    servidores = _textos_largura_fixa(colunas["servidor_posicoes"], colunas["servidor_textos"])
+    saidas = np.frombuffer(colunas["saida"], dtype=np.int64)
+    indice_id = np.argsort(ids, kind="stable")
+    repetidos = np.flatnonzero(ids[indice_id[1:]] == ids[indice_id[:-1]])
+    if len(repetidos):
+        raise ValueError(f"Identificador de viagem repetido: {ids[indice_id[repetidos[0]]].decode('utf-8')}")
+    indices = {
+        "indice_id": indice_id,
+        "indice_servidor": np.lexsort((saidas, servidores)),
+        "indice_saida": np.argsort(saidas, kind="stable"),
+    }
+    del ids, servidores
+
+    # Seções alinhadas em 8 bytes após o cabeçalho e a tabela de seções
+    conteudos = [
+        indices[nome].astype(np.int64).tobytes() if nome in indices
+        else bytes(colunas[nome]) if tipo == "B"
+        else colunas[nome].tobytes()
+        for nome, tipo in SECOES
+    ]
+    deslocamento = _CABECALHO.size + _SECAO.size * len(SECOES)
+    tabela = []
+    for conteudo in conteudos:
+        deslocamento += -deslocamento % 8
+        tabela.append((deslocamento, len(conteudo)))
+        deslocamento += len(conteudo)
+
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(_CABECALHO.pack(MAGICO, VERSAO, _ORDEM_BYTES[sys.byteorder], quantidade))
+        for posicao, tamanho in tabela:
+            arquivo.write(_SECAO.pack(posicao, tamanho))
+        for (posicao, _), conteudo in zip(tabela, conteudos):
+            arquivo.write(b"\x00" * (posicao - arquivo.tell()))
+            arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+    return quantidade
+
+
+def _textos_largura_fixa(posicoes, textos):
+    """Textos como array NumPy de bytes de largura fixa ("S"), para ordenação
+
+    A ordem é a mesma da comparação de `bytes` usada nas buscas (textos sem
+    bytes nulos no final).
+    """
+    posicoes = np.frombuffer(posicoes, dtype=np.int64)
+    inicios = posicoes[:-1]
+    tamanhos = np.diff(posicoes)
+    largura = max(int(tamanhos.max(initial=0)), 1)
+    dados = np.frombuffer(bytes(textos), dtype=np.uint8)
+    matriz = np.zeros((len(tamanhos), largura), dtype=np.uint8)
+    for coluna in range(largura):
+        presentes = np.flatnonzero(tamanhos > coluna)
+        matriz[presentes, coluna] = dados[inicios[presentes] + coluna]
+    return matriz.view(f"S{largura}").ravel()
+
+
+class ArmazemResultados:
+    """Leitura de um arquivo do armazém, mapeado em memória
+
+    Use como gerenciador de contexto ou chame `fechar`. As consultas que
+    devolvem vários registros são geradores e devem ser consumidas antes de
+    fechar o armazém.
+    """
+
+    def __init__(self, caminho):
+        self._arquivo = open(caminho, "rb")
+        try:
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._arquivo.close()
+            raise ValueError(f"Arquivo do armazém vazio: {caminho}") from None
+        magico, versao, ordem, self._quantidade = _CABECALHO.unpack_from(self._mapa, 0)
+        if magico != MAGICO or versao != VERSAO:
+            self.fechar()
+            raise ValueError(f"Arquivo do armazém inválido ou de outra versão: {caminho}")
+        if ordem != _ORDEM_BYTES[sys.byteorder]:
+            self.fechar()
+            raise ValueError(f"Arquivo do armazém gravado com outra ordem de bytes: {caminho}")
+
+        self._visoes = [memoryview(self._mapa)]
+        secoes = {}
+        for numero, (nome, tipo) in enumerate(SECOES):
+            posicao, tamanho = _SECAO.unpack_from(self._mapa, _CABECALHO.size + numero * _SECAO.size)
+            visao = self._visoes[0][posicao:posicao + tamanho]
+            if tipo != "B":
+                self._visoes.append(visao)
+                visao = visao.cast(tipo)
+            self._visoes.append(visao)
+            secoes[nome] = visao
+        self._secoes = secoes
+        self._saida = secoes["saida"]
+
+    def fechar(self):
+        for visao in reversed(getattr(self, "_visoes", [])):
+            visao.release()
+        self._visoes = []
+        if getattr(self, "_mapa", None) is not None:
+            self._mapa.close()
+            self._mapa = None
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def __len__(self):
+        return self._quantidade
+
+    def _texto(self, campo, posicao):
+        posicoes = self._secoes[f"{campo}_posicoes"]
+        return bytes(self._secoes[f"{campo}_textos"][posicoes[posicao]:posicoes[posicao + 1]])
+
+    def registro(self, posicao):
+        """Registro na posição `posicao` (ordem de gravação)"""
+        if not 0 <= posicao < self._quantidade:
+            raise IndexError(posicao)
+        secoes = self._secoes
+        horas = secoes["horas_ultimo_dia"][posicao]
+        return RegistroArmazenado(
+            id_viagem=self._texto("id", posicao).decode("utf-8"),
+            servidor=self._texto("servidor", posicao).decode("utf-8"),
+            saida=_momento(secoes["saida"][posicao]),
+            retorno=_momento(secoes["retorno"][posicao]),
+            total_centavos=secoes["total_centavos"][posicao],
+            tipo_calculado=TIPOS_CALCULO[secoes["tipo"][posicao]],
+            horas_ultimo_dia=None if horas != horas else horas,
+            partes=self._partes(posicao),
+        )
+
+    def _partes(self, posicao):
+        secoes = self._secoes
+        inicio, fim = secoes["partes_posicoes"][posicao], secoes["partes_posicoes"][posicao + 1]
+        return tuple(
+            ParteDetalhamento(
+                date.fromordinal(data) if data else None,
+                dias,
+                horas,
+                CATEGORIAS_DETALHAMENTO[categoria],
+                centavos,
+                _DESTINOS[destino] if destino >= 0 else None,
+            )
+            for data, dias, horas, categoria, destino, centavos in zip(
+                secoes["parte_data"][inicio:fim],
+                secoes["parte_dias"][inicio:fim],
+                secoes["parte_horas"][inicio:fim],
+                secoes["parte_categoria"][inicio:fim],
+                secoes["parte_destino"][inicio:fim],
+                secoes["parte_centavos"][inicio:fim],
+            )
+        )
+
+    def registros(self):
+        """Todos os registros, na ordem de gravação"""
+        for posicao in range(self._quantidade):
+            yield self.registro(posicao)
+
+    def buscar_viagem(self, id_viagem):
+        """Registro da viagem `id_viagem`, ou None se não estiver no armazém"""
+        chave = str(id_viagem).encode("utf-8")
+        indice = self._secoes["indice_id"]
+        encontrado = bisect_left(indice, chave, key=lambda posicao: self._texto("id", posicao))
+        if encontrado < len(indice) and self._texto("id", indice[encontrado]) == chave:
+            return self.registro(indice[encontrado])
+        return None
+
+    def por_servidor(self, servidor, inicio=None, fim=None):
+        """Registros de um servidor com saída em [inicio, fim), em ordem de saída"""
+        chave = str(servidor).encode("utf-8")
+        indice = self._secoes["indice_servidor"]
+
+        def chave_indice(posicao):
+            return self._texto("servidor", posicao), self._saida[posicao]
+
+        primeiro = bisect_left(indice, (chave, _MINIMO if inicio is None else _segundos(inicio)), key=chave_indice)
+        if fim is None:
+            ultimo = bisect_right(indice, (chave, _MAXIMO), key=chave_indice)
+        else:
+            ultimo = bisect_left(indice, (chave, _segundos(fim)), key=chave_indice)
+        for numero in range(primeiro, ultimo):
+            yield self.registro(indice[numero])
+
+    def por_periodo(self, inicio, fim):
+        """Registros com saída em [inicio, fim), em ordem de saída"""
+        indice = self._secoes["indice_saida"]
+        primeiro = bisect_left(indice, _segundos(inicio), key=self._saida.__getitem__)
+        ultimo = bisect_left(indice, _segundos(fim), key=self._saida.__getitem__)
+        for numero in range(primeiro, ultimo):
+            yield self.registro(indice[numero])
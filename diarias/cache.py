@@ -0,0 +1,128 @@
+"""Cache LRU de resultados para formatos de viagem repetidos.
+
+A maior parte das viagens repete poucos formatos: mesmo destino, mesma
+duração, mesmo horário de saída e mesmas gratuidades. O resultado do cálculo
+depende apenas desse formato e das tabelas de valores vigentes, e não das
+datas absolutas — exceto as datas exibidas no detalhamento e a divisão dos
+dias entre tabelas quando a viagem atravessa uma mudança de tabela. Por isso
+a chave do cache normaliza a viagem, identifica as tabelas vigentes na saída
+e no retorno e só inclui a data de saída nesses dois casos. A chave também
+distingue pedidos com e sem detalhamento, que têm resultados diferentes.
+
+A instância `cache_diarias` é compartilhada pelo processo (todas as sessões
+do Streamlit e chamadores em lote). Seu tamanho pode ser ajustado pela
+variável de ambiente DIARIAS_CACHE_TAMANHO.
+"""
+import os
+from collections import OrderedDict, namedtuple
+from dataclasses import replace
+from threading import Lock
+
+from .calculo import calcular_diaria
+from .metricas import registro_metricas
+from .tabelas import indice_tabelas
+
+TAMANHO_PADRAO = 4096
+
+InfoCache = namedtuple("InfoCache", ["acertos", "falhas", "tamanho_maximo", "tamanho_atual"])
+
+
+def chave_viagem(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=True):
+    """Formato normalizado da viagem usado como chave do cache"""
+    tabelas = indice_tabelas()
+    tabela_saida = tabelas.posicao(datetime_saida.date())
+    tabela_retorno = tabelas.posicao(datetime_retorno.date())
+    return (
+        destino,
+        bool(alimentacao_gratuita),
+        bool(hospedagem_gratuita),
+        (datetime_retorno.date() - datetime_saida.date()).days,
+        datetime_saida.time(),
+        datetime_retorno.time(),
+        tabela_saida,
+        tabela_retorno,
+        bool(detalhar),
+        datetime_saida.date() if detalhar or tabela_saida != tabela_retorno else None,
+    )
+
+
+class CacheDiarias:
+    """Cache de `calcular_diaria` com limite de tamanho e descarte LRU
+
+    Os resultados devolvidos são cópias, de modo que alterações feitas pelo
+    chamador não afetam o cache. É seguro compartilhar uma instância entre
+    threads.
+    """
+
+    def __init__(self, tamanho_maximo=TAMANHO_PADRAO):
+        if tamanho_maximo <= 0:
+            raise ValueError("tamanho_maximo deve ser positivo")
+        self.tamanho_maximo = tamanho_maximo
+        self.acertos = 0
+        self.falhas = 0
+        self._resultados = OrderedDict()
+        self._trava = Lock()
+
+    def calcular(self, destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=True):
+        """Devolve o resultado em cache para o formato da viagem, calculando-o se necessário"""
+        chave = chave_viagem(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar)
+        with self._trava:
+            resultado = self._resultados.get(chave)
+            if resultado is not None:
+                self._resultados.move_to_end(chave)
+                self.acertos += 1
+                registro_metricas.contar("diarias_calculos_total", tipo_calculado=resultado.tipo_calculado)
+                return _copiar(resultado)
+            self.falhas += 1
+
+        with registro_metricas.medir("calculo"):
+            resultado = calcular_diaria(
+                destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=detalhar
+            )
+        registro_metricas.contar("diarias_calculos_total", tipo_calculado=resultado.tipo_calculado)
+        with self._trava:
+            self._resultados[chave] = resultado
+            self._resultados.move_to_end(chave)
+            while len(self._resultados) > self.tamanho_maximo:
+                self._resultados.popitem(last=False)
+        return _copiar(resultado)
+
+    def info(self):
+        """Contadores de acertos e falhas e ocupação atual"""
+        with self._trava:
+            return InfoCache(self.acertos, self.falhas, self.tamanho_maximo, len(self._resultados))
+
+    def limpar(self):
+        """Esvazia o cache e zera os contadores"""
+        with self._trava:
+            self._resultados.clear()
+            self.acertos = 0
+            self.falhas = 0
+
+
+def _copiar(resultado):
+    # `partes` e `notas` são tuplas imutáveis: basta uma cópia rasa
+    return replace(resultado)
+
+
+# Instância compartilhada pelo processo
+cache_diarias = CacheDiarias(int(os.environ.get("DIARIAS_CACHE_TAMANHO", TAMANHO_PADRAO)))
+
+
+def _coletar_metricas(registro):
+    """Publica os contadores de `cache_diarias` no registro de métricas"""
+    info = cache_diarias.info()
+    consultas = info.acertos + info.falhas
+    registro.definir("diarias_cache_acertos_total", info.acertos)
+    registro.definir("diarias_cache_falhas_total", info.falhas)
+    registro.definir("diarias_cache_razao_acertos", info.acertos / consultas if consultas else 0.0)
+
+
+registro_metricas.adicionar_coletor(_coletar_metricas)
+
+
+def calcular_diaria_em_cache(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=True):
+    """Calcula a diária usando a instância compartilhada `cache_diarias`"""
+    return cache_diarias.calcular(
+        destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=detalhar
+    )
@@ -0,0 +1,380 @@
+"""Motor de cálculo de diárias (Decreto nº 6.358/2024).
+
+Módulo independente do Streamlit: usa apenas a biblioteca padrão, de modo que
+processos em lote e serviços possam importá-lo sem custo de inicialização da
+interface.
+
+Os valores vêm da tabela vigente em cada data (`diarias.tabelas`): a data de
+saída define a tabela das viagens sem pernoite; com pernoite, cada período de
+24h usa a tabela vigente no dia em que começa.
+"""
+import math
+from collections import namedtuple
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from .tabelas import indice_tabelas
+
+# Valores da tabela vigente, em centavos de real, carregados de
+# `dados/tabelas_valores.json` (ver `diarias.tabelas`). Todo o cálculo é feito
+# com inteiros; a conversão para reais ocorre apenas na formatação.
+VALORES_DIARIAS = indice_tabelas().vigente.valores
+
+# Regras de enquadramento da viagem (valor de `tipo_calculado`)
+TIPO_ATE_6H = "Até 6 horas (sem diária)"
+TIPO_6_A_8H = "6 a 8 horas (50% alimentação)"
+TIPO_MAIS_8H = "Mais de 8 horas (100% alimentação)"
+TIPO_PERNOITE = "Viagem com pernoite (marco temporal)"
+TIPOS_CALCULO = (TIPO_ATE_6H, TIPO_6_A_8H, TIPO_MAIS_8H, TIPO_PERNOITE)
+
+
+# Categorias dos itens de detalhamento: período de 24h completo e regras
+# aplicadas ao último dia ou às viagens sem pernoite
+CATEGORIA_PERIODO_COMPLETO = "24h completas"
+REGRA_MENOS_6H = "menos de 6h"
+REGRA_ALIMENTACAO_GRATUITA = "alimentação gratuita"
+REGRA_50_ALIMENTACAO = "50% alimentação"
+REGRA_100_ALIMENTACAO = "100% alimentação"
+CATEGORIAS_DETALHAMENTO = (
+    CATEGORIA_PERIODO_COMPLETO,
+    REGRA_MENOS_6H,
+    REGRA_ALIMENTACAO_GRATUITA,
+    REGRA_50_ALIMENTACAO,
+    REGRA_100_ALIMENTACAO,
+)
+
+# Item de detalhamento: data (None sem pernoite), horas consideradas,
+# categoria, valor em centavos e destino (apenas em itinerários)
+ItemDetalhamento = namedtuple("ItemDetalhamento", ["data", "horas", "categoria", "valor_centavos", "destino"])
+
+# Parte compacta da composição do valor: `dias` itens consecutivos iguais a
+# partir de `data` (períodos de 24h com a mesma tabela e o mesmo destino)
+ParteDetalhamento = namedtuple("ParteDetalhamento", ["data", "dias", "horas", "categoria", "valor_centavos", "destino"])
+
+
+def itens_partes(partes):
+    """Gera os itens de detalhamento de uma sequência de `ParteDetalhamento`, um por dia"""
+    for parte in partes:
+        for dia in range(parte.dias):
+            data = parte.data + timedelta(days=dia) if parte.data is not None else None
+            yield ItemDetalhamento(data, parte.horas, parte.categoria, parte.valor_centavos, parte.destino)
+
+
+@dataclass
+class ResultadoDiaria:
+    """Resultado estruturado de `calcular_diaria_por_horario`.
+
+    - total_centavos: valor total devido, em centavos de real
+    - tipo_calculado: regra aplicada (até 6h, 6 a 8h, mais de 8h ou pernoite)
+    - horas_ultimo_dia: horas contadas no último dia (apenas com pernoite)
+    - total_horas, num_dias, alimentacao_gratuita: dados do enquadramento
+    - partes: composição compacta do valor (`ParteDetalhamento`), vazia
+      quando o detalhamento não é pedido
+    - notas: observações adicionais (por exemplo, de itinerários)
+
+    Os itens de detalhamento (`itens`) e os textos exibidos pela página
+    (`detalhamento` e `observacoes`) são montados apenas quando acessados.
+    `total_viagem` fornece o total convertido para reais.
+    """
+    total_centavos: int
+    tipo_calculado: str = ""
+    horas_ultimo_dia: Optional[float] = None
+    total_horas: float = 0.0
+    num_dias: int = 1
+    alimentacao_gratuita: bool = False
+    partes: Tuple[ParteDetalhamento, ...] = ()
+    notas: Tuple[str, ...] = ()
+
+    @property
+    def total_viagem(self):
+        """Valor total devido, em reais"""
+        return self.total_centavos / 100
+
+    def itens(self):
+        """Gera os itens de detalhamento, um por dia nos períodos de 24h"""
+        return itens_partes(self.partes)
+
+    @property
+    def detalhamento(self):
+        """Linhas de composição do valor ("• ..."), montadas a partir de `itens`"""
+        return [renderizar_item(item) for item in self.itens()]
+
+    @property
+    def observacoes(self):
+        """Observações textuais sobre o enquadramento da viagem"""
+        duracao = formatar_duracao(self.total_horas)
+        if self.tipo_calculado == TIPO_ATE_6H:
+            observacao = f"Deslocamento de {duracao} - inferior a 6 horas, sem direito à diária"
+        elif self.tipo_calculado == TIPO_PERNOITE:
+            observacao = f"Viagem com pernoite - {duracao} totais em {self.num_dias} dia(s)"
+        elif self.alimentacao_gratuita:
+            observacao = "Alimentação gratuita fornecida - sem diária"
+        elif self.tipo_calculado == TIPO_6_A_8H:
+            observacao = f"Deslocamento de {duracao} - 50% da diária de alimentação"
+        else:
+            observacao = f"Deslocamento de {duracao} no mesmo dia - 100% da diária de alimentação"
+        return [observacao, *self.notas]
+
+    def como_dict(self):
+        """Representação serializável em JSON, com o total em centavos e em reais"""
+        return {
+            "total_centavos": self.total_centavos,
+            "total_viagem": self.total_viagem,
+            "tipo_calculado": self.tipo_calculado,
+            "horas_ultimo_dia": self.horas_ultimo_dia,
+            "observacoes": self.observacoes,
+            "detalhamento": self.detalhamento,
+            "itens": [
+                {
+                    "data": item.data.isoformat() if item.data is not None else None,
+                    "horas": item.horas,
+                    "categoria": item.categoria,
+                    "valor_centavos": item.valor_centavos,
+                    "destino": item.destino,
+                }
+                for item in self.itens()
+            ],
+        }
+
+
+# Função para truncar valores em vez de arredondar
+def truncar_valor(valor, casas_decimais=2):
+    """Trunca um valor para o número especificado de casas decimais (sem arredondamento)"""
+    multiplicador = 10 ** casas_decimais
+    return math.floor(valor * multiplicador) / multiplicador
+
+# Função para truncar percentual de um valor em centavos
+def truncar_percentual(centavos, percentual):
+    """Aplica um percentual inteiro a um valor em centavos, truncando a fração de centavo"""
+    return centavos * percentual // 100
+
+# Função para formatar centavos no padrão do detalhamento
+def formatar_centavos_decimal(centavos):
+    """Formata centavos como número decimal com ponto: 1234.56"""
+    return f"{centavos // 100}.{centavos % 100:02d}"
+
+# Texto das horas restantes, como exibido na duração ("1 hora", "7.5 horas")
+def _texto_horas(horas):
+    # Formatar horas sem casa decimal se for número inteiro
+    if horas == int(horas):
+        return f"{int(horas)} horas" if horas != 1 else "1 hora"
+    return f"{horas:.1f} horas"
+
+# Texto das horas do último dia no detalhamento ("1 horas", "-2.5 horas")
+def _texto_horas_detalhe(horas):
+    return f"{int(horas)} horas" if horas == int(horas) else f"{horas:.1f} horas"
+
+# Textos pré-montados para os quartos de hora, que cobrem os horários da página
+_TEXTO_HORAS = {q / 4: _texto_horas(q / 4) for q in range(96)}
+_TEXTO_HORAS_DETALHE = {q / 4: _texto_horas_detalhe(q / 4) for q in range(-96, 97)}
+
+# Função para formatar duração em dias + horas
+def formatar_duracao(total_horas):
+    """Converte horas totais para formato 'x dias + y horas'"""
+    dias_completos = int(total_horas // 24)
+    horas_restantes = total_horas % 24
+    horas_str = _TEXTO_HORAS.get(horas_restantes) or _texto_horas(horas_restantes)
+    
+    if dias_completos == 0:
+        return horas_str
+    dias_str = "1 dia" if dias_completos == 1 else f"{dias_completos} dias"
+    if horas_restantes == 0:
+        return dias_str
+    return f"{dias_str} + {horas_str}"
+
+# Troca dos separadores do formato americano (1,234.56) pelo brasileiro (1.234,56)
+_SEPARADORES_BR = str.maketrans(",.", ".,")
+
+# Função para formatar moeda
+def format_currency(value):
+    """Formata valor para moeda brasileira: R$ 1.234,56"""
+    # Converter para float se necessário
+    if isinstance(value, str):
+        value = float(value)
+    return "R$ " + f"{value:,.2f}".translate(_SEPARADORES_BR)
+
+# Função para formatar moeda a partir de centavos
+def formatar_centavos(centavos):
+    """Formata um valor em centavos para moeda brasileira: R$ 1.234,56"""
+    sinal = "-" if centavos < 0 else ""
+    inteira, fracao = divmod(abs(centavos), 100)
+    return f"R$ {sinal}{inteira:,}".replace(",", ".") + f",{fracao:02d}"
+
+# Texto das horas do último dia no detalhamento, pré-montado na grade de 15 minutos
+def texto_horas_detalhe(horas):
+    """Horas do último dia como exibidas no detalhamento ("1 horas", "7.5 horas")"""
+    return _TEXTO_HORAS_DETALHE.get(horas) or _texto_horas_detalhe(horas)
+
+# Valor de um período de 24h completo, descontadas as gratuidades
+def valor_periodo_completo(valores, alimentacao_gratuita, hospedagem_gratuita):
+    """Diária de um período de 24h (centavos) para os valores de um destino"""
+    if not alimentacao_gratuita and not hospedagem_gratuita:
+        return valores["total"]
+    diaria_dia = 0
+    if not alimentacao_gratuita:
+        diaria_dia += valores["alimentacao"]
+    if not hospedagem_gratuita:
+        diaria_dia += valores["pousada"]
+    return diaria_dia
+
+# Regra do último dia de uma viagem com pernoite (marco temporal)
+def diaria_ultimo_dia(horas_ultimo_dia, valor_alimentacao, alimentacao_gratuita):
+    """Valor (centavos) e regra aplicada às horas do último dia"""
+    if horas_ultimo_dia <= 6:
+        # Menos de 6h no último dia - sem diária
+        return 0, REGRA_MENOS_6H
+    if alimentacao_gratuita:
+        return 0, REGRA_ALIMENTACAO_GRATUITA
+    if horas_ultimo_dia <= 8:
+        # 6 a 8h no último dia - 50% da diária de alimentação (TRUNCAR)
+        return truncar_percentual(valor_alimentacao, 50), REGRA_50_ALIMENTACAO
+    # Mais de 8h no último dia - 100% da diária de alimentação
+    return valor_alimentacao, REGRA_100_ALIMENTACAO
+
+# Texto de um item de detalhamento, no formato exibido pela página
+def renderizar_item(item):
+    """Linha de detalhamento ("• ...") de um `ItemDetalhamento`"""
+    valor = formatar_centavos_decimal(item.valor_centavos)
+    if item.data is None:
+        # Viagem sem pernoite
+        if item.categoria == REGRA_MENOS_6H:
+            return "• Nenhuma diária calculada (menos de 6 horas)"
+        if item.categoria == REGRA_ALIMENTACAO_GRATUITA:
+            return "• Alimentação gratuita fornecida"
+        percentual = "50%" if item.categoria == REGRA_50_ALIMENTACAO else "100%"
+        return f"• Alimentação ({percentual}): {valor}"
+    data_str = item.data.strftime('%d/%m/%Y')
+    destino = f" - {item.destino}" if item.destino else ""
+    if item.categoria == CATEGORIA_PERIODO_COMPLETO:
+        return f"• {data_str} (24h completas{destino}): {valor}"
+    return f"• {data_str} ({texto_horas_detalhe(item.horas)} - {item.categoria}{destino}): {valor}"
+
+# Função para calcular a diária baseada em horários
+def calcular_diaria_por_horario(destino, datetime_saida, datetime_retorno, total_horas, num_dias, alimentacao_gratuita, hospedagem_gratuita, detalhar=True, tabelas=None):
+    """Calcula a diária de uma viagem e devolve um `ResultadoDiaria`
+
+    O custo depende apenas do número de mudanças de tabela durante a viagem,
+    e não da sua duração: o resultado guarda a composição do valor em partes
+    compactas (quando `detalhar` é verdadeiro), e os itens e textos de cada
+    dia são gerados apenas quando acessados. `tabelas` substitui o índice de
+    tabelas padrão (`indice_tabelas()`).
+    """
+    tabelas = tabelas or indice_tabelas()
+    valor_alimentacao = tabelas.tabela_em(datetime_saida.date()).valores[destino]["alimentacao"]
+    
+    # Determinar tipo de viagem baseado nas horas
+    if total_horas <= 6:
+        # Até 6 horas - sem diária
+        tipo_calculado = TIPO_ATE_6H
+        total_centavos = 0
+        regra = REGRA_MENOS_6H
+    elif alimentacao_gratuita and (total_horas <= 8 or num_dias == 1):
+        # Sem pernoite e com alimentação gratuita - sem diária
+        tipo_calculado = TIPO_6_A_8H if total_horas <= 8 else TIPO_MAIS_8H
+        total_centavos = 0
+        regra = REGRA_ALIMENTACAO_GRATUITA
+    elif total_horas <= 8:
+        # 6 a 8 horas - 50% alimentação (TRUNCAR em vez de arredondar)
+        tipo_calculado = TIPO_6_A_8H
+        total_centavos = truncar_percentual(valor_alimentacao, 50)
+        regra = REGRA_50_ALIMENTACAO
+    elif num_dias == 1:
+        # Mais de 8 horas no mesmo dia - 100% alimentação
+        tipo_calculado = TIPO_MAIS_8H
+        total_centavos = valor_alimentacao
+        regra = REGRA_100_ALIMENTACAO
+    else:
+        return calcular_pernoite(
+            ((destino, datetime_saida),), datetime_retorno, total_horas, num_dias,
+            alimentacao_gratuita, hospedagem_gratuita, detalhar, tabelas,
+        )
+    
+    partes = (ParteDetalhamento(None, 1, total_horas, regra, total_centavos, None),) if detalhar else ()
+    return ResultadoDiaria(
+        total_centavos=total_centavos,
+        tipo_calculado=tipo_calculado,
+        total_horas=total_horas,
+        num_dias=num_dias,
+        alimentacao_gratuita=alimentacao_gratuita,
+        partes=partes,
+    )
+
+# Viagem com pernoite - lógica especial baseada no marco temporal
+def calcular_pernoite(trechos, datetime_retorno, total_horas, num_dias, alimentacao_gratuita, hospedagem_gratuita, detalhar, tabelas, notas=()):
+    """Períodos de 24h completos + último dia para trechos (destino, início) ordenados
+
+    Cada período de 24h recebe a categoria do trecho em vigor no seu fim (o
+    local do pernoite); o último dia, a do último trecho. Com um único trecho
+    é a regra de `calcular_diaria_por_horario`. O custo depende do número de
+    trechos e de mudanças de tabela, e não do número de dias.
+    """
+    # Cada dia de calendário antes da data de retorno corresponde a um
+    # período de 24h completo contado a partir do horário de saída
+    datetime_saida = trechos[0][1]
+    data_saida = datetime_saida.date()
+    horario_marco = datetime_saida.time()
+    periodos_completos = max((datetime_retorno.date() - data_saida).days, 0)
+    data_ultimo_dia = data_saida + timedelta(days=periodos_completos)
+    com_destino = len(trechos) > 1
+    
+    # Períodos de 24h completos - diária completa, somada por trecho e por
+    # sequência de dias com a mesma tabela vigente
+    total_centavos = 0
+    partes = []
+    primeiro = 0
+    for numero, (destino, _) in enumerate(trechos):
+        if numero + 1 < len(trechos):
+            seguinte = primeiro_periodo_apos(trechos[numero + 1][1], data_saida, horario_marco)
+            seguinte = min(max(seguinte, primeiro), periodos_completos)
+        else:
+            seguinte = periodos_completos
+        data = data_saida + timedelta(days=primeiro)
+        for tabela, quantidade in tabelas.segmentos(data, seguinte - primeiro):
+            diaria_dia = valor_periodo_completo(tabela.valores[destino], alimentacao_gratuita, hospedagem_gratuita)
+            total_centavos += quantidade * diaria_dia
+            if detalhar:
+                partes.append(ParteDetalhamento(
+                    data, quantidade, 24.0, CATEGORIA_PERIODO_COMPLETO, diaria_dia, destino if com_destino else None
+                ))
+            data += timedelta(days=quantidade)
+        primeiro = seguinte
+    
+    # Último dia - calcular horas restantes e aplicar regras do marco temporal
+    destino = trechos[-1][0]
+    valor_alimentacao = tabelas.tabela_em(data_ultimo_dia).valores[destino]["alimentacao"]
+    inicio_ultimo_dia = datetime.combine(data_ultimo_dia, horario_marco)
+    horas_ultimo_dia = (datetime_retorno - inicio_ultimo_dia).total_seconds() / 3600
+    diaria_ultimo, regra_ultimo = diaria_ultimo_dia(horas_ultimo_dia, valor_alimentacao, alimentacao_gratuita)
+    total_centavos += diaria_ultimo
+    if detalhar:
+        partes.append(ParteDetalhamento(
+            data_ultimo_dia, 1, horas_ultimo_dia, regra_ultimo, diaria_ultimo, destino if com_destino else None
+        ))
+    
+    return ResultadoDiaria(
+        total_centavos=total_centavos,
+        tipo_calculado=TIPO_PERNOITE,
+        horas_ultimo_dia=horas_ultimo_dia,
+        total_horas=total_horas,
+        num_dias=num_dias,
+        alimentacao_gratuita=alimentacao_gratuita,
+        partes=tuple(partes),
+        notas=tuple(notas),
+    )
+
+# Primeiro período de 24h que termina depois de um momento da viagem
+def primeiro_periodo_apos(momento, data_saida, horario_marco):
+    """Índice do primeiro período de 24h (contado da data de saída) que termina depois de `momento`
+
+    O período i termina no horário do marco temporal do dia `data_saida + i + 1`.
+    """
+    dias = (momento.date() - data_saida).days
+    return dias if momento.time() >= horario_marco else dias - 1
+
+# Função de conveniência para chamadores fora da página
+def calcular_diaria(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=True, tabelas=None):
+    """Calcula a diária derivando `total_horas` e `num_dias` dos horários de saída e retorno"""
+    total_horas = (datetime_retorno - datetime_saida).total_seconds() / 3600
+    num_dias = (datetime_retorno.date() - datetime_saida.date()).days + 1
+    return calcular_diaria_por_horario(destino, datetime_saida, datetime_retorno, total_horas, num_dias, alimentacao_gratuita, hospedagem_gratuita, detalhar=detalhar, tabelas=tabelas)
@@ -0,0 +1,285 @@
+"""Processamento de arquivos de viagens em lote pela linha de comando.
+
+Lê um arquivo de viagens (CSV ou Parquet) em blocos, calcula as diárias de
+cada bloco com o motor vetorizado e grava os resultados de forma incremental,
+de modo que o uso de memória não depende do tamanho do arquivo:
+
+    python -m diarias viagens.csv resultados.csv --campos total,tipo_calculado
+
+Com `--trabalhadores N` os blocos são calculados em N processos (ver
+`diarias.paralelo`).
+
+Colunas esperadas na entrada: destino, saida, retorno, alimentacao_gratuita e
+hospedagem_gratuita.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from .calculo import calcular_diaria
+from .lote import calcular_lote
+from .metricas import registro_metricas
+
+COLUNAS_ENTRADA = ["destino", "saida", "retorno", "alimentacao_gratuita", "hospedagem_gratuita"]
+
+# Campos de resultado disponíveis e a coluna gravada para cada um
+CAMPOS_RESULTADO = {
+    "total": "total_centavos",
+    "tipo_calculado": "tipo_calculado",
+    "horas_ultimo_dia": "horas_ultimo_dia",
+    "detalhamento": "detalhamento",
+}
+CAMPOS_PADRAO = ["total", "tipo_calculado", "horas_ultimo_dia"]
+
+TAMANHO_BLOCO_PADRAO = 100_000
+
+# Separador das linhas de detalhamento dentro de uma única célula
+SEPARADOR_DETALHAMENTO = " | "
+
+_VALORES_VERDADEIROS = {"1", "true", "t", "sim", "s", "x"}
+
+
+def formato_arquivo(caminho):
+    """Identifica o formato do arquivo pela extensão ('csv' ou 'parquet')"""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in (".parquet", ".pq"):
+        return "parquet"
+    if extensao in (".csv", ".txt"):
+        return "csv"
+    raise ValueError(f"Formato de arquivo não suportado: {caminho}")
+
+
+def importar_pyarrow():
+    """Importa o pyarrow sob demanda (necessário apenas para Parquet)"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Leitura e gravação de Parquet requerem o pacote 'pyarrow'") from None
+    return pyarrow
+
+
+def conversores_texto(colunas):
+    """Conversores do `read_csv` que leem `colunas` como texto, sem inferir tipo nem tratar "NA" como ausente"""
+    return {coluna: str for coluna in colunas}
+
+
+def colunas_como_texto(bloco, colunas):
+    """Converte para texto as `colunas` presentes em um bloco lido de Parquet"""
+    presentes = [coluna for coluna in colunas if coluna in bloco and not pd.api.types.is_string_dtype(bloco[coluna])]
+    return bloco.astype({coluna: str for coluna in presentes}) if presentes else bloco
+
+
+def ler_blocos(caminho, tamanho_bloco=TAMANHO_BLOCO_PADRAO, texto=()):
+    """Itera sobre o arquivo de viagens em DataFrames de até `tamanho_bloco` linhas
+
+    As colunas em `texto` (identificadores) são lidas como texto, preservando
+    zeros à esquerda e valores como "NA".
+    """
+    if formato_arquivo(caminho) == "parquet":
+        pa = importar_pyarrow()
+        arquivo = pa.parquet.ParquetFile(caminho)
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco):
+            yield colunas_como_texto(lote.to_pandas(), texto)
+    else:
+        yield from pd.read_csv(caminho, chunksize=tamanho_bloco, converters=conversores_texto(texto))
+
+
+class _EscritorCSV:
+    """Grava blocos de resultado em CSV, com cabeçalho apenas no primeiro"""
+
+    def __init__(self, caminho):
+        self.arquivo = open(caminho, "w", newline="", encoding="utf-8")
+        self.cabecalho = True
+
+    def gravar(self, bloco):
+        bloco.to_csv(self.arquivo, header=self.cabecalho, index=False)
+        self.cabecalho = False
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+class _EscritorParquet:
+    """Grava blocos de resultado como grupos de linhas de um arquivo Parquet"""
+
+    def __init__(self, caminho):
+        self.pa = importar_pyarrow()
+        self.caminho = caminho
+        self.escritor = None
+
+    def gravar(self, bloco):
+        tabela = self.pa.Table.from_pandas(bloco, preserve_index=False)
+        if self.escritor is None:
+            self.escritor = self.pa.parquet.ParquetWriter(self.caminho, tabela.schema)
+        self.escritor.write_table(tabela)
+
+    def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+
+
+def abrir_escritor(caminho):
+    """Abre o escritor de resultados adequado à extensão de `caminho`"""
+    if formato_arquivo(caminho) == "parquet":
+        return _EscritorParquet(caminho)
+    return _EscritorCSV(caminho)
+
+
+def _coluna_booleana(serie):
+    """Normaliza colunas de gratuidade (bool, 0/1, 'sim'/'não', 'true'/'false')"""
+    if serie.dtype == bool:
+        return serie
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.fillna(0).astype(bool)
+    return serie.astype(str).str.strip().str.lower().isin(_VALORES_VERDADEIROS)
+
+
+def _detalhamento(bloco, saida, retorno, alimentacao, hospedagem):
+    """Monta o detalhamento textual de cada viagem com o motor escalar"""
+    linhas = []
+    for destino, inicio, fim, alim, hosp in zip(
+        bloco["destino"], saida.dt.to_pydatetime(), retorno.dt.to_pydatetime(), alimentacao, hospedagem
+    ):
+        resultado = calcular_diaria(destino, inicio, fim, alim, hosp)
+        linhas.append(SEPARADOR_DETALHAMENTO.join(resultado.detalhamento))
+    return linhas
+
+
+def processar_bloco(bloco, campos=CAMPOS_PADRAO, manter=()):
+    """Calcula as diárias de um bloco de viagens e devolve as colunas pedidas"""
+    saida = pd.to_datetime(bloco["saida"])
+    retorno = pd.to_datetime(bloco["retorno"])
+    alimentacao = _coluna_booleana(bloco["alimentacao_gratuita"])
+    hospedagem = _coluna_booleana(bloco["hospedagem_gratuita"])
+
+    calculado = calcular_lote(bloco["destino"], saida, retorno, alimentacao, hospedagem)
+
+    resultado = pd.DataFrame(index=bloco.index)
+    for coluna in manter:
+        resultado[coluna] = bloco[coluna]
+    for campo in campos:
+        coluna = CAMPOS_RESULTADO[campo]
+        if campo == "detalhamento":
+            resultado[coluna] = _detalhamento(bloco, saida, retorno, alimentacao, hospedagem)
+        else:
+            resultado[coluna] = calculado[coluna]
+    return resultado
+
+
+def relatar_progresso(linhas, inicio, arquivo=sys.stderr):
+    """Exibe o total de linhas processadas e a vazão desde `inicio`"""
+    decorrido = time.perf_counter() - inicio
+    taxa = linhas / decorrido if decorrido > 0 else 0.0
+    print(f"{linhas:,} linhas processadas ({taxa:,.0f} linhas/s)".replace(",", "."), file=arquivo)
+
+
+def registrar_vazao(linhas_bloco, linhas, inicio):
+    """Atualiza as métricas de linhas processadas e de linhas/s do lote"""
+    if registro_metricas.ativo:
+        decorrido = time.perf_counter() - inicio
+        registro_metricas.contar("diarias_lote_linhas_total", linhas_bloco)
+        registro_metricas.definir("diarias_lote_linhas_por_segundo", linhas / decorrido if decorrido > 0 else 0.0)
+
+
+def executar_lote(entrada, saida, campos=CAMPOS_PADRAO, manter=(), tamanho_bloco=TAMANHO_BLOCO_PADRAO, progresso=True):
+    """Processa `entrada` bloco a bloco gravando em `saida`; devolve o total de linhas"""
+    escritor = abrir_escritor(saida)
+    linhas = 0
+    inicio = time.perf_counter()
+    blocos = ler_blocos(entrada, tamanho_bloco, texto=manter)
+    try:
+        while True:
+            with registro_metricas.medir("lote_leitura"):
+                bloco = next(blocos, None)
+            if bloco is None:
+                break
+            with registro_metricas.medir("lote_calculo"):
+                resultado = processar_bloco(bloco, campos, manter)
+            with registro_metricas.medir("lote_gravacao"):
+                escritor.gravar(resultado)
+            linhas += len(bloco)
+            registrar_vazao(len(bloco), linhas, inicio)
+            if progresso:
+                relatar_progresso(linhas, inicio)
+    finally:
+        escritor.fechar()
+    return linhas
+
+
+def _lista(valor):
+    return [item.strip() for item in valor.split(",") if item.strip()]
+
+
+def _argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m diarias",
+        description="Calcula diárias de viagem para um arquivo CSV ou Parquet, em blocos.",
+    )
+    parser.add_argument("entrada", help="arquivo de viagens (.csv ou .parquet)")
+    parser.add_argument("saida", help="arquivo de resultados (.csv ou .parquet)")
+    parser.add_argument(
+        "--campos",
+        type=_lista,
+        default=CAMPOS_PADRAO,
+        help=f"campos de resultado separados por vírgula ({', '.join(CAMPOS_RESULTADO)}); "
+        f"padrão: {','.join(CAMPOS_PADRAO)}",
+    )
+    parser.add_argument(
+        "--manter",
+        type=_lista,
+        default=[],
+        help="colunas da entrada copiadas para a saída, lidas como texto (ex.: id_viagem,matricula)",
+    )
+    parser.add_argument(
+        "--tamanho-bloco",
+        type=int,
+        default=TAMANHO_BLOCO_PADRAO,
+        help=f"linhas lidas por bloco (padrão: {TAMANHO_BLOCO_PADRAO})",
+    )
+    parser.add_argument(
+        "--trabalhadores",
+        type=int,
+        default=1,
+        help="processos de cálculo; 0 usa todas as CPUs (padrão: 1, sem pool)",
+    )
+    parser.add_argument("--silencioso", action="store_true", help="não exibir o progresso")
+    parser.add_argument("--metricas", metavar="ARQUIVO", help="gravar métricas (formato Prometheus) ao final")
+    args = parser.parse_args(argv)
+
+    invalidos = [campo for campo in args.campos if campo not in CAMPOS_RESULTADO]
+    if invalidos:
+        parser.error(f"campo(s) desconhecido(s): {', '.join(invalidos)}")
+    if args.tamanho_bloco <= 0:
+        parser.error("--tamanho-bloco deve ser positivo")
+    if args.trabalhadores < 0:
+        parser.error("--trabalhadores não pode ser negativo")
+    return args
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    if args.metricas:
+        registro_metricas.ativar()
+    opcoes = dict(
+        campos=args.campos,
+        manter=args.manter,
+        tamanho_bloco=args.tamanho_bloco,
+        progresso=not args.silencioso,
+    )
+    if args.trabalhadores == 1:
+        executar_lote(args.entrada, args.saida, **opcoes)
+    else:
+        from .paralelo import executar_paralelo
+
+        executar_paralelo(args.entrada, args.saida, trabalhadores=args.trabalhadores or None, **opcoes)
+    if args.metricas:
+        registro_metricas.gravar(args.metricas)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
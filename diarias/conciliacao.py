@@ -0,0 +1,403 @@
+"""Conciliação das diárias pagas com os valores recalculados pelo motor.
+
+    python -m diarias.conciliacao pagamentos.csv viagens.csv divergencias.csv
+
+Entradas (CSV ou Parquet):
+
+- pagamentos: `id_viagem` e `valor_pago` (em reais, com ponto decimal);
+  pagamentos repetidos da mesma viagem são somados;
+- viagens: `id_viagem` e as colunas de `diarias.cli` (destino, saida,
+  retorno, alimentacao_gratuita e hospedagem_gratuita).
+
+`id_viagem` é sempre lido como texto: zeros à esquerda são preservados e
+arquivos em formatos diferentes (CSV e Parquet) são unidos pelo mesmo valor.
+
+As duas entradas são unidas por junção por hash particionada em disco, de
+modo que a memória usada depende do tamanho do bloco e de uma partição, e
+não do tamanho dos arquivos:
+
+1. particionamento: os arquivos são lidos em blocos; cada bloco de viagens é
+   calculado com `calcular_lote` e as linhas de ambos são distribuídas, pelo
+   hash de `id_viagem`, em N partições gravadas em um diretório temporário;
+2. junção: cada partição (cerca de 1/N dos dados) é carregada, os pagamentos
+   são somados por viagem e unidos às viagens; as divergências recebem o
+   `tipo_calculado` e o detalhamento do motor e são gravadas no relatório.
+
+Situações relatadas: `divergente` (valor pago diferente do esperado),
+`sem_pagamento` (viagem com valor esperado e nenhum pagamento) e
+`sem_viagem` (pagamento de viagem ausente do arquivo de viagens),
+`viagem_duplicada` (id_viagem repetido no arquivo de viagens) e
+`viagem_invalida` (destino desconhecido ou data de saída/retorno ausente ou
+inválida). Viagens duplicadas e inválidas não são conciliadas: o relatório
+traz apenas o total pago e, no detalhamento das inválidas, o motivo. Um
+`valor_pago` ausente fica como <NA> e não conta como pagamento.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .calculo import TIPOS_CALCULO, VALORES_DIARIAS, calcular_diaria
+from .cli import (
+    SEPARADOR_DETALHAMENTO,
+    TAMANHO_BLOCO_PADRAO,
+    _coluna_booleana,
+    abrir_escritor,
+    conversores_texto,
+    ler_blocos,
+    relatar_progresso,
+)
+from .lote import calcular_lote
+from .metricas import registro_metricas
+
+PARTICOES_PADRAO = 64
+
+SITUACAO_DIVERGENTE = "divergente"
+SITUACAO_SEM_PAGAMENTO = "sem_pagamento"
+SITUACAO_SEM_VIAGEM = "sem_viagem"
+SITUACAO_VIAGEM_DUPLICADA = "viagem_duplicada"
+SITUACAO_VIAGEM_INVALIDA = "viagem_invalida"
+
+# Colunas do relatório e seus tipos, fixos para que todas as partições gravem o mesmo esquema
+TIPOS_RELATORIO = {
+    "id_viagem": "string",
+    "situacao": "string",
+    "valor_pago_centavos": "Int64",
+    "valor_esperado_centavos": "Int64",
+    "diferenca_centavos": "Int64",
+    "tipo_calculado": "string",
+    "detalhamento": "string",
+}
+COLUNAS_RELATORIO = list(TIPOS_RELATORIO)
+
+ResumoConciliacao = namedtuple(
+    "ResumoConciliacao",
+    [
+        "viagens",
+        "pagamentos",
+        "conferem",
+        "divergentes",
+        "sem_pagamento",
+        "sem_viagem",
+        "viagens_duplicadas",
+        "viagens_invalidas",
+        "diferenca_centavos",
+    ],
+)
+
+
+def _particao(ids, quantidade):
+    """Partição de cada `id_viagem` (hash estável entre blocos e arquivos)"""
+    return pd.util.hash_pandas_object(ids, index=False).to_numpy() % quantidade
+
+
+class _Particoes:
+    """Arquivos CSV de partição de um lado da junção, abertos sob demanda"""
+
+    def __init__(self, diretorio, prefixo, quantidade):
+        self.caminhos = [os.path.join(diretorio, f"{prefixo}_{numero:04d}.csv") for numero in range(quantidade)]
+        self.arquivos = {}
+
+    def gravar(self, bloco):
+        for numero, parte in bloco.groupby(_particao(bloco["id_viagem"], len(self.caminhos)), sort=False):
+            arquivo = self.arquivos.get(numero)
+            cabecalho = arquivo is None
+            if cabecalho:
+                arquivo = self.arquivos[numero] = open(self.caminhos[numero], "w", newline="", encoding="utf-8")
+            parte.to_csv(arquivo, header=cabecalho, index=False)
+
+    def fechar(self):
+        for arquivo in self.arquivos.values():
+            arquivo.close()
+
+    def ler(self, numero, colunas, texto):
+        """Carrega uma partição; as colunas em `texto` são lidas como texto, sem tratar "NA" como ausente"""
+        if numero not in self.arquivos:
+            return pd.DataFrame(
+                {
+                    **{coluna: pd.Series(dtype=str) for coluna in texto},
+                    **{coluna: pd.Series(dtype=tipo) for coluna, tipo in colunas.items()},
+                }
+            )
+        return pd.read_csv(self.caminhos[numero], dtype=colunas, converters=conversores_texto(texto))
+
+
+# Tipos das colunas das partições, além das de texto
+_COLUNAS_VIAGENS = {
+    "destino": str,
+    "saida": np.int64,
+    "retorno": np.int64,
+    "alimentacao_gratuita": bool,
+    "hospedagem_gratuita": bool,
+    "valor_esperado_centavos": "Int64",
+    "tipo": "Int8",
+}
+_TEXTO_VIAGENS = ["id_viagem", "motivo_invalida"]
+_COLUNAS_PAGAMENTOS = {"valor_pago_centavos": "Int64"}
+_TEXTO_PAGAMENTOS = ["id_viagem"]
+
+
+def _motivos_invalida(destino, saida, retorno):
+    """Motivo pelo qual cada viagem não pode ser calculada ("" quando é válida)"""
+    motivos = np.full(len(destino), "", dtype=object)
+    motivos[retorno.isna().to_numpy()] = "data de retorno ausente ou inválida"
+    motivos[saida.isna().to_numpy()] = "data de saída ausente ou inválida"
+    desconhecido = ~destino.isin(list(VALORES_DIARIAS)).to_numpy()
+    motivos[desconhecido] = "destino desconhecido: " + destino[desconhecido].astype(str).to_numpy()
+    return motivos
+
+
+def _preparar_viagens(bloco):
+    """Calcula o valor esperado do bloco e mantém apenas o necessário para a junção
+
+    Linhas que não podem ser calculadas ficam sem valor esperado e com o
+    motivo em `motivo_invalida`, sem interromper a conciliação.
+    """
+    saida = pd.to_datetime(bloco["saida"], errors="coerce")
+    retorno = pd.to_datetime(bloco["retorno"], errors="coerce")
+    alimentacao = _coluna_booleana(bloco["alimentacao_gratuita"])
+    hospedagem = _coluna_booleana(bloco["hospedagem_gratuita"])
+    motivos = _motivos_invalida(bloco["destino"], saida, retorno)
+    validas = motivos == ""
+
+    esperado = pd.array(np.zeros(len(bloco), dtype=np.int64), dtype="Int64")
+    tipo = pd.array(np.zeros(len(bloco), dtype=np.int8), dtype="Int8")
+    esperado[~validas] = pd.NA
+    tipo[~validas] = pd.NA
+    if validas.any():
+        calculado = calcular_lote(
+            bloco["destino"][validas], saida[validas], retorno[validas], alimentacao[validas], hospedagem[validas]
+        )
+        esperado[validas] = calculado["total_centavos"].to_numpy()
+        tipo[validas] = calculado["tipo_calculado"].cat.codes.to_numpy()
+    return pd.DataFrame(
+        {
+            "id_viagem": bloco["id_viagem"],
+            "destino": bloco["destino"],
+            "saida": saida.to_numpy().astype("datetime64[ns]").astype(np.int64),
+            "retorno": retorno.to_numpy().astype("datetime64[ns]").astype(np.int64),
+            "alimentacao_gratuita": alimentacao,
+            "hospedagem_gratuita": hospedagem,
+            "valor_esperado_centavos": esperado,
+            "tipo": tipo,
+            "motivo_invalida": motivos,
+        }
+    )
+
+
+def _preparar_pagamentos(bloco):
+    """Converte o valor pago (reais) em centavos; valores ausentes ficam como <NA>"""
+    reais = pd.to_numeric(bloco["valor_pago"]).to_numpy(dtype=np.float64)
+    return pd.DataFrame(
+        {"id_viagem": bloco["id_viagem"], "valor_pago_centavos": pd.array(np.round(reais * 100), dtype="Int64")}
+    )
+
+
+def _detalhamento(divergencias):
+    """Detalhamento textual das viagens divergentes, pelo motor escalar"""
+    linhas = []
+    for destino, saida, retorno, alimentacao, hospedagem in zip(
+        divergencias["destino"],
+        pd.to_datetime(divergencias["saida"]).dt.to_pydatetime(),
+        pd.to_datetime(divergencias["retorno"]).dt.to_pydatetime(),
+        divergencias["alimentacao_gratuita"],
+        divergencias["hospedagem_gratuita"],
+    ):
+        if isinstance(destino, str):
+            resultado = calcular_diaria(destino, saida, retorno, bool(alimentacao), bool(hospedagem))
+            linhas.append(SEPARADOR_DETALHAMENTO.join(resultado.detalhamento))
+        else:
+            linhas.append("")
+    return linhas
+
+
+def _relatorio_excluidas(ids, pagos, situacao, detalhamento=""):
+    """Linhas de viagens não conciliadas (`situacao`), com o total pago de cada id"""
+    valor_pago = pagos.set_index("id_viagem")["valor_pago_centavos"].reindex(ids)
+    return pd.DataFrame(
+        {
+            "id_viagem": ids,
+            "situacao": situacao,
+            "valor_pago_centavos": valor_pago.to_numpy(),
+            "valor_esperado_centavos": None,
+            "diferenca_centavos": None,
+            "tipo_calculado": None,
+            "detalhamento": detalhamento,
+        },
+        columns=COLUNAS_RELATORIO,
+    ).astype(TIPOS_RELATORIO)
+
+
+def _juntar_particao(viagens, pagamentos):
+    """Une viagens e pagamentos de uma partição; devolve (relatório, contagens)
+
+    Todas as linhas de um mesmo id_viagem caem na mesma partição, de modo que
+    os ids repetidos no arquivo de viagens são detectados aqui e relatados à
+    parte, em vez de unidos mais de uma vez aos pagamentos. As viagens
+    inválidas também são relatadas à parte.
+    """
+    pagos = pagamentos.groupby("id_viagem", sort=False, as_index=False)["valor_pago_centavos"].sum(min_count=1)
+    excluidas = []
+    repetida = viagens["id_viagem"].duplicated(keep=False)
+    duplicadas = pd.unique(viagens.loc[repetida, "id_viagem"].to_numpy())
+    if len(duplicadas):
+        viagens = viagens[~repetida]
+        excluidas.append(_relatorio_excluidas(duplicadas, pagos, SITUACAO_VIAGEM_DUPLICADA))
+    invalida = viagens["motivo_invalida"] != ""
+    if invalida.any():
+        excluidas.append(
+            _relatorio_excluidas(
+                viagens.loc[invalida, "id_viagem"].to_numpy(), pagos, SITUACAO_VIAGEM_INVALIDA,
+                viagens.loc[invalida, "motivo_invalida"].to_numpy(),
+            )
+        )
+        viagens = viagens[~invalida]
+    if excluidas:
+        ids_excluidos = np.concatenate([relatorio["id_viagem"].to_numpy() for relatorio in excluidas])
+        pagos = pagos[~pagos["id_viagem"].isin(ids_excluidos)]
+    unidos = viagens.merge(pagos, on="id_viagem", how="outer", indicator=True)
+    tem_viagem = unidos["_merge"] != "right_only"
+    tem_pagamento = (unidos["_merge"] != "left_only") & unidos["valor_pago_centavos"].notna()
+    pago = unidos["valor_pago_centavos"].fillna(0).astype(np.int64)
+    esperado = unidos["valor_esperado_centavos"].fillna(0).astype(np.int64)
+    diferenca = pago - esperado
+
+    situacao = np.select(
+        [~tem_viagem, ~tem_pagamento & (esperado != 0), tem_pagamento & (diferenca != 0)],
+        [SITUACAO_SEM_VIAGEM, SITUACAO_SEM_PAGAMENTO, SITUACAO_DIVERGENTE],
+        "",
+    )
+    divergente = situacao != ""
+    contagens = {
+        "conferem": int((~divergente).sum()),
+        "divergentes": int((situacao == SITUACAO_DIVERGENTE).sum()),
+        "sem_pagamento": int((situacao == SITUACAO_SEM_PAGAMENTO).sum()),
+        "sem_viagem": int((situacao == SITUACAO_SEM_VIAGEM).sum()),
+        "viagens_duplicadas": len(duplicadas),
+        "viagens_invalidas": int(invalida.sum()),
+        "diferenca_centavos": int(diferenca.sum()),
+    }
+
+    selecao = unidos[divergente]
+    tipos = selecao["tipo"].astype("Int64")
+    relatorio = pd.DataFrame(
+        {
+            "id_viagem": selecao["id_viagem"],
+            "situacao": situacao[divergente],
+            "valor_pago_centavos": selecao["valor_pago_centavos"],
+            "valor_esperado_centavos": selecao["valor_esperado_centavos"],
+            "diferenca_centavos": diferenca[divergente],
+            "tipo_calculado": [TIPOS_CALCULO[tipo] if tipo is not pd.NA else None for tipo in tipos],
+            "detalhamento": _detalhamento(selecao),
+        },
+        columns=COLUNAS_RELATORIO,
+    ).astype(TIPOS_RELATORIO)
+    if excluidas:
+        relatorio = pd.concat([relatorio, *excluidas], ignore_index=True)
+    return relatorio, contagens
+
+
+def conciliar(pagamentos, viagens, saida, particoes=PARTICOES_PADRAO, tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+              diretorio_temporario=None, progresso=True):
+    """Concilia o arquivo de pagamentos com o de viagens e grava as divergências em `saida`
+
+    Devolve um `ResumoConciliacao`. As partições são gravadas em um
+    diretório temporário (dentro de `diretorio_temporario`, se informado) e
+    removidas ao final.
+    """
+    if particoes <= 0:
+        raise ValueError("particoes deve ser positivo")
+    totais = dict.fromkeys(ResumoConciliacao._fields, 0)
+    inicio = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="diarias_conciliacao_", dir=diretorio_temporario) as diretorio:
+        lado_viagens = _Particoes(diretorio, "viagens", particoes)
+        lado_pagamentos = _Particoes(diretorio, "pagamentos", particoes)
+        try:
+            with registro_metricas.medir("conciliacao_particionamento"):
+                for bloco in ler_blocos(viagens, tamanho_bloco, texto=["id_viagem"]):
+                    lado_viagens.gravar(_preparar_viagens(bloco))
+                    totais["viagens"] += len(bloco)
+                    if progresso:
+                        relatar_progresso(totais["viagens"], inicio)
+                for bloco in ler_blocos(pagamentos, tamanho_bloco, texto=["id_viagem"]):
+                    lado_pagamentos.gravar(_preparar_pagamentos(bloco))
+                    totais["pagamentos"] += len(bloco)
+        finally:
+            lado_viagens.fechar()
+            lado_pagamentos.fechar()
+
+        escritor = abrir_escritor(saida)
+        try:
+            with registro_metricas.medir("conciliacao_juncao"):
+                for numero in range(particoes):
+                    relatorio, contagens = _juntar_particao(
+                        lado_viagens.ler(numero, _COLUNAS_VIAGENS, _TEXTO_VIAGENS),
+                        lado_pagamentos.ler(numero, _COLUNAS_PAGAMENTOS, _TEXTO_PAGAMENTOS),
+                    )
+                    if len(relatorio) or numero == particoes - 1:
+                        escritor.gravar(relatorio)
+                    for chave, valor in contagens.items():
+                        totais[chave] += valor
+        finally:
+            escritor.fechar()
+    return ResumoConciliacao(**totais)
+
+
+def _argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m diarias.conciliacao",
+        description="Concilia as diárias pagas com os valores recalculados e relata as divergências.",
+    )
+    parser.add_argument("pagamentos", help="arquivo de pagamentos com id_viagem e valor_pago (.csv ou .parquet)")
+    parser.add_argument("viagens", help="arquivo de viagens com id_viagem (.csv ou .parquet)")
+    parser.add_argument("saida", help="relatório de divergências (.csv ou .parquet)")
+    parser.add_argument(
+        "--particoes",
+        type=int,
+        default=PARTICOES_PADRAO,
+        help=f"partições da junção em disco; aumente para reduzir a memória (padrão: {PARTICOES_PADRAO})",
+    )
+    parser.add_argument(
+        "--tamanho-bloco",
+        type=int,
+        default=TAMANHO_BLOCO_PADRAO,
+        help=f"linhas lidas por bloco (padrão: {TAMANHO_BLOCO_PADRAO})",
+    )
+    parser.add_argument("--temporario", metavar="DIRETORIO", help="onde criar as partições (padrão: diretório temporário do sistema)")
+    parser.add_argument("--silencioso", action="store_true", help="não exibir o progresso")
+    args = parser.parse_args(argv)
+    if args.particoes <= 0:
+        parser.error("--particoes deve ser positivo")
+    if args.tamanho_bloco <= 0:
+        parser.error("--tamanho-bloco deve ser positivo")
+    return args
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    resumo = conciliar(
+        args.pagamentos,
+        args.viagens,
+        args.saida,
+        particoes=args.particoes,
+        tamanho_bloco=args.tamanho_bloco,
+        diretorio_temporario=args.temporario,
+        progresso=not args.silencioso,
+    )
+    print(
+        f"{resumo.viagens} viagens, {resumo.pagamentos} pagamentos: {resumo.conferem} conferem, "
+        f"{resumo.divergentes} divergentes, {resumo.sem_pagamento} sem pagamento, "
+        f"{resumo.sem_viagem} sem viagem, {resumo.viagens_duplicadas} viagens duplicadas, "
+        f"{resumo.viagens_invalidas} viagens inválidas (diferença total: {resumo.diferenca_centavos / 100:.2f})",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
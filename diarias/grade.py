@@ -0,0 +1,140 @@
+"""Tabela pré-calculada de resultados para horários na grade de 15 minutos.
+
+A página só permite minutos 0/15/30/45. Para um destino e um par de
+gratuidades, o resultado de `calcular_diaria_por_horario` depende apenas da
+diferença em dias entre saída e retorno e dos quartos de hora de cada
+horário. Com pernoite o total cresce uma diária completa por dia adicional,
+então bastam três quadros de 96 x 96 posições (retorno no mesmo dia, no dia
+seguinte e dois dias depois); viagens mais longas somam as diárias
+completas restantes ao terceiro quadro.
+
+Os quadros são preenchidos com o próprio motor de cálculo, uma única vez por
+tabela de valores, destino e gratuidades, e ocupam cerca de 140 KB cada.
+Horários fora da grade e viagens que atravessam uma mudança de tabela são
+calculados pelo motor exato.
+"""
+from array import array
+from collections import namedtuple
+from datetime import datetime, timedelta
+from threading import Lock
+
+from .calculo import (
+    TIPO_PERNOITE,
+    TIPOS_CALCULO,
+    VALORES_DIARIAS,
+    calcular_diaria,
+    calcular_diaria_por_horario,
+    valor_periodo_completo,
+)
+from .tabelas import IndiceTabelas, TabelaValores, indice_tabelas
+
+QUARTOS_POR_DIA = 96
+# Quadros pré-calculados: retorno 0, 1 e 2 dias após a saída
+DIAS_PRE_CALCULADOS = 3
+
+ConsultaGrade = namedtuple("ConsultaGrade", ["total_centavos", "tipo_calculado", "horas_ultimo_dia"])
+
+# Data arbitrária usada apenas para montar os horários do pré-cálculo
+_DATA_BASE = datetime(2000, 1, 3)
+
+
+def _quarto_de_hora(momento):
+    """Posição de `momento` na grade do dia, ou None se estiver fora dela"""
+    if momento.second or momento.microsecond or momento.minute % 15:
+        return None
+    return momento.hour * 4 + momento.minute // 15
+
+
+class _Quadros:
+    """Totais (centavos) e tipos pré-calculados para uma tabela, um destino e gratuidades"""
+
+    __slots__ = ("totais", "tipos", "diaria_dia")
+
+    def __init__(self, tabela, destino, alimentacao_gratuita, hospedagem_gratuita):
+        self.totais = array("i")
+        self.tipos = array("b")
+        self.diaria_dia = valor_periodo_completo(tabela.valores[destino], alimentacao_gratuita, hospedagem_gratuita)
+        # A mesma tabela vale para qualquer data do pré-cálculo
+        tabelas = IndiceTabelas([TabelaValores(tabela.norma, None, None, tabela.valores)])
+        codigo_tipo = {tipo: codigo for codigo, tipo in enumerate(TIPOS_CALCULO)}
+        for dias in range(DIAS_PRE_CALCULADOS):
+            data_retorno = _DATA_BASE + timedelta(days=dias)
+            for quarto_saida in range(QUARTOS_POR_DIA):
+                saida = _DATA_BASE + timedelta(minutes=15 * quarto_saida)
+                for quarto_retorno in range(QUARTOS_POR_DIA):
+                    retorno = data_retorno + timedelta(minutes=15 * quarto_retorno)
+                    total_horas = (retorno - saida).total_seconds() / 3600
+                    resultado = calcular_diaria_por_horario(
+                        destino, saida, retorno, total_horas, dias + 1,
+                        alimentacao_gratuita, hospedagem_gratuita, detalhar=False, tabelas=tabelas,
+                    )
+                    self.totais.append(resultado.total_centavos)
+                    self.tipos.append(codigo_tipo[resultado.tipo_calculado])
+
+
+class GradeDiarias:
+    """Consulta de diárias por aritmética de índices na grade de 15 minutos
+
+    Os quadros de cada tabela de valores, destino e combinação de gratuidades
+    são montados na primeira consulta e mantidos em memória. É seguro
+    compartilhar uma instância entre threads.
+    """
+
+    def __init__(self):
+        self._quadros = {}
+        self._trava = Lock()
+
+    def _obter_quadros(self, tabela, destino, alimentacao_gratuita, hospedagem_gratuita):
+        chave = (tabela, destino, bool(alimentacao_gratuita), bool(hospedagem_gratuita))
+        quadros = self._quadros.get(chave)
+        if quadros is None:
+            with self._trava:
+                quadros = self._quadros.get(chave)
+                if quadros is None:
+                    quadros = _Quadros(*chave)
+                    self._quadros[chave] = quadros
+        return quadros
+
+    def pre_calcular(self):
+        """Monta antecipadamente os quadros da tabela vigente para todos os destinos e gratuidades"""
+        tabela = indice_tabelas().vigente
+        for destino in VALORES_DIARIAS:
+            for alimentacao_gratuita in (False, True):
+                for hospedagem_gratuita in (False, True):
+                    self._obter_quadros(tabela, destino, alimentacao_gratuita, hospedagem_gratuita)
+
+    def consultar(self, destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita):
+        """Devolve `ConsultaGrade` para a viagem, usando o motor exato fora da grade"""
+        quarto_saida = _quarto_de_hora(datetime_saida)
+        quarto_retorno = _quarto_de_hora(datetime_retorno)
+        dias = (datetime_retorno.date() - datetime_saida.date()).days
+        if quarto_saida is None or quarto_retorno is None or dias < 0:
+            return _consultar_motor(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita)
+        tabelas = indice_tabelas()
+        tabela = tabelas.tabela_em(datetime_saida.date())
+        if tabelas.tabela_em(datetime_retorno.date()) is not tabela:
+            return _consultar_motor(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita)
+
+        quadros = self._obter_quadros(tabela, destino, alimentacao_gratuita, hospedagem_gratuita)
+        dias_quadro = min(dias, DIAS_PRE_CALCULADOS - 1)
+        indice = (dias_quadro * QUARTOS_POR_DIA + quarto_saida) * QUARTOS_POR_DIA + quarto_retorno
+        total_centavos = quadros.totais[indice] + (dias - dias_quadro) * quadros.diaria_dia
+        tipo_calculado = TIPOS_CALCULO[quadros.tipos[indice]]
+        horas_ultimo_dia = (quarto_retorno - quarto_saida) / 4 if tipo_calculado == TIPO_PERNOITE else None
+        return ConsultaGrade(total_centavos, tipo_calculado, horas_ultimo_dia)
+
+
+def _consultar_motor(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita):
+    resultado = calcular_diaria(
+        destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=False
+    )
+    return ConsultaGrade(resultado.total_centavos, resultado.tipo_calculado, resultado.horas_ultimo_dia)
+
+
+# Instância compartilhada pelo processo
+grade_diarias = GradeDiarias()
+
+
+def consultar_grade(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita):
+    """Consulta a instância compartilhada de `GradeDiarias`"""
+    return grade_diarias.consultar(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita)
@@ -0,0 +1,56 @@
+"""Cálculo de diárias para itinerários com vários destinos.
+
+Um itinerário é uma lista ordenada de trechos (`Trecho`): cada trecho indica
+o destino e o momento de chegada a ele; o primeiro trecho começa na saída da
+sede. Cada período de 24h contado a partir do marco temporal recebe a
+categoria do trecho em vigor no seu fim, isto é, do local do pernoite. O
+último dia e as viagens sem pernoite usam a categoria do último trecho.
+
+Como os fins de período crescem com os trechos, uma única varredura pelos
+trechos ordenados determina, por aritmética de datas, o intervalo de
+períodos de cada um: o custo cresce com o número de trechos, e não com o
+número de dias. Um itinerário de um único trecho tem exatamente o resultado
+de `calcular_diaria_por_horario`.
+"""
+from collections import namedtuple
+
+from .calculo import calcular_diaria_por_horario, calcular_pernoite
+from .tabelas import indice_tabelas
+
+Trecho = namedtuple("Trecho", ["destino", "inicio"])
+
+
+def validar_trechos(trechos, datetime_retorno):
+    """Levanta ValueError se os trechos não estiverem em ordem ou não começarem antes do retorno"""
+    if not trechos:
+        raise ValueError("O itinerário deve ter ao menos um trecho")
+    for anterior, seguinte in zip(trechos, trechos[1:]):
+        if seguinte.inicio <= anterior.inicio:
+            raise ValueError("Os trechos devem estar em ordem estritamente crescente de início")
+    if len(trechos) > 1 and trechos[-1].inicio >= datetime_retorno:
+        raise ValueError("Todos os trechos devem começar antes do retorno")
+
+
+def calcular_itinerario(trechos, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=True, tabelas=None):
+    """Calcula a diária de um itinerário (lista de `Trecho`) e devolve um `ResultadoDiaria`"""
+    validar_trechos(trechos, datetime_retorno)
+    datetime_saida = trechos[0].inicio
+    ultimo = trechos[-1]
+    total_horas = (datetime_retorno - datetime_saida).total_seconds() / 3600
+    num_dias = (datetime_retorno.date() - datetime_saida.date()).days + 1
+    percurso = " → ".join(trecho.destino for trecho in trechos)
+
+    # Um único trecho, ou sem pernoite: vale o motor com o último destino
+    if len(trechos) == 1 or total_horas <= 8 or num_dias == 1:
+        resultado = calcular_diaria_por_horario(
+            ultimo.destino, datetime_saida, datetime_retorno, total_horas, num_dias,
+            alimentacao_gratuita, hospedagem_gratuita, detalhar=detalhar, tabelas=tabelas,
+        )
+        if len(trechos) > 1:
+            resultado.notas = (f"Itinerário {percurso} sem pernoite - categoria do último trecho ({ultimo.destino})",)
+        return resultado
+    return calcular_pernoite(
+        trechos, datetime_retorno, total_horas, num_dias, alimentacao_gratuita, hospedagem_gratuita,
+        detalhar, tabelas or indice_tabelas(),
+        notas=(f"Itinerário {percurso} - cada período de 24h na categoria do local do pernoite",),
+    )
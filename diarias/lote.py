@@ -0,0 +1,350 @@
+"""Cálculo de diárias em lote, vetorizado com NumPy/pandas.
+
+Aplica as mesmas regras de `calcular_diaria_por_horario` (6h/8h/pernoite com
+marco temporal) a colunas inteiras de viagens, sem uma chamada Python por
+linha. Os valores são calculados em centavos (int64) e são idênticos aos do
+motor escalar, inclusive na escolha da tabela de valores vigente em cada dia.
+
+`calcular_lote` e `calcular_itinerarios_lote` montam as colunas a partir de
+DataFrames; os núcleos vetorizados (`codigos_destino`, `somar_periodos` e
+`calcular_colunas`) também servem a `diarias.registros`.
+"""
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .calculo import TIPOS_CALCULO, VALORES_DIARIAS, format_currency, formatar_duracao
+from .tabelas import CAMPOS_VALORES, indice_tabelas
+
+# Códigos de `tipo_calculado` (índices em TIPOS_CALCULO)
+COD_ATE_6H, COD_6_A_8H, COD_MAIS_8H, COD_PERNOITE = range(len(TIPOS_CALCULO))
+
+_UMA_HORA = np.timedelta64(1, "h")
+_UM_DIA = np.timedelta64(1, "D")
+# Ordinal (date.toordinal) da origem de datetime64[D], 01/01/1970
+_ORDINAL_EPOCA = date(1970, 1, 1).toordinal()
+_DESTINOS = pd.Index(list(VALORES_DIARIAS))
+
+
+def codigos_destino(destino):
+    """Converte a coluna de destinos em códigos inteiros (posição em VALORES_DIARIAS)"""
+    codigos = _DESTINOS.get_indexer(np.asarray(destino))
+    if (codigos < 0).any():
+        desconhecidos = pd.unique(np.asarray(destino)[codigos < 0])
+        raise KeyError(f"Destino(s) desconhecido(s): {', '.join(map(str, desconhecidos))}")
+    return codigos
+
+
+@lru_cache(maxsize=None)
+def _tabela_valores(campo):
+    """Matriz [tabela, destino] com o valor `campo`, na ordem do índice de tabelas e de VALORES_DIARIAS"""
+    tabela = np.array(
+        [[tabela.valores[destino][campo] for destino in VALORES_DIARIAS] for tabela in indice_tabelas().tabelas],
+        dtype=np.int64,
+    )
+    tabela.setflags(write=False)
+    return tabela
+
+
+@lru_cache(maxsize=None)
+def _vigencias():
+    """Primeiro e último dia (dias desde 1970, inclusive) de cada tabela de valores"""
+    indice = indice_tabelas()
+    inicios = np.array(indice.inicios, dtype=np.int64) - _ORDINAL_EPOCA
+    fins = np.array(indice.fins, dtype=np.int64) - _ORDINAL_EPOCA
+    inicios.setflags(write=False)
+    fins.setflags(write=False)
+    return inicios, fins
+
+
+def carregar_tabela_valores():
+    """Monta uma única vez os vetores de valores usados pelo cálculo em lote"""
+    for campo in CAMPOS_VALORES:
+        _tabela_valores(campo)
+    _vigencias()
+
+
+def _posicoes_tabela(dias, exigidas):
+    """Posição da tabela vigente em cada dia (dias desde 1970), por busca binária
+
+    Levanta LookupError se algum dia marcado em `exigidas` não tiver tabela.
+    """
+    inicios, fins = _vigencias()
+    posicoes = np.searchsorted(inicios, dias, side="right") - 1
+    np.maximum(posicoes, 0, out=posicoes)
+    fora = exigidas & ((dias < inicios[posicoes]) | (dias > fins[posicoes]))
+    if fora.any():
+        raise LookupError(f"Nenhuma tabela de valores vigente em {_descrever_dia(int(dias[fora][0]))}")
+    return posicoes
+
+
+def _descrever_dia(dia):
+    """Data dd/mm/aaaa de um dia desde 1970, ou o número de dias se estiver fora do alcance de `date`"""
+    ordinal = dia + _ORDINAL_EPOCA
+    if not date.min.toordinal() <= ordinal <= date.max.toordinal():
+        return f"{dia} dias desde 01/01/1970"
+    return date.fromordinal(ordinal).strftime("%d/%m/%Y")
+
+
+def _datas(momentos, descricao):
+    """Coluna de datas/horas como datetime64; levanta ValueError na primeira data ausente (NaT)"""
+    datas = pd.to_datetime(np.asarray(momentos)).values
+    ausentes = np.isnat(datas)
+    if ausentes.any():
+        raise ValueError(f"{descricao} ausente na posição {int(np.flatnonzero(ausentes)[0])}")
+    return datas
+
+
+def somar_periodos(codigos, dia_inicial, quantidade, alimentacao_paga, hospedagem_paga):
+    """Soma das diárias de `quantidade` períodos de 24h a partir de `dia_inicial` (dias desde 1970)
+
+    Cada dia usa a tabela de valores vigente nele: para cada tabela, conta os
+    dias do intervalo que caem na sua vigência.
+    """
+    alimentacao = _tabela_valores("alimentacao")
+    pousada = _tabela_valores("pousada")
+    total_dia = _tabela_valores("total")
+    dia_final = dia_inicial + quantidade
+    inicios, fins = _vigencias()
+    total = np.zeros(len(codigos), dtype=np.int64)
+    for posicao in range(len(inicios)):
+        dias_tabela = np.minimum(fins[posicao] + 1, dia_final) - np.maximum(inicios[posicao], dia_inicial)
+        diaria_dia = np.where(
+            alimentacao_paga & hospedagem_paga,
+            total_dia[posicao, codigos],
+            np.where(alimentacao_paga, alimentacao[posicao, codigos], 0)
+            + np.where(hospedagem_paga, pousada[posicao, codigos], 0),
+        )
+        total += np.maximum(dias_tabela, 0) * diaria_dia
+    return total
+
+
+def calcular_colunas(codigos, saida, retorno, alimentacao_gratuita, hospedagem_gratuita, valor_periodos):
+    """Regras do motor escalar aplicadas a vetores
+
+    `codigos` vem de `codigos_destino`; `saida` e `retorno` são datetime64
+    sem NaT e as gratuidades são vetores booleanos.
+    `valor_periodos(dia_saida, periodos, alimentacao_paga, hospedagem_paga)`
+    devolve a soma dos períodos de 24h completos de cada viagem com pernoite
+    (em geral `somar_periodos` com os códigos já fixados). Devolve
+    (total_centavos, códigos de tipo, horas_ultimo_dia).
+    """
+    alimentacao = _tabela_valores("alimentacao")
+
+    duracao = retorno - saida
+    total_horas = duracao / _UMA_HORA
+    dia_saida = saida.astype("datetime64[D]").astype(np.int64)
+    dias = retorno.astype("datetime64[D]").astype(np.int64) - dia_saida
+
+    # Enquadramento: mesma ordem de testes do motor escalar
+    tipo = np.full(len(codigos), COD_PERNOITE, dtype=np.int8)
+    tipo[dias == 0] = COD_MAIS_8H
+    tipo[total_horas <= 8] = COD_6_A_8H
+    tipo[total_horas <= 6] = COD_ATE_6H
+
+    # Sem pernoite vale a tabela do dia da saída
+    tabela_saida = _posicoes_tabela(dia_saida, np.ones(len(codigos), dtype=bool))
+    valor_alimentacao = alimentacao[tabela_saida, codigos]
+    meia_alimentacao = valor_alimentacao * 50 // 100
+    alimentacao_paga = ~alimentacao_gratuita
+    hospedagem_paga = ~hospedagem_gratuita
+
+    # Pernoite: períodos de 24h completos + último dia pelo marco temporal
+    # com a tabela da data de retorno
+    periodos = np.maximum(dias, 0)
+    total_periodos = valor_periodos(dia_saida, periodos, alimentacao_paga, hospedagem_paga)
+    tabela_ultimo = _posicoes_tabela(dia_saida + periodos, tipo == COD_PERNOITE)
+    alimentacao_ultimo = alimentacao[tabela_ultimo, codigos]
+    horas_ultimo_dia = (duracao - periodos * _UM_DIA) / _UMA_HORA
+    diaria_ultimo = np.where(
+        (horas_ultimo_dia <= 6) | alimentacao_gratuita,
+        0,
+        np.where(horas_ultimo_dia <= 8, alimentacao_ultimo * 50 // 100, alimentacao_ultimo),
+    )
+    total_pernoite = total_periodos + diaria_ultimo
+
+    total_centavos = np.select(
+        [tipo == COD_ATE_6H, tipo == COD_6_A_8H, tipo == COD_MAIS_8H],
+        [0, np.where(alimentacao_paga, meia_alimentacao, 0), np.where(alimentacao_paga, valor_alimentacao, 0)],
+        total_pernoite,
+    )
+    return total_centavos, tipo, horas_ultimo_dia
+
+
+def _resultado_lote(total_centavos, tipo, horas_ultimo_dia, indice):
+    return pd.DataFrame(
+        {
+            "total_centavos": total_centavos,
+            "tipo_calculado": pd.Categorical.from_codes(tipo, categories=list(TIPOS_CALCULO)),
+            "horas_ultimo_dia": np.where(tipo == COD_PERNOITE, horas_ultimo_dia, np.nan),
+        },
+        index=indice,
+    )
+
+
+def calcular_lote(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita):
+    """Calcula as diárias de um lote de viagens
+
+    Recebe colunas (Series do pandas ou arrays NumPy) de mesmo tamanho e
+    devolve um DataFrame com `total_centavos` (int64), `tipo_calculado`
+    (categórico) e `horas_ultimo_dia` (NaN quando não há pernoite). O índice
+    da coluna `destino` é preservado quando ela é uma Series. Levanta KeyError
+    para destinos desconhecidos e ValueError para datas ausentes (NaT).
+    """
+    indice = destino.index if isinstance(destino, pd.Series) else None
+    codigos = codigos_destino(destino)
+
+    def valor_periodos(dia_saida, periodos, alimentacao_paga, hospedagem_paga):
+        return somar_periodos(codigos, dia_saida, periodos, alimentacao_paga, hospedagem_paga)
+
+    colunas = calcular_colunas(
+        codigos,
+        _datas(datetime_saida, "Data de saída"),
+        _datas(datetime_retorno, "Data de retorno"),
+        np.asarray(alimentacao_gratuita, dtype=bool),
+        np.asarray(hospedagem_gratuita, dtype=bool),
+        valor_periodos,
+    )
+    return _resultado_lote(*colunas, indice)
+
+
+def calcular_itinerarios_lote(trechos, viagens):
+    """Calcula as diárias de um lote de itinerários com vários destinos
+
+    `trechos` é um DataFrame com `id_itinerario`, `destino` e `inicio` (em
+    qualquer ordem); `viagens` é indexado por id_itinerario e tem `retorno`,
+    `alimentacao_gratuita` e `hospedagem_gratuita`. Aplica as regras de
+    `diarias.itinerario.calcular_itinerario` e devolve um DataFrame com as
+    colunas de `calcular_lote`, indexado como `viagens`.
+    """
+    itinerario = viagens.index.get_indexer(trechos["id_itinerario"])
+    if (itinerario < 0).any():
+        desconhecidos = pd.unique(trechos["id_itinerario"].to_numpy()[itinerario < 0])
+        raise KeyError(f"Itinerário(s) sem viagem: {', '.join(map(str, desconhecidos))}")
+    inicio = _datas(trechos["inicio"], "Início de trecho")
+    codigos = codigos_destino(trechos["destino"])
+
+    # Varredura única: trechos ordenados por itinerário e início
+    ordem = np.lexsort((inicio, itinerario))
+    itinerario, inicio, codigos = itinerario[ordem], inicio[ordem], codigos[ordem]
+    quantidade_trechos = np.bincount(itinerario, minlength=len(viagens))
+    if (quantidade_trechos == 0).any():
+        raise ValueError("Todo itinerário deve ter ao menos um trecho")
+    mesmo_itinerario = itinerario[1:] == itinerario[:-1]
+    if (mesmo_itinerario & (inicio[1:] <= inicio[:-1])).any():
+        raise ValueError("Os trechos de um itinerário devem ter inícios distintos")
+    primeiro_trecho = np.flatnonzero(np.r_[True, ~mesmo_itinerario])
+    ultimo_trecho = np.r_[primeiro_trecho[1:] - 1, len(itinerario) - 1]
+
+    saida = inicio[primeiro_trecho]
+    retorno = _datas(viagens["retorno"], "Data de retorno")
+    if ((quantidade_trechos > 1) & (inicio[ultimo_trecho] >= retorno)).any():
+        raise ValueError("Todos os trechos devem começar antes do retorno")
+
+    # Intervalo [comeco, fim) de períodos de 24h atribuído a cada trecho: do
+    # primeiro período que termina depois do seu início até o do seguinte
+    dia_saida = saida.astype("datetime64[D]").astype(np.int64)
+    marco = saida - saida.astype("datetime64[D]")
+    periodos = np.maximum(retorno.astype("datetime64[D]").astype(np.int64) - dia_saida, 0)
+    dia_trecho = inicio.astype("datetime64[D]").astype(np.int64)
+    hora_trecho = inicio - inicio.astype("datetime64[D]")
+    comeco = dia_trecho - dia_saida[itinerario] - (hora_trecho < marco[itinerario])
+    comeco = np.clip(comeco, 0, periodos[itinerario])
+    fim = np.r_[comeco[1:], 0]
+    fim[ultimo_trecho] = periodos
+
+    def valor_periodos(dia_saida, periodos, alimentacao_paga, hospedagem_paga):
+        valores = somar_periodos(
+            codigos, dia_saida[itinerario] + comeco, fim - comeco,
+            alimentacao_paga[itinerario], hospedagem_paga[itinerario],
+        )
+        total = np.zeros(len(dia_saida), dtype=np.int64)
+        np.add.at(total, itinerario, valores)
+        return total
+
+    colunas = calcular_colunas(
+        codigos[ultimo_trecho],
+        saida,
+        retorno,
+        np.asarray(viagens["alimentacao_gratuita"], dtype=bool),
+        np.asarray(viagens["hospedagem_gratuita"], dtype=bool),
+        valor_periodos,
+    )
+    return _resultado_lote(*colunas, viagens.index)
+
+
+# Grupos de três dígitos pré-formatados, com e sem zeros à esquerda
+_GRUPOS = np.array([str(i) for i in range(1000)], dtype=object)
+_GRUPOS_COM_ZEROS = np.array([f".{i:03d}" for i in range(1000)], dtype=object)
+_CENTAVOS = np.array([f",{i:02d}" for i in range(100)], dtype=object)
+
+
+def _como_serie(valores, textos):
+    """Devolve `textos` como Series com o índice de `valores`, se for uma Series"""
+    if isinstance(valores, pd.Series):
+        return pd.Series(textos, index=valores.index, dtype=object)
+    return textos
+
+
+def formatar_centavos_lote(centavos):
+    """Formata um vetor de centavos como moeda brasileira (R$ 1.234,56)
+
+    Equivale a aplicar `formatar_centavos` a cada valor, montando o texto por
+    grupos de três dígitos a partir de tabelas pré-formatadas. Valores
+    ausentes (<NA> em colunas Int64, como as de `conciliar`) viram texto vazio.
+    """
+    inteiros = pd.array(centavos, dtype="Int64")
+    ausentes = np.asarray(inteiros.isna())
+    valores = inteiros.to_numpy(dtype=np.int64, na_value=0)
+    negativo = valores < 0
+    inteira, fracao = np.divmod(np.abs(valores), 100)
+
+    # Separar grupos de milhar da direita para a esquerda
+    lider = inteira.copy()
+    corpo = np.full(len(valores), "", dtype=object)
+    restantes = lider >= 1000
+    while restantes.any():
+        corpo[restantes] = _GRUPOS_COM_ZEROS[lider[restantes] % 1000] + corpo[restantes]
+        lider[restantes] //= 1000
+        restantes = lider >= 1000
+
+    textos = "R$ " + np.where(negativo, "-", "") + _GRUPOS[lider] + corpo + _CENTAVOS[fracao]
+    textos[ausentes] = ""
+    return _como_serie(centavos, textos)
+
+
+def formatar_moeda_lote(valores):
+    """Formata um vetor de valores em reais como moeda brasileira, como `format_currency`
+
+    Os valores são convertidos para centavos com arredondamento; os poucos
+    valores próximos de meio centavo, em que o arredondamento binário pode
+    divergir, são convertidos pelo formatador escalar. Valores ausentes (NaN)
+    viram texto vazio.
+    """
+    reais = np.asarray(valores, dtype=np.float64)
+    ausentes = np.isnan(reais)
+    escalados = np.where(ausentes, 0, reais) * 100
+    centavos = np.round(escalados).astype(np.int64)
+    ambiguos = np.abs(np.abs(escalados - np.trunc(escalados)) - 0.5) < 1e-6
+    textos = formatar_centavos_lote(centavos)
+    for posicao in np.flatnonzero(ambiguos):
+        textos[posicao] = format_currency(reais[posicao])
+    textos[ausentes] = ""
+    return _como_serie(valores, textos)
+
+
+def formatar_duracao_lote(horas):
+    """Formata um vetor de durações (em horas) como `formatar_duracao`
+
+    Cada valor distinto é formatado uma única vez; em viagens reais há poucas
+    durações distintas em relação ao número de linhas. Valores ausentes (NaN,
+    como `horas_ultimo_dia` de viagens sem pernoite) viram texto vazio.
+    """
+    valores = np.asarray(horas, dtype=np.float64)
+    distintos, posicoes = np.unique(valores, return_inverse=True)
+    textos = np.array(
+        ["" if np.isnan(valor) else formatar_duracao(valor) for valor in distintos], dtype=object
+    )[posicoes.ravel()]
+    return _como_serie(horas, textos)
@@ -0,0 +1,179 @@
+"""Instrumentação opcional dos caminhos quentes (página, lote e serviço).
+
+Mantém, em memória e por processo:
+
+- histogramas de duração por fase (`diarias_fase_segundos{fase=...}`);
+- contadores, como cálculos por `tipo_calculado` e linhas processadas;
+- medidores, como linhas/s do último lote e taxa de acerto do cache.
+
+Desativada por padrão: `medir` devolve um gerenciador de contexto vazio e
+`contar`/`observar` retornam imediatamente. Ative com a variável de ambiente
+DIARIAS_METRICAS=1 ou com `registro_metricas.ativar()`.
+
+Os valores podem ser exportados no formato texto do Prometheus
+(`exportar_prometheus`), servidos pela rota GET /metricas do serviço HTTP ou
+gravados em arquivo (`gravar`; a página grava em DIARIAS_METRICAS_ARQUIVO a
+cada execução, quando definida).
+"""
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+
+# Limites superiores dos buckets de duração, em segundos
+BUCKETS_SEGUNDOS = (
+    0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005,
+    0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0,
+)
+
+_DESCRICOES = {
+    "diarias_fase_segundos": ("histogram", "Duração de cada fase, em segundos"),
+    "diarias_calculos_total": ("counter", "Cálculos de diária por tipo_calculado"),
+    "diarias_lote_linhas_total": ("counter", "Linhas processadas em lote"),
+    "diarias_lote_linhas_por_segundo": ("gauge", "Vazão do último lote, em linhas por segundo"),
+    "diarias_cache_acertos_total": ("counter", "Acertos do cache de resultados"),
+    "diarias_cache_falhas_total": ("counter", "Falhas do cache de resultados"),
+    "diarias_cache_razao_acertos": ("gauge", "Fração de consultas atendidas pelo cache"),
+    "diarias_http_requisicoes_total": ("counter", "Requisições HTTP por rota"),
+    "diarias_http_erros_internos_total": ("counter", "Erros inesperados do serviço HTTP por rota"),
+}
+
+_NULO = nullcontext()
+
+
+class _Histograma:
+    __slots__ = ("contagens", "soma", "total")
+
+    def __init__(self):
+        self.contagens = [0] * (len(BUCKETS_SEGUNDOS) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(BUCKETS_SEGUNDOS, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    pares = ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos)
+    return "{" + pares + "}"
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RegistroMetricas:
+    """Coleção de histogramas, contadores e medidores de um processo"""
+
+    def __init__(self, ativo=False):
+        self.ativo = ativo
+        self._histogramas = {}
+        self._contadores = {}
+        self._medidores = {}
+        self._coletores = []
+        self._trava = Lock()
+
+    def ativar(self, ativo=True):
+        self.ativo = ativo
+
+    def adicionar_coletor(self, coletor):
+        """Registra `coletor(registro)`, chamado antes de cada exportação"""
+        self._coletores.append(coletor)
+
+    def medir(self, fase):
+        """Gerenciador de contexto que registra a duração de `fase`"""
+        if not self.ativo:
+            return _NULO
+        return self._medir(fase)
+
+    @contextmanager
+    def _medir(self, fase):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(fase, time.perf_counter() - inicio)
+
+    def observar(self, fase, segundos):
+        """Registra uma duração de `fase` no histograma"""
+        if not self.ativo:
+            return
+        with self._trava:
+            histograma = self._histogramas.get(fase)
+            if histograma is None:
+                histograma = self._histogramas[fase] = _Histograma()
+            histograma.observar(segundos)
+
+    def contar(self, nome, valor=1, **rotulos):
+        """Incrementa um contador"""
+        if not self.ativo:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        """Define o valor atual de um medidor (ou de um contador mantido fora do registro)"""
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._medidores[chave] = valor
+
+    def limpar(self):
+        with self._trava:
+            self._histogramas.clear()
+            self._contadores.clear()
+            self._medidores.clear()
+
+    def exportar_prometheus(self):
+        """Texto no formato de exposição do Prometheus"""
+        for coletor in self._coletores:
+            coletor(self)
+        with self._trava:
+            series = {}
+            for (nome, rotulos), valor in list(self._contadores.items()) + list(self._medidores.items()):
+                series.setdefault(nome, []).append(f"{nome}{_rotulos(rotulos)} {valor}")
+            if self._histogramas:
+                linhas = series.setdefault("diarias_fase_segundos", [])
+                for fase, histograma in sorted(self._histogramas.items()):
+                    acumulado = 0
+                    for limite, contagem in zip(BUCKETS_SEGUNDOS + ("+Inf",), histograma.contagens):
+                        acumulado += contagem
+                        linhas.append(f"diarias_fase_segundos_bucket{_rotulos((('fase', fase), ('le', limite)))} {acumulado}")
+                    linhas.append(f"diarias_fase_segundos_sum{_rotulos((('fase', fase),))} {histograma.soma}")
+                    linhas.append(f"diarias_fase_segundos_count{_rotulos((('fase', fase),))} {histograma.total}")
+
+        saida = []
+        for nome in sorted(series):
+            tipo, descricao = _DESCRICOES.get(nome, ("untyped", nome))
+            saida.append(f"# HELP {nome} {descricao}")
+            saida.append(f"# TYPE {nome} {tipo}")
+            saida.extend(series[nome])
+        return "\n".join(saida) + "\n"
+
+    def gravar(self, caminho):
+        """Grava a exportação Prometheus em `caminho` (substituição atômica)
+
+        Cada gravação usa um arquivo temporário próprio no mesmo diretório:
+        gravações simultâneas (várias sessões da página) não interferem.
+        """
+        descritor, temporario = tempfile.mkstemp(
+            prefix=f".{os.path.basename(caminho)}.", suffix=".tmp", dir=os.path.dirname(os.path.abspath(caminho))
+        )
+        try:
+            os.fchmod(descritor, 0o644)
+            with open(descritor, "w", encoding="utf-8") as arquivo:
+                arquivo.write(self.exportar_prometheus())
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.remove(temporario)
+            raise
+
+
+# Instância compartilhada pelo processo
+registro_metricas = RegistroMetricas(ativo=os.environ.get("DIARIAS_METRICAS", "").lower() in ("1", "true", "sim"))
@@ -0,0 +1,129 @@
+"""Execução do cálculo em lote distribuída entre vários processos.
+
+O processo principal apenas fatia o arquivo de viagens: blocos de linhas
+brutas para CSV (a conversão é feita no trabalhador) ou lotes Arrow para
+Parquet. Cada trabalhador calcula seu bloco com o motor vetorizado e os
+resultados são gravados na mesma ordem da entrada. O número de blocos em
+andamento é limitado, de modo que o uso de memória continua constante.
+"""
+import io
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .cli import (
+    CAMPOS_PADRAO,
+    TAMANHO_BLOCO_PADRAO,
+    abrir_escritor,
+    colunas_como_texto,
+    conversores_texto,
+    formato_arquivo,
+    importar_pyarrow,
+    processar_bloco,
+    registrar_vazao,
+    relatar_progresso,
+)
+from .lote import carregar_tabela_valores
+
+# Blocos enviados por trabalhador além do que está sendo calculado
+BLOCOS_EM_ESPERA_POR_TRABALHADOR = 2
+
+# Configuração do trabalhador, definida uma vez por processo
+_configuracao = {}
+
+
+def _inicializar_trabalhador(campos, manter):
+    """Carrega a tabela de valores e a configuração uma única vez por processo"""
+    carregar_tabela_valores()
+    _configuracao["campos"] = campos
+    _configuracao["manter"] = manter
+
+
+def _processar_fragmento(fragmento):
+    """Converte um fragmento do arquivo em DataFrame e calcula suas diárias"""
+    manter = _configuracao["manter"]
+    if isinstance(fragmento, bytes):
+        bloco = pd.read_csv(io.BytesIO(fragmento), converters=conversores_texto(manter))
+    else:
+        bloco = colunas_como_texto(fragmento.to_pandas(), manter)
+    return processar_bloco(bloco, _configuracao["campos"], manter)
+
+
+def _fragmentos_csv(caminho, tamanho_bloco):
+    """Divide o CSV em blocos de linhas brutas, cada um com o cabeçalho
+
+    Assume uma viagem por linha (sem quebras de linha dentro de campos).
+    """
+    with open(caminho, "rb") as arquivo:
+        cabecalho = arquivo.readline()
+        while True:
+            linhas = list(itertools.islice(arquivo, tamanho_bloco))
+            if not linhas:
+                break
+            yield cabecalho + b"".join(linhas)
+
+
+def _fragmentos_parquet(caminho, tamanho_bloco):
+    pa = importar_pyarrow()
+    yield from pa.parquet.ParquetFile(caminho).iter_batches(batch_size=tamanho_bloco)
+
+
+def executar_paralelo(
+    entrada,
+    saida,
+    campos=CAMPOS_PADRAO,
+    manter=(),
+    tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+    trabalhadores=None,
+    progresso=True,
+):
+    """Processa `entrada` com um pool de processos gravando em `saida` na ordem original
+
+    `trabalhadores` assume o número de CPUs quando omitido. Devolve o total
+    de linhas processadas.
+    """
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    if formato_arquivo(entrada) == "parquet":
+        fragmentos = _fragmentos_parquet(entrada, tamanho_bloco)
+    else:
+        fragmentos = _fragmentos_csv(entrada, tamanho_bloco)
+
+    limite_em_andamento = trabalhadores * BLOCOS_EM_ESPERA_POR_TRABALHADOR
+    escritor = abrir_escritor(saida)
+    linhas = 0
+    inicio = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=trabalhadores,
+            initializer=_inicializar_trabalhador,
+            initargs=(list(campos), list(manter)),
+        ) as executor:
+            em_andamento = deque()
+            for fragmento in fragmentos:
+                em_andamento.append(executor.submit(_processar_fragmento, fragmento))
+                if len(em_andamento) >= limite_em_andamento:
+                    linhas_bloco = _gravar_proximo(em_andamento, escritor)
+                    linhas += linhas_bloco
+                    registrar_vazao(linhas_bloco, linhas, inicio)
+                    if progresso:
+                        relatar_progresso(linhas, inicio)
+            while em_andamento:
+                linhas_bloco = _gravar_proximo(em_andamento, escritor)
+                linhas += linhas_bloco
+                registrar_vazao(linhas_bloco, linhas, inicio)
+                if progresso:
+                    relatar_progresso(linhas, inicio)
+    finally:
+        escritor.fechar()
+    return linhas
+
+
+def _gravar_proximo(em_andamento, escritor):
+    """Aguarda o bloco mais antigo, grava seu resultado e devolve o número de linhas"""
+    resultado = em_andamento.popleft().result()
+    escritor.gravar(resultado)
+    return len(resultado)
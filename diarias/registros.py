@@ -0,0 +1,271 @@
+"""Representação compacta de viagens e resultados para cargas com milhões de viagens.
+
+Uma viagem guarda apenas inteiros: saída e retorno em minutos desde
+01/01/1970, o código do destino (posição em VALORES_DIARIAS) e as
+gratuidades como bits. Um resultado guarda o total em centavos e o código
+do tipo de cálculo (posição em TIPOS_CALCULO).
+
+- uso escalar: `ViagemCompacta` e `ResultadoCompacto`, registros com
+  `__slots__`, calculados por `calcular_registro`;
+- uso em lote: arrays estruturados do NumPy com `DTYPE_VIAGEM` (10 bytes por
+  viagem) e `DTYPE_RESULTADO` (9 bytes), calculados diretamente por
+  `calcular_registros`, sem colunas de objetos Python.
+
+`viagens_para_dataframe` e `resultados_para_dataframe` montam DataFrames em
+que as colunas inteiras (saida, retorno, gratuidades e total_centavos) são
+visões dos campos do array, sem cópia; `destino` e `tipo_calculado` são
+categóricos montados a partir dos códigos, que o pandas pode copiar (1 byte
+por linha). `viagens_de_dataframe` faz o caminho inverso, tanto a partir
+desse esquema quanto das colunas de `calcular_lote`, empacotando as colunas
+em uma única passagem: a disposição por linhas do array não permite evitar
+essa cópia. Os horários têm resolução de minutos: segundos são descartados.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .calculo import TIPOS_CALCULO, VALORES_DIARIAS, calcular_diaria
+from .lote import calcular_colunas, codigos_destino, somar_periodos
+
+DESTINOS = tuple(VALORES_DIARIAS)
+
+BIT_ALIMENTACAO_GRATUITA = 1
+BIT_HOSPEDAGEM_GRATUITA = 2
+
+DTYPE_VIAGEM = np.dtype([("saida", "<i4"), ("retorno", "<i4"), ("destino", "i1"), ("gratuidades", "u1")])
+DTYPE_RESULTADO = np.dtype([("total_centavos", "<i8"), ("tipo", "i1")])
+
+_EPOCA = datetime(1970, 1, 1)
+_UM_MINUTO = timedelta(minutes=1)
+_CODIGOS_DESTINO = {destino: codigo for codigo, destino in enumerate(DESTINOS)}
+_CODIGOS_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS_CALCULO)}
+_LIMITES_MINUTOS = np.iinfo(np.int32)
+
+
+def _gratuidades(alimentacao_gratuita, hospedagem_gratuita):
+    return BIT_ALIMENTACAO_GRATUITA * bool(alimentacao_gratuita) | BIT_HOSPEDAGEM_GRATUITA * bool(hospedagem_gratuita)
+
+
+class ViagemCompacta:
+    """Viagem como quatro inteiros: minutos de saída e de retorno, código do destino e bits de gratuidade"""
+
+    __slots__ = ("saida", "retorno", "destino", "gratuidades")
+
+    def __init__(self, saida, retorno, destino, gratuidades=0):
+        self.saida = saida
+        self.retorno = retorno
+        self.destino = destino
+        self.gratuidades = gratuidades
+
+    @classmethod
+    def criar(cls, destino, datetime_saida, datetime_retorno, alimentacao_gratuita=False, hospedagem_gratuita=False):
+        """Monta o registro a partir dos argumentos de `calcular_diaria`"""
+        if destino not in _CODIGOS_DESTINO:
+            raise KeyError(f"Destino desconhecido: {destino}")
+        return cls(
+            (datetime_saida - _EPOCA) // _UM_MINUTO,
+            (datetime_retorno - _EPOCA) // _UM_MINUTO,
+            _CODIGOS_DESTINO[destino],
+            _gratuidades(alimentacao_gratuita, hospedagem_gratuita),
+        )
+
+    @property
+    def nome_destino(self):
+        return DESTINOS[self.destino]
+
+    @property
+    def datetime_saida(self):
+        return _EPOCA + timedelta(minutes=self.saida)
+
+    @property
+    def datetime_retorno(self):
+        return _EPOCA + timedelta(minutes=self.retorno)
+
+    @property
+    def alimentacao_gratuita(self):
+        return bool(self.gratuidades & BIT_ALIMENTACAO_GRATUITA)
+
+    @property
+    def hospedagem_gratuita(self):
+        return bool(self.gratuidades & BIT_HOSPEDAGEM_GRATUITA)
+
+    def __eq__(self, outra):
+        if not isinstance(outra, ViagemCompacta):
+            return NotImplemented
+        return (self.saida, self.retorno, self.destino, self.gratuidades) == (
+            outra.saida, outra.retorno, outra.destino, outra.gratuidades
+        )
+
+    def __repr__(self):
+        return (
+            f"ViagemCompacta({self.nome_destino!r}, {self.datetime_saida:%d/%m/%Y %H:%M}, "
+            f"{self.datetime_retorno:%d/%m/%Y %H:%M}, gratuidades={self.gratuidades})"
+        )
+
+
+class ResultadoCompacto:
+    """Total (centavos) e código do tipo de cálculo de uma viagem"""
+
+    __slots__ = ("total_centavos", "tipo")
+
+    def __init__(self, total_centavos, tipo):
+        self.total_centavos = total_centavos
+        self.tipo = tipo
+
+    @property
+    def tipo_calculado(self):
+        return TIPOS_CALCULO[self.tipo]
+
+    @property
+    def total_viagem(self):
+        return self.total_centavos / 100
+
+    def __eq__(self, outro):
+        if not isinstance(outro, ResultadoCompacto):
+            return NotImplemented
+        return (self.total_centavos, self.tipo) == (outro.total_centavos, outro.tipo)
+
+    def __repr__(self):
+        return f"ResultadoCompacto({self.total_centavos}, {self.tipo_calculado!r})"
+
+
+def calcular_registro(viagem, tabelas=None):
+    """Calcula uma `ViagemCompacta` com o motor escalar e devolve um `ResultadoCompacto`"""
+    resultado = calcular_diaria(
+        viagem.nome_destino,
+        viagem.datetime_saida,
+        viagem.datetime_retorno,
+        viagem.alimentacao_gratuita,
+        viagem.hospedagem_gratuita,
+        detalhar=False,
+        tabelas=tabelas,
+    )
+    return ResultadoCompacto(resultado.total_centavos, _CODIGOS_TIPO[resultado.tipo_calculado])
+
+
+def _minutos(momentos):
+    """Minutos desde 1970 (int32) de uma coluna de datas/horas"""
+    minutos = pd.to_datetime(np.asarray(momentos)).values.astype("datetime64[m]").astype(np.int64)
+    if len(minutos) and (minutos.min() < _LIMITES_MINUTOS.min or minutos.max() > _LIMITES_MINUTOS.max):
+        raise ValueError("Data fora do intervalo representável em minutos desde 1970 (int32)")
+    return minutos
+
+
+def empacotar_viagens(destino, datetime_saida, datetime_retorno, alimentacao_gratuita, hospedagem_gratuita):
+    """Monta um array `DTYPE_VIAGEM` a partir das colunas aceitas por `calcular_lote`"""
+    codigos = codigos_destino(destino)
+    viagens = np.empty(len(codigos), dtype=DTYPE_VIAGEM)
+    viagens["saida"] = _minutos(datetime_saida)
+    viagens["retorno"] = _minutos(datetime_retorno)
+    viagens["destino"] = codigos
+    viagens["gratuidades"] = np.where(np.asarray(alimentacao_gratuita, dtype=bool), BIT_ALIMENTACAO_GRATUITA, 0) | (
+        np.where(np.asarray(hospedagem_gratuita, dtype=bool), BIT_HOSPEDAGEM_GRATUITA, 0)
+    )
+    return viagens
+
+
+def _codigos_destino_empacotados(destino):
+    """Códigos de destino de uma coluna categórica de `viagens_para_dataframe` ou de textos"""
+    if isinstance(destino.dtype, pd.CategoricalDtype) and tuple(destino.cat.categories) == DESTINOS:
+        codigos = destino.cat.codes.to_numpy()
+        if not (codigos < 0).any():
+            return codigos
+    return codigos_destino(destino)
+
+
+def _inteiros_no_intervalo(coluna, nome, minimo, maximo):
+    valores = np.asarray(coluna)
+    if not np.issubdtype(valores.dtype, np.integer):
+        raise ValueError(f"{nome} deve ser uma coluna de inteiros")
+    if len(valores) and (valores.min() < minimo or valores.max() > maximo):
+        raise ValueError(f"{nome} fora do intervalo [{minimo}, {maximo}]")
+    return valores
+
+
+def viagens_de_dataframe(viagens):
+    """Empacota um DataFrame de viagens em um array `DTYPE_VIAGEM`
+
+    Aceita o esquema de `viagens_para_dataframe` (saida e retorno em minutos
+    desde 1970, destino categórico ou texto e gratuidades em bits) ou as
+    colunas de `calcular_lote` (destino, saida e retorno como datas,
+    alimentacao_gratuita e hospedagem_gratuita).
+    """
+    if "gratuidades" in viagens:
+        empacotadas = np.empty(len(viagens), dtype=DTYPE_VIAGEM)
+        empacotadas["saida"] = _inteiros_no_intervalo(viagens["saida"], "saida", _LIMITES_MINUTOS.min, _LIMITES_MINUTOS.max)
+        empacotadas["retorno"] = _inteiros_no_intervalo(
+            viagens["retorno"], "retorno", _LIMITES_MINUTOS.min, _LIMITES_MINUTOS.max
+        )
+        empacotadas["destino"] = _codigos_destino_empacotados(viagens["destino"])
+        empacotadas["gratuidades"] = _inteiros_no_intervalo(
+            viagens["gratuidades"], "gratuidades", 0, BIT_ALIMENTACAO_GRATUITA | BIT_HOSPEDAGEM_GRATUITA
+        )
+        return empacotadas
+    return empacotar_viagens(
+        viagens["destino"],
+        viagens["saida"],
+        viagens["retorno"],
+        viagens["alimentacao_gratuita"],
+        viagens["hospedagem_gratuita"],
+    )
+
+
+def _categorico(codigos, categorias):
+    """Categórico a partir de `codigos`, com o intervalo verificado uma única vez"""
+    if len(codigos) and (codigos.min() < 0 or codigos.max() >= len(categorias)):
+        raise ValueError("Código fora das categorias")
+    return pd.Categorical.from_codes(codigos, categories=list(categorias), validate=False)
+
+
+def viagens_para_dataframe(viagens):
+    """DataFrame com os campos de um array `DTYPE_VIAGEM`
+
+    `saida`, `retorno` (minutos desde 1970) e `gratuidades` são visões do
+    array, sem cópia; `destino` é categórico. O resultado volta ao array com
+    `viagens_de_dataframe`.
+    """
+    return pd.DataFrame(
+        {
+            "saida": viagens["saida"],
+            "retorno": viagens["retorno"],
+            "destino": _categorico(viagens["destino"], DESTINOS),
+            "gratuidades": viagens["gratuidades"],
+        },
+        copy=False,
+    )
+
+
+def resultados_para_dataframe(resultados):
+    """DataFrame com os campos de um array `DTYPE_RESULTADO`; `total_centavos` é uma visão, sem cópia"""
+    return pd.DataFrame(
+        {
+            "total_centavos": resultados["total_centavos"],
+            "tipo_calculado": _categorico(resultados["tipo"], TIPOS_CALCULO),
+        },
+        copy=False,
+    )
+
+
+def calcular_registros(viagens):
+    """Calcula um array `DTYPE_VIAGEM` com as regras de `calcular_lote` e devolve um array `DTYPE_RESULTADO`"""
+    codigos = viagens["destino"]
+    if len(codigos) and (codigos.min() < 0 or codigos.max() >= len(DESTINOS)):
+        raise KeyError("Código de destino desconhecido")
+    gratuidades = viagens["gratuidades"]
+
+    def valor_periodos(dia_saida, periodos, alimentacao_paga, hospedagem_paga):
+        return somar_periodos(codigos, dia_saida, periodos, alimentacao_paga, hospedagem_paga)
+
+    total_centavos, tipo, _ = calcular_colunas(
+        codigos,
+        viagens["saida"].astype("datetime64[m]"),
+        viagens["retorno"].astype("datetime64[m]"),
+        (gratuidades & BIT_ALIMENTACAO_GRATUITA) != 0,
+        (gratuidades & BIT_HOSPEDAGEM_GRATUITA) != 0,
+        valor_periodos,
+    )
+    resultados = np.empty(len(codigos), dtype=DTYPE_RESULTADO)
+    resultados["total_centavos"] = total_centavos
+    resultados["tipo"] = tipo
+    return resultados
@@ -0,0 +1,408 @@
+"""Serviço HTTP assíncrono (JSON) para o cálculo de diárias.
+
+Implementado apenas com a biblioteca padrão (asyncio), para rodar localmente
+sem dependências externas:
+
+    python -m diarias.servico --porta 8080
+
+Rotas:
+
+- POST /calcular: corpo JSON com uma viagem; responde o resultado em JSON.
+- POST /lote: corpo NDJSON (uma viagem por linha, Content-Length ou
+  chunked); responde NDJSON em streaming, uma linha de resultado por viagem
+  e na mesma ordem. Linhas inválidas geram {"linha": n, "erro": ...} sem
+  interromper o lote.
+- GET /saude: verificação de disponibilidade.
+- GET /metricas: métricas no formato texto do Prometheus (ver
+  `diarias.metricas`; a instrumentação é ligada com --metricas).
+
+Campos da viagem: destino (texto), saida e retorno (ISO 8601 em horário
+local, sem fuso, ex. "2024-05-02T08:00", com no máximo
+`DIAS_MAXIMOS_VIAGEM` dias entre eles) e, opcionalmente, os booleanos JSON
+alimentacao_gratuita, hospedagem_gratuita (padrão falso) e detalhar (padrão
+verdadeiro em /calcular e falso em /lote).
+
+Erros inesperados respondem 500 em JSON ({"erro": ...}); no /lote, viram a
+linha de erro da viagem correspondente. Um erro no corpo do /lote depois de
+enviado o cabeçalho (linha acima de `TAMANHO_MAXIMO_JSON`, chunked
+inválido) segue como última linha ({"erro": ...}) e a conexão é encerrada.
+
+Requisições simultâneas acima de `--max-requisicoes` recebem 503.
+"""
+import argparse
+import asyncio
+import json
+import traceback
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+from .cache import calcular_diaria_em_cache
+from .calculo import VALORES_DIARIAS
+from .metricas import registro_metricas
+
+TAMANHO_MAXIMO_CABECALHO = 16 * 1024
+TAMANHO_MAXIMO_JSON = 1024 * 1024
+# O cálculo roda no laço de eventos: viagens mais longas são recusadas
+DIAS_MAXIMOS_VIAGEM = 366
+# Bloco máximo lido do corpo de uma vez
+TAMANHO_BLOCO_CORPO = 64 * 1024
+MAX_REQUISICOES_PADRAO = 64
+# Linhas de resultado acumuladas antes de cada envio no /lote
+LINHAS_POR_ENVIO = 512
+ROTAS = ("/saude", "/calcular", "/lote", "/metricas")
+
+
+class ErroRequisicao(Exception):
+    """Erro do cliente, respondido com o status HTTP indicado"""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class _LoteInterrompido(Exception):
+    """O /lote terminou com uma linha de erro após o cabeçalho: encerrar a conexão"""
+
+
+def _booleano(dados, campo, padrao):
+    """Campo booleano opcional; recusa textos e números (ex.: "false" seria verdadeiro)"""
+    valor = dados.get(campo, padrao)
+    if not isinstance(valor, bool):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"{campo} deve ser um booleano JSON (true ou false)")
+    return valor
+
+
+def ler_viagem(dados, detalhar_padrao=True):
+    """Valida o JSON de uma viagem e devolve os argumentos de `calcular_diaria`"""
+    if not isinstance(dados, dict):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "a viagem deve ser um objeto JSON")
+    try:
+        destino = dados["destino"]
+        saida = datetime.fromisoformat(dados["saida"])
+        retorno = datetime.fromisoformat(dados["retorno"])
+    except KeyError as erro:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"campo obrigatório ausente: {erro.args[0]}") from None
+    except (TypeError, ValueError):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "saida e retorno devem estar no formato ISO 8601") from None
+    if saida.tzinfo is not None or retorno.tzinfo is not None:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "saida e retorno devem estar em horário local, sem fuso horário")
+    if not isinstance(destino, str) or destino not in VALORES_DIARIAS:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"destino desconhecido: {destino}")
+    if retorno <= saida:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "o retorno deve ser posterior à saída")
+    if retorno - saida > timedelta(days=DIAS_MAXIMOS_VIAGEM):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"a viagem deve durar no máximo {DIAS_MAXIMOS_VIAGEM} dias")
+    return (
+        destino,
+        saida,
+        retorno,
+        _booleano(dados, "alimentacao_gratuita", False),
+        _booleano(dados, "hospedagem_gratuita", False),
+        _booleano(dados, "detalhar", detalhar_padrao),
+    )
+
+
+def calcular_json(dados, detalhar_padrao=True):
+    """Calcula a diária de uma viagem em JSON e devolve o resultado como dicionário"""
+    destino, saida, retorno, alimentacao, hospedagem, detalhar = ler_viagem(dados, detalhar_padrao)
+    try:
+        resultado = calcular_diaria_em_cache(destino, saida, retorno, alimentacao, hospedagem, detalhar=detalhar)
+    except LookupError as erro:
+        # Data sem tabela de valores vigente
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, str(erro)) from None
+    return resultado.como_dict()
+
+
+async def _ler_cabecalho(reader):
+    """Lê linha de requisição e cabeçalhos; devolve None se a conexão foi encerrada"""
+    try:
+        bruto = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as erro:
+        if erro.partial.strip():
+            raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "requisição incompleta") from None
+        return None
+    except asyncio.LimitOverrunError:
+        raise ErroRequisicao(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "cabeçalho muito grande") from None
+
+    linhas = bruto.decode("latin-1").split("\r\n")
+    try:
+        metodo, caminho, versao = linhas[0].split(" ", 2)
+    except ValueError:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "linha de requisição inválida") from None
+    cabecalhos = {}
+    for linha in linhas[1:]:
+        if linha:
+            nome, _, valor = linha.partition(":")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+    return metodo, caminho.split("?", 1)[0], versao, cabecalhos
+
+
+async def _blocos_corpo(reader, cabecalhos):
+    """Itera sobre o corpo da requisição em blocos (Content-Length ou chunked)"""
+    if cabecalhos.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            linha_tamanho = await reader.readline()
+            try:
+                tamanho = int(linha_tamanho.split(b";", 1)[0], 16)
+            except ValueError:
+                raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "codificação chunked inválida") from None
+            if tamanho < 0:
+                raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "codificação chunked inválida")
+            if tamanho == 0:
+                # Descartar trailers até a linha em branco
+                while (await reader.readline()).strip():
+                    pass
+                return
+            while tamanho > 0:
+                bloco = await reader.readexactly(min(tamanho, TAMANHO_BLOCO_CORPO))
+                tamanho -= len(bloco)
+                yield bloco
+            await reader.readexactly(2)
+    else:
+        try:
+            restante = int(cabecalhos.get("content-length", 0))
+        except ValueError:
+            raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "Content-Length inválido") from None
+        if restante < 0:
+            raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "Content-Length inválido")
+        while restante > 0:
+            bloco = await reader.read(min(restante, TAMANHO_BLOCO_CORPO))
+            if not bloco:
+                raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "corpo incompleto")
+            restante -= len(bloco)
+            yield bloco
+
+
+async def _ler_corpo(reader, cabecalhos, limite=TAMANHO_MAXIMO_JSON):
+    partes = []
+    tamanho = 0
+    async for bloco in _blocos_corpo(reader, cabecalhos):
+        tamanho += len(bloco)
+        if tamanho > limite:
+            raise ErroRequisicao(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "corpo muito grande")
+        partes.append(bloco)
+    return b"".join(partes)
+
+
+async def _descartar_corpo(reader, cabecalhos):
+    async for _ in _blocos_corpo(reader, cabecalhos):
+        pass
+
+
+async def _linhas_corpo(reader, cabecalhos, limite=TAMANHO_MAXIMO_JSON):
+    """Itera sobre as linhas não vazias de um corpo NDJSON, com no máximo `limite` bytes cada"""
+    pendente = bytearray()
+    async for bloco in _blocos_corpo(reader, cabecalhos):
+        *linhas, resto = bloco.split(b"\n")
+        if linhas:
+            linhas[0] = bytes(pendente) + linhas[0]
+            pendente.clear()
+        pendente += resto
+        for linha in linhas:
+            if len(linha) > limite:
+                raise ErroRequisicao(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "linha muito grande")
+            if linha.strip():
+                yield linha
+        if len(pendente) > limite:
+            raise ErroRequisicao(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "linha muito grande")
+    if pendente.strip():
+        yield bytes(pendente)
+
+
+def _cabecalho_resposta(status, tipo, manter_conexao, extras=()):
+    status = HTTPStatus(status)
+    linhas = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        f"Content-Type: {tipo}",
+        f"Connection: {'keep-alive' if manter_conexao else 'close'}",
+        *extras,
+    ]
+    return ("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1")
+
+
+async def _responder(writer, status, dados, manter_conexao, extras=()):
+    corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+    writer.write(
+        _cabecalho_resposta(
+            status, "application/json; charset=utf-8", manter_conexao, (f"Content-Length: {len(corpo)}", *extras)
+        )
+        + corpo
+    )
+    await writer.drain()
+
+
+def _json_linha(linha):
+    try:
+        return json.loads(linha)
+    except ValueError:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "JSON inválido") from None
+
+
+async def _responder_lote(reader, writer, cabecalhos, manter_conexao):
+    """Calcula um lote NDJSON, enviando os resultados à medida que são produzidos"""
+    writer.write(
+        _cabecalho_resposta(
+            HTTPStatus.OK, "application/x-ndjson; charset=utf-8", manter_conexao, ("Transfer-Encoding: chunked",)
+        )
+    )
+    pendentes = []
+
+    async def enviar():
+        dados = "".join(pendentes).encode("utf-8")
+        pendentes.clear()
+        writer.write(f"{len(dados):x}\r\n".encode("ascii") + dados + b"\r\n")
+        await writer.drain()
+
+    async def encerrar():
+        if pendentes:
+            await enviar()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    numero = 0
+    try:
+        async for linha in _linhas_corpo(reader, cabecalhos):
+            numero += 1
+            try:
+                resultado = calcular_json(_json_linha(linha), detalhar_padrao=False)
+            except ErroRequisicao as erro:
+                resultado = {"linha": numero, "erro": erro.mensagem}
+            except Exception as erro:
+                registro_metricas.contar("diarias_http_erros_internos_total", rota="/lote")
+                resultado = {"linha": numero, "erro": f"erro interno: {erro}"}
+            pendentes.append(json.dumps(resultado, ensure_ascii=False) + "\n")
+            if len(pendentes) >= LINHAS_POR_ENVIO:
+                await enviar()
+    except ErroRequisicao as erro:
+        # O cabeçalho 200 já foi enviado: o erro vai como última linha
+        pendentes.append(json.dumps({"erro": erro.mensagem}, ensure_ascii=False) + "\n")
+        await encerrar()
+        raise _LoteInterrompido from erro
+    await encerrar()
+
+
+async def _responder_texto(writer, texto, manter_conexao):
+    corpo = texto.encode("utf-8")
+    writer.write(
+        _cabecalho_resposta(
+            HTTPStatus.OK, "text/plain; version=0.0.4; charset=utf-8", manter_conexao, (f"Content-Length: {len(corpo)}",)
+        )
+        + corpo
+    )
+    await writer.drain()
+
+
+async def _despachar(metodo, caminho, cabecalhos, reader, writer, manter_conexao):
+    if caminho == "/saude" and metodo == "GET":
+        await _responder(writer, HTTPStatus.OK, {"status": "ok"}, manter_conexao)
+    elif caminho == "/calcular" and metodo == "POST":
+        corpo = await _ler_corpo(reader, cabecalhos)
+        try:
+            dados = json.loads(corpo)
+        except ValueError:
+            raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "JSON inválido") from None
+        await _responder(writer, HTTPStatus.OK, calcular_json(dados), manter_conexao)
+    elif caminho == "/lote" and metodo == "POST":
+        await _responder_lote(reader, writer, cabecalhos, manter_conexao)
+    elif caminho == "/metricas" and metodo == "GET":
+        await _responder_texto(writer, registro_metricas.exportar_prometheus(), manter_conexao)
+    elif caminho in ROTAS:
+        raise ErroRequisicao(HTTPStatus.METHOD_NOT_ALLOWED, "método não permitido")
+    else:
+        raise ErroRequisicao(HTTPStatus.NOT_FOUND, "rota não encontrada")
+
+
+class ServicoDiarias:
+    """Servidor HTTP com limite de requisições simultâneas"""
+
+    def __init__(self, max_requisicoes=MAX_REQUISICOES_PADRAO):
+        self.max_requisicoes = max_requisicoes
+        self._limite = None
+
+    async def atender(self, reader, writer):
+        """Atende uma conexão, processando requisições em sequência (keep-alive)"""
+        try:
+            while True:
+                try:
+                    requisicao = await _ler_cabecalho(reader)
+                except ErroRequisicao as erro:
+                    await _responder(writer, erro.status, {"erro": erro.mensagem}, False)
+                    break
+                if requisicao is None:
+                    break
+                metodo, caminho, versao, cabecalhos = requisicao
+                manter_conexao = cabecalhos.get("connection", "").lower() != "close" and versao == "HTTP/1.1"
+
+                if self._limite.locked():
+                    await _descartar_corpo(reader, cabecalhos)
+                    await _responder(
+                        writer, HTTPStatus.SERVICE_UNAVAILABLE, {"erro": "servidor ocupado"},
+                        manter_conexao, ("Retry-After: 1",),
+                    )
+                    continue
+
+                rota = caminho if caminho in ROTAS else "outras"
+                registro_metricas.contar("diarias_http_requisicoes_total", rota=rota)
+                async with self._limite:
+                    try:
+                        with registro_metricas.medir(f"http_{rota.strip('/')}"):
+                            await _despachar(metodo, caminho, cabecalhos, reader, writer, manter_conexao)
+                    except ErroRequisicao as erro:
+                        # O restante do corpo pode não ter sido lido: encerrar a conexão
+                        await _responder(writer, erro.status, {"erro": erro.mensagem}, False)
+                        break
+                    except _LoteInterrompido:
+                        # Resposta já encerrada com a linha de erro
+                        break
+                    except (ConnectionError, asyncio.IncompleteReadError):
+                        raise
+                    except Exception:
+                        traceback.print_exc()
+                        registro_metricas.contar("diarias_http_erros_internos_total", rota=rota)
+                        await _responder(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": "erro interno"}, False)
+                        break
+                if not manter_conexao:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def iniciar(self, host="127.0.0.1", porta=8080):
+        """Inicia o servidor e devolve o `asyncio.Server` correspondente"""
+        self._limite = asyncio.Semaphore(self.max_requisicoes)
+        return await asyncio.start_server(self.atender, host, porta, limit=TAMANHO_MAXIMO_CABECALHO)
+
+
+async def _servir(host, porta, max_requisicoes):
+    servidor = await ServicoDiarias(max_requisicoes).iniciar(host, porta)
+    enderecos = ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in servidor.sockets)
+    print(f"Serviço de diárias em {enderecos}", flush=True)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m diarias.servico", description="Serviço HTTP de cálculo de diárias.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument(
+        "--max-requisicoes",
+        type=int,
+        default=MAX_REQUISICOES_PADRAO,
+        help=f"requisições atendidas simultaneamente (padrão: {MAX_REQUISICOES_PADRAO})",
+    )
+    parser.add_argument("--metricas", action="store_true", help="ligar a instrumentação exposta em /metricas")
+    args = parser.parse_args(argv)
+    if args.metricas:
+        registro_metricas.ativar()
+    try:
+        asyncio.run(_servir(args.host, args.porta, args.max_requisicoes))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,77 @@
+"""Simulação de custos por horário de saída e de retorno.
+
+Para um destino, uma data de saída e as gratuidades, calcula em uma única
+passagem vetorizada (`calcular_lote`) o total de todas as combinações de
+quarto de hora de saída e de retorno, com retorno de 0 até `dias_maximos`
+dias após a saída. O resultado mostra onde os limites de 6h e 8h e o marco
+temporal tornam a viagem mais barata.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .grade import QUARTOS_POR_DIA
+from .lote import calcular_lote
+
+# Rótulo "HH:MM" de cada quarto de hora do dia
+HORARIOS = np.array([f"{quarto // 4:02d}:{quarto % 4 * 15:02d}" for quarto in range(QUARTOS_POR_DIA)], dtype=object)
+
+_QUINZE_MINUTOS = np.timedelta64(15, "m")
+_UM_DIA = np.timedelta64(1, "D")
+
+
+def simular_custos(destino, data_saida, dias_maximos=0, alimentacao_gratuita=False, hospedagem_gratuita=False):
+    """Total de cada combinação de horário de saída e de retorno
+
+    Devolve um DataFrame com uma linha por combinação em que o retorno é
+    posterior à saída: `dias` (dias entre a data de saída e a de retorno),
+    `hora_saida` e `hora_retorno` ("HH:MM"), `total_centavos` e
+    `tipo_calculado`.
+    """
+    if dias_maximos < 0:
+        raise ValueError("dias_maximos não pode ser negativo")
+    dias, quarto_saida, quarto_retorno = (
+        eixo.ravel()
+        for eixo in np.meshgrid(
+            np.arange(dias_maximos + 1), np.arange(QUARTOS_POR_DIA), np.arange(QUARTOS_POR_DIA), indexing="ij"
+        )
+    )
+    inicio = np.datetime64(datetime.combine(data_saida, datetime.min.time()), "m")
+    saida = inicio + quarto_saida * _QUINZE_MINUTOS
+    retorno = inicio + dias * _UM_DIA + quarto_retorno * _QUINZE_MINUTOS
+    validas = retorno > saida
+    quantidade = int(validas.sum())
+
+    resultado = calcular_lote(
+        np.full(quantidade, destino, dtype=object),
+        saida[validas],
+        retorno[validas],
+        np.full(quantidade, bool(alimentacao_gratuita)),
+        np.full(quantidade, bool(hospedagem_gratuita)),
+    )
+    return pd.DataFrame(
+        {
+            "dias": dias[validas],
+            "hora_saida": HORARIOS[quarto_saida[validas]],
+            "hora_retorno": HORARIOS[quarto_retorno[validas]],
+            "total_centavos": resultado["total_centavos"].to_numpy(),
+            "tipo_calculado": resultado["tipo_calculado"].to_numpy(),
+        }
+    )
+
+
+def matriz_custos(custos, dias=0):
+    """Matriz de `total_centavos` (linhas: hora de saída, colunas: hora de retorno) para um valor de `dias`
+
+    Combinações inexistentes (retorno antes da saída) ficam como NaN.
+    """
+    selecao = custos[custos["dias"] == dias]
+    return selecao.pivot(index="hora_saida", columns="hora_retorno", values="total_centavos").reindex(
+        index=HORARIOS, columns=HORARIOS
+    )
+
+
+def resumo_por_dias(custos):
+    """Menor e maior total (centavos) por número de dias entre saída e retorno"""
+    return custos.groupby("dias")["total_centavos"].agg(["min", "max"])
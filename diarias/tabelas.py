@@ -0,0 +1,110 @@
+"""Tabelas de valores de diárias com vigência, carregadas de arquivo de dados.
+
+Cada tabela tem um intervalo de vigência (primeiro e último dia, inclusive;
+`null` no arquivo significa sem limite) e os valores por destino, em
+centavos. As tabelas devem ser contíguas: cada uma começa no dia seguinte ao
+fim da anterior. O índice guarda os inícios ordenados e localiza a tabela de
+uma data por busca binária, sem percorrer a lista.
+
+O arquivo padrão é `diarias/dados/tabelas_valores.json`; outro arquivo pode
+ser indicado pela variável de ambiente DIARIAS_TABELAS. Para recalcular
+viagens antigas, acrescente as tabelas anteriores com seus intervalos.
+"""
+import json
+import os
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Optional
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados", "tabelas_valores.json")
+
+CAMPOS_VALORES = ("alimentacao", "pousada", "total")
+
+
+@dataclass(frozen=True, eq=False)
+class TabelaValores:
+    """Valores de diárias (centavos por destino) de uma norma e sua vigência"""
+    norma: str
+    inicio: Optional[date]
+    fim: Optional[date]
+    valores: Dict[str, Dict[str, int]]
+
+
+class IndiceTabelas:
+    """Tabelas ordenadas por início de vigência, com busca binária por data"""
+
+    def __init__(self, tabelas):
+        tabelas = sorted(tabelas, key=lambda tabela: tabela.inicio or date.min)
+        if not tabelas:
+            raise ValueError("Nenhuma tabela de valores informada")
+        destinos = set(tabelas[-1].valores)
+        for anterior, seguinte in zip(tabelas, tabelas[1:]):
+            if anterior.fim is None or seguinte.inicio is None or anterior.fim + timedelta(days=1) != seguinte.inicio:
+                raise ValueError(
+                    f"Vigências de '{anterior.norma}' e '{seguinte.norma}' devem ser contíguas e sem sobreposição"
+                )
+        for tabela in tabelas:
+            if set(tabela.valores) != destinos:
+                raise ValueError(f"A tabela '{tabela.norma}' deve ter os destinos {sorted(destinos)}")
+        self.tabelas = tuple(tabelas)
+        # Limites em ordinais de data (date.toordinal), inclusive
+        self.inicios = [(tabela.inicio or date.min).toordinal() for tabela in tabelas]
+        self.fins = [(tabela.fim or date.max).toordinal() for tabela in tabelas]
+
+    @property
+    def vigente(self):
+        """Tabela mais recente"""
+        return self.tabelas[-1]
+
+    def posicao(self, data):
+        """Posição em `tabelas` da tabela vigente em `data`"""
+        ordinal = data.toordinal()
+        posicao = bisect_right(self.inicios, ordinal) - 1
+        if posicao < 0 or ordinal > self.fins[posicao]:
+            raise LookupError(f"Nenhuma tabela de valores vigente em {data.strftime('%d/%m/%Y')}")
+        return posicao
+
+    def tabela_em(self, data):
+        """Tabela vigente em `data`"""
+        return self.tabelas[self.posicao(data)]
+
+    def segmentos(self, data_inicio, dias):
+        """Divide `dias` dias consecutivos a partir de `data_inicio` por tabela vigente
+
+        Gera pares (tabela, quantidade_de_dias); o custo depende do número de
+        mudanças de tabela no intervalo, e não do número de dias.
+        """
+        ordinal = data_inicio.toordinal()
+        while dias > 0:
+            posicao = self.posicao(date.fromordinal(ordinal))
+            quantidade = min(dias, self.fins[posicao] - ordinal + 1)
+            yield self.tabelas[posicao], quantidade
+            ordinal += quantidade
+            dias -= quantidade
+
+
+def _data(valor):
+    return date.fromisoformat(valor) if valor else None
+
+
+def carregar_tabelas(caminho=None):
+    """Lê o arquivo de tabelas (JSON) e devolve um `IndiceTabelas`"""
+    caminho = caminho or os.environ.get("DIARIAS_TABELAS") or CAMINHO_PADRAO
+    with open(caminho, encoding="utf-8") as arquivo:
+        dados = json.load(arquivo)
+    tabelas = []
+    for item in dados["tabelas"]:
+        valores = {
+            destino: {campo: int(valores_destino[campo]) for campo in CAMPOS_VALORES}
+            for destino, valores_destino in item["valores"].items()
+        }
+        tabelas.append(TabelaValores(item["norma"], _data(item.get("inicio")), _data(item.get("fim")), valores))
+    return IndiceTabelas(tabelas)
+
+
+@lru_cache(maxsize=None)
+def indice_tabelas():
+    """Índice de tabelas padrão do processo, carregado na primeira chamada"""
+    return carregar_tabelas()
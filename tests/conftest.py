@@ -0,0 +1,112 @@
+"""Viagens aleatórias, cálculo de referência dia a dia e tabelas de valores de teste."""
+import json
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from diarias import VALORES_DIARIAS  # noqa: E402
+from diarias import lote  # noqa: E402
+from diarias.tabelas import indice_tabelas  # noqa: E402
+
+DESTINOS = list(VALORES_DIARIAS)
+
+# Início das viagens de teste: cobre as três vigências de `tabelas_multiplas`
+INICIO_VIAGENS = datetime(2024, 3, 1)
+
+
+def viagens_aleatorias(quantidade, semente, inicio=INICIO_VIAGENS, dias=40, quartos_de_hora=False):
+    """Lista de (destino, saida, retorno, alimentacao_gratuita, hospedagem_gratuita)
+
+    As durações cobrem todas as classes: até 6h, 6 a 8h, mais de 8h no mesmo
+    dia, pernoites curtos e longos. Sem `quartos_de_hora`, parte dos horários
+    tem minutos e segundos quaisquer.
+    """
+    gerador = random.Random(semente)
+    viagens = []
+    for _ in range(quantidade):
+        if quartos_de_hora or gerador.random() < 0.7:
+            saida = inicio + timedelta(minutes=15 * gerador.randrange(96 * dias))
+            duracao = timedelta(minutes=15 * gerador.choice([
+                gerador.randrange(1, 4 * 10),
+                gerador.randrange(1, 96 * 3),
+                gerador.randrange(1, 96 * 60),
+            ]))
+        else:
+            saida = inicio + timedelta(seconds=gerador.randrange(86400 * dias))
+            duracao = timedelta(seconds=gerador.randrange(1, 86400 * gerador.choice([1, 3, 60])))
+        viagens.append((
+            gerador.choice(DESTINOS),
+            saida,
+            saida + duracao,
+            gerador.random() < 0.3,
+            gerador.random() < 0.3,
+        ))
+    return viagens
+
+
+def total_referencia(destino, saida, retorno, alimentacao_gratuita, hospedagem_gratuita):
+    """Total (centavos) pelas regras aplicadas dia a dia, sem os atalhos do motor"""
+    tabelas = indice_tabelas()
+    total_horas = (retorno - saida).total_seconds() / 3600
+    dias = (retorno.date() - saida.date()).days
+    alimentacao_saida = tabelas.tabela_em(saida.date()).valores[destino]["alimentacao"]
+    if total_horas <= 6:
+        return 0
+    if total_horas <= 8:
+        return 0 if alimentacao_gratuita else alimentacao_saida // 2
+    if dias == 0:
+        return 0 if alimentacao_gratuita else alimentacao_saida
+    total = 0
+    for dia in range(dias):
+        valores = tabelas.tabela_em(saida.date() + timedelta(days=dia)).valores[destino]
+        if not alimentacao_gratuita and not hospedagem_gratuita:
+            total += valores["total"]
+        else:
+            total += (0 if alimentacao_gratuita else valores["alimentacao"]) + (
+                0 if hospedagem_gratuita else valores["pousada"]
+            )
+    horas_ultimo_dia = (retorno - datetime.combine(retorno.date(), saida.time())).total_seconds() / 3600
+    if horas_ultimo_dia <= 6 or alimentacao_gratuita:
+        return total
+    alimentacao = tabelas.tabela_em(retorno.date()).valores[destino]["alimentacao"]
+    return total + (alimentacao // 2 if horas_ultimo_dia <= 8 else alimentacao)
+
+
+def _limpar_caches():
+    indice_tabelas.cache_clear()
+    lote._tabela_valores.cache_clear()
+    lote._vigencias.cache_clear()
+
+
+@pytest.fixture
+def tabelas_multiplas(tmp_path, monkeypatch):
+    """Três tabelas contíguas (até 14/03/2024, 15 a 20/03/2024 e a vigente) no índice padrão"""
+    vigente = indice_tabelas().vigente
+
+    def valores_escalados(fator):
+        return {
+            destino: {campo: valor * fator // 100 for campo, valor in valores.items()}
+            for destino, valores in vigente.valores.items()
+        }
+
+    dados = {
+        "tabelas": [
+            {"norma": "Antiga", "inicio": None, "fim": "2024-03-14", "valores": valores_escalados(80)},
+            {"norma": "Intermediária", "inicio": "2024-03-15", "fim": "2024-03-20", "valores": valores_escalados(93)},
+            {"norma": vigente.norma, "inicio": "2024-03-21", "fim": None, "valores": vigente.valores},
+        ]
+    }
+    caminho = tmp_path / "tabelas.json"
+    caminho.write_text(json.dumps(dados), encoding="utf-8")
+    monkeypatch.setenv("DIARIAS_TABELAS", str(caminho))
+    _limpar_caches()
+    assert indice_tabelas().tabela_em(date(2024, 3, 1)).norma == "Antiga"
+    yield indice_tabelas()
+    monkeypatch.undo()
+    _limpar_caches()
@@ -0,0 +1,78 @@
+"""Agregação incremental: totais por dimensão e edições concorrentes."""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import viagens_aleatorias
+from diarias import calcular_diaria
+from diarias.agregacao import DIMENSOES, AgregadorDiarias, Viagem, _chaves
+
+SERVIDORES = ["ana", "bruno", "carla"]
+CENTROS_CUSTO = ["CC1", "CC2"]
+
+
+def _viagens(quantidade, semente):
+    gerador = random.Random(semente)
+    return [
+        Viagem(numero, gerador.choice(SERVIDORES), gerador.choice(CENTROS_CUSTO), *dados)
+        for numero, dados in enumerate(viagens_aleatorias(quantidade, semente))
+    ]
+
+
+def _conferir_totais(agregador, ids):
+    """Totais mantidos pelo agregador iguais aos recalculados do zero"""
+    esperados = {dimensao: {} for dimensao in DIMENSOES}
+    total_geral = 0
+    for id_viagem in ids:
+        viagem, total_centavos = agregador.viagem(id_viagem)
+        assert total_centavos == calcular_diaria(*viagem[3:], detalhar=False).total_centavos, viagem
+        total_geral += total_centavos
+        for dimensao, chave in zip(DIMENSOES, _chaves(viagem)):
+            soma, quantidade = esperados[dimensao].get(chave, (0, 0))
+            esperados[dimensao][chave] = (soma + total_centavos, quantidade + 1)
+    for dimensao in DIMENSOES:
+        assert {chave: tuple(total) for chave, total in agregador.totais(dimensao).items()} == esperados[dimensao]
+    assert agregador.total_centavos == total_geral
+
+
+def test_incluir_editar_cancelar():
+    viagens = _viagens(300, semente=50)
+    agregador = AgregadorDiarias(viagens)
+    gerador = random.Random(51)
+    novas = viagens_aleatorias(100, semente=52)
+    for viagem in gerador.sample(viagens, 100):
+        _, saida, retorno, _, hospedagem_gratuita = novas.pop()
+        agregador.editar(viagem.id_viagem, saida=saida, retorno=retorno, hospedagem_gratuita=hospedagem_gratuita)
+    canceladas = {viagem.id_viagem for viagem in gerador.sample(viagens, 50)}
+    for id_viagem in canceladas:
+        agregador.cancelar(id_viagem)
+    assert len(agregador) == 250
+    _conferir_totais(agregador, [viagem.id_viagem for viagem in viagens if viagem.id_viagem not in canceladas])
+
+
+def test_edicoes_concorrentes_nao_se_perdem():
+    viagens = _viagens(20, semente=53)
+    agregador = AgregadorDiarias(viagens)
+    calcular = agregador._calcular
+
+    def calcular_devagar(viagem):
+        # Alarga a janela entre a leitura e a gravação da viagem
+        time.sleep(0.001)
+        return calcular(viagem)
+
+    agregador._calcular = calcular_devagar
+    barreira = threading.Barrier(2)
+
+    def editar(campo, valor):
+        barreira.wait()
+        for viagem in viagens:
+            agregador.editar(viagem.id_viagem, **{campo: valor})
+
+    with ThreadPoolExecutor(2) as executor:
+        list(executor.map(editar, ["servidor", "centro_custo"], ["daniel", "CC9"]))
+    for viagem in viagens:
+        atual, _ = agregador.viagem(viagem.id_viagem)
+        assert (atual.servidor, atual.centro_custo) == ("daniel", "CC9")
+    _conferir_totais(agregador, [viagem.id_viagem for viagem in viagens])
+    assert agregador.total("servidor", "daniel").viagens == len(viagens)
@@ -0,0 +1,91 @@
+"""Armazém de resultados: gravação, leitura mapeada e consultas pelos índices."""
+import os
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import DESTINOS, viagens_aleatorias
+from diarias import calcular_diaria
+from diarias.armazem import ArmazemResultados, gravar_armazem
+from diarias.itinerario import Trecho, calcular_itinerario
+
+
+def _registros(quantidade, semente):
+    """(id_viagem, servidor, saida, retorno, resultado) com textos não ASCII, itinerários e sem detalhamento"""
+    gerador = random.Random(semente)
+    registros = []
+    for numero, (destino, saida, retorno, alimentacao, hospedagem) in enumerate(viagens_aleatorias(quantidade, semente)):
+        if gerador.random() < 0.2 and retorno - saida > timedelta(days=2):
+            trechos = [Trecho(destino, saida), Trecho(gerador.choice(DESTINOS), saida + (retorno - saida) / 2)]
+            resultado = calcular_itinerario(trechos, retorno, alimentacao, hospedagem)
+        else:
+            resultado = calcular_diaria(destino, saida, retorno, alimentacao, hospedagem, detalhar=gerador.random() < 0.9)
+        id_viagem = f"{numero:06d}" if numero % 7 else f"ç{numero}"
+        registros.append((id_viagem, f"servidor {gerador.randrange(20)}", saida, retorno, resultado))
+    return registros
+
+
+@pytest.fixture(scope="module")
+def armazem(tmp_path_factory):
+    registros = _registros(2000, semente=100)
+    caminho = tmp_path_factory.mktemp("armazem") / "resultados.bin"
+    assert gravar_armazem(str(caminho), registros) == len(registros)
+    with ArmazemResultados(str(caminho)) as aberto:
+        yield aberto, registros, caminho
+
+
+def test_registros_iguais_aos_gravados(armazem):
+    aberto, registros, _ = armazem
+    assert len(aberto) == len(registros)
+    for lido, (id_viagem, servidor, saida, retorno, resultado) in zip(aberto.registros(), registros):
+        assert (lido.id_viagem, lido.servidor, lido.saida, lido.retorno) == (id_viagem, servidor, saida, retorno)
+        assert (lido.total_centavos, lido.tipo_calculado, lido.horas_ultimo_dia) == (
+            resultado.total_centavos, resultado.tipo_calculado, resultado.horas_ultimo_dia
+        )
+        assert lido.partes == resultado.partes
+        assert lido.detalhamento == resultado.detalhamento
+
+
+def test_detalhamento_compacto(armazem):
+    # Partes compactas: uma viagem de vários dias não grava uma linha de texto por dia
+    _, registros, caminho = armazem
+    linhas = sum(len(resultado.detalhamento) for *_, resultado in registros)
+    assert os.path.getsize(caminho) < 40 * linhas
+
+
+def test_buscar_viagem(armazem):
+    aberto, registros, _ = armazem
+    for id_viagem, *_ in random.Random(101).sample(registros, 300):
+        assert aberto.buscar_viagem(id_viagem).id_viagem == id_viagem
+    assert aberto.buscar_viagem("inexistente") is None
+    assert aberto.buscar_viagem("") is None
+
+
+def test_por_servidor_e_por_periodo(armazem):
+    aberto, registros, _ = armazem
+    inicio, fim = datetime(2024, 3, 10), datetime(2024, 3, 25)
+    for servidor in ["servidor 3", "servidor 17"]:
+        esperado = sorted((saida, id_viagem) for id_viagem, nome, saida, *_ in registros if nome == servidor)
+        assert [(lido.saida, lido.id_viagem) for lido in aberto.por_servidor(servidor)] == esperado
+        assert [(lido.saida, lido.id_viagem) for lido in aberto.por_servidor(servidor, inicio, fim)] == [
+            (saida, id_viagem) for saida, id_viagem in esperado if inicio <= saida < fim
+        ]
+    assert list(aberto.por_servidor("ninguém")) == []
+    assert [lido.saida for lido in aberto.por_periodo(inicio, fim)] == sorted(
+        saida for _, _, saida, *_ in registros if inicio <= saida < fim
+    )
+
+
+def test_id_duplicado(tmp_path):
+    registros = _registros(20, semente=102)
+    with pytest.raises(ValueError):
+        gravar_armazem(str(tmp_path / "resultados.bin"), registros + [registros[5]])
+
+
+def test_armazem_vazio(tmp_path):
+    gravar_armazem(str(tmp_path / "resultados.bin"), [])
+    with ArmazemResultados(str(tmp_path / "resultados.bin")) as aberto:
+        assert len(aberto) == 0
+        assert aberto.buscar_viagem("x") is None
+        assert list(aberto.por_periodo(datetime(2024, 1, 1), datetime(2025, 1, 1))) == []
@@ -0,0 +1,70 @@
+"""Cache LRU de resultados: mesmo resultado do motor e descarte do menos usado."""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import DESTINOS, viagens_aleatorias
+from diarias import calcular_diaria
+from diarias.cache import CacheDiarias
+
+
+def _viagens_repetidas(quantidade, semente):
+    """Viagens com poucos formatos, repetidos em datas diferentes"""
+    gerador = random.Random(semente)
+    formatos = viagens_aleatorias(40, semente)
+    viagens = []
+    for _ in range(quantidade):
+        destino, saida, retorno, alimentacao, hospedagem = gerador.choice(formatos)
+        deslocamento = timedelta(days=gerador.randrange(-20, 20))
+        viagens.append((destino, saida + deslocamento, retorno + deslocamento, alimentacao, hospedagem))
+    return viagens
+
+
+@pytest.mark.parametrize("varias_tabelas", [False, True])
+def test_cache_igual_ao_motor(request, varias_tabelas):
+    if varias_tabelas:
+        request.getfixturevalue("tabelas_multiplas")
+    cache = CacheDiarias(64)
+    gerador = random.Random(90)
+    for viagem in _viagens_repetidas(3000, semente=91):
+        detalhar = gerador.random() < 0.5
+        assert cache.calcular(*viagem, detalhar=detalhar) == calcular_diaria(*viagem, detalhar=detalhar), viagem
+    info = cache.info()
+    assert info.acertos and info.acertos + info.falhas == 3000
+    assert info.tamanho_atual <= 64
+
+
+def test_detalhar_nao_compartilha_resultado(tabelas_multiplas):
+    # Viagem que atravessa uma mudança de tabela: a chave inclui a data nos dois casos
+    cache = CacheDiarias()
+    viagem = (DESTINOS[0], datetime(2024, 3, 10, 8), datetime(2024, 3, 25, 18), False, False)
+    assert cache.calcular(*viagem).partes
+    assert cache.calcular(*viagem, detalhar=False) == calcular_diaria(*viagem, detalhar=False)
+
+
+def test_descarte_lru():
+    cache = CacheDiarias(2)
+    primeira, segunda, terceira = viagens_aleatorias(3, semente=92)
+    cache.calcular(*primeira)
+    cache.calcular(*segunda)
+    cache.calcular(*primeira)
+    # A segunda é a menos usada recentemente
+    cache.calcular(*terceira)
+    cache.calcular(*primeira)
+    assert cache.info()[:2] == (2, 3)
+    cache.calcular(*segunda)
+    assert cache.info() == (2, 4, 2, 2)
+
+
+def test_resultado_devolvido_e_uma_copia():
+    cache = CacheDiarias()
+    viagem = viagens_aleatorias(1, semente=93)[0]
+    resultado = cache.calcular(*viagem)
+    resultado.total_centavos += 1
+    assert cache.calcular(*viagem) == calcular_diaria(*viagem)
+
+
+def test_tamanho_invalido():
+    with pytest.raises(ValueError):
+        CacheDiarias(0)
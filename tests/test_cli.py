@@ -0,0 +1,88 @@
+"""Processamento de arquivos de viagens pela linha de comando, em blocos."""
+import pandas as pd
+import pytest
+
+from conftest import viagens_aleatorias
+from diarias import calcular_diaria
+from diarias.cli import SEPARADOR_DETALHAMENTO, executar_lote, main
+
+COLUNAS = ["id_viagem", "destino", "saida", "retorno", "alimentacao_gratuita", "hospedagem_gratuita"]
+
+
+def arquivo_viagens(caminho, quantidade, semente):
+    """Grava viagens aleatórias em CSV ou Parquet (pela extensão) e devolve o DataFrame gravado
+
+    `id_viagem` tem zeros à esquerda e inclui "NA"; as gratuidades usam as
+    grafias aceitas pela linha de comando.
+    """
+    linhas = [
+        (f"{numero:07d}", destino, saida, retorno, "sim" if alimentacao else "não", int(hospedagem))
+        for numero, (destino, saida, retorno, alimentacao, hospedagem) in enumerate(
+            viagens_aleatorias(quantidade, semente)
+        )
+    ]
+    viagens = pd.DataFrame(linhas, columns=COLUNAS)
+    viagens.loc[1, "id_viagem"] = "NA"
+    if str(caminho).endswith(".parquet"):
+        viagens.to_parquet(caminho, index=False)
+    else:
+        viagens.to_csv(caminho, index=False)
+    return viagens
+
+
+def ler_resultado(caminho):
+    if str(caminho).endswith(".parquet"):
+        return pd.read_parquet(caminho)
+    return pd.read_csv(caminho, keep_default_na=False, dtype={"id_viagem": str})
+
+
+def conferir_resultado(resultado, viagens):
+    """Cada linha do resultado igual ao motor escalar, na ordem da entrada"""
+    assert list(resultado["id_viagem"]) == list(viagens["id_viagem"])
+    for linha, viagem in zip(resultado.itertuples(), viagens.itertuples()):
+        esperado = calcular_diaria(
+            viagem.destino, viagem.saida, viagem.retorno, viagem.alimentacao_gratuita == "sim",
+            bool(viagem.hospedagem_gratuita), detalhar=False,
+        )
+        assert (linha.total_centavos, linha.tipo_calculado) == (esperado.total_centavos, esperado.tipo_calculado)
+
+
+@pytest.mark.parametrize("entrada", ["viagens.csv", "viagens.parquet"])
+@pytest.mark.parametrize("saida", ["resultado.csv", "resultado.parquet"])
+def test_executar_lote(tmp_path, entrada, saida):
+    viagens = arquivo_viagens(tmp_path / entrada, 500, semente=70)
+    linhas = executar_lote(
+        str(tmp_path / entrada), str(tmp_path / saida), manter=["id_viagem"], tamanho_bloco=64, progresso=False
+    )
+    assert linhas == 500
+    conferir_resultado(ler_resultado(tmp_path / saida), viagens)
+
+
+def test_manter_le_colunas_como_texto(tmp_path):
+    # Ids numéricos com zeros à esquerda e "NA" não podem virar inteiros nem ausentes
+    arquivo_viagens(tmp_path / "viagens.csv", 20, semente=71)
+    executar_lote(str(tmp_path / "viagens.csv"), str(tmp_path / "resultado.parquet"), manter=["id_viagem"],
+                  tamanho_bloco=8, progresso=False)
+    ids = pd.read_parquet(tmp_path / "resultado.parquet")["id_viagem"]
+    assert ids[0] == "0000000" and ids[1] == "NA" and ids[19] == "0000019"
+
+
+def test_detalhamento(tmp_path):
+    viagens = arquivo_viagens(tmp_path / "viagens.csv", 50, semente=72)
+    assert main([
+        str(tmp_path / "viagens.csv"), str(tmp_path / "resultado.csv"),
+        "--campos", "total,detalhamento", "--manter", "id_viagem", "--silencioso",
+    ]) == 0
+    resultado = ler_resultado(tmp_path / "resultado.csv")
+    assert list(resultado.columns) == ["id_viagem", "total_centavos", "detalhamento"]
+    for linha, viagem in zip(resultado.itertuples(), viagens.itertuples()):
+        esperado = calcular_diaria(
+            viagem.destino, viagem.saida, viagem.retorno, viagem.alimentacao_gratuita == "sim",
+            bool(viagem.hospedagem_gratuita),
+        )
+        assert linha.detalhamento == SEPARADOR_DETALHAMENTO.join(esperado.detalhamento)
+
+
+def test_campo_desconhecido(tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "viagens.csv"), str(tmp_path / "resultado.csv"), "--campos", "total,valor"])
@@ -0,0 +1,139 @@
+"""Conciliação de pagamentos com as viagens recalculadas."""
+import random
+
+import pandas as pd
+import pytest
+
+from conftest import viagens_aleatorias
+from diarias import calcular_diaria
+from diarias.conciliacao import (
+    SITUACAO_DIVERGENTE,
+    SITUACAO_SEM_PAGAMENTO,
+    SITUACAO_SEM_VIAGEM,
+    SITUACAO_VIAGEM_DUPLICADA,
+    SITUACAO_VIAGEM_INVALIDA,
+    TIPOS_RELATORIO,
+    conciliar,
+)
+from diarias.lote import formatar_centavos_lote
+
+
+def _viagens(quantidade, semente):
+    """DataFrame de viagens com id_viagem de texto com zeros à esquerda, e o valor esperado de cada uma"""
+    linhas = []
+    esperados = {}
+    for numero, (destino, saida, retorno, alimentacao, hospedagem) in enumerate(viagens_aleatorias(quantidade, semente)):
+        id_viagem = f"{numero:07d}"
+        linhas.append((id_viagem, destino, saida, retorno, alimentacao, hospedagem))
+        esperados[id_viagem] = calcular_diaria(destino, saida, retorno, alimentacao, hospedagem, detalhar=False).total_centavos
+    colunas = ["id_viagem", "destino", "saida", "retorno", "alimentacao_gratuita", "hospedagem_gratuita"]
+    return pd.DataFrame(linhas, columns=colunas), esperados
+
+
+def _conciliar(tmp_path, pagamentos, viagens, formato="csv", **opcoes):
+    caminho_viagens = tmp_path / f"viagens.{formato}"
+    if formato == "csv":
+        viagens.to_csv(caminho_viagens, index=False)
+    else:
+        viagens.to_parquet(caminho_viagens, index=False)
+    pagamentos.to_csv(tmp_path / "pagamentos.csv", index=False)
+    resumo = conciliar(
+        str(tmp_path / "pagamentos.csv"), str(caminho_viagens), str(tmp_path / "relatorio.csv"),
+        progresso=False, **{"particoes": 4, "tamanho_bloco": 37, **opcoes},
+    )
+    relatorio = pd.read_csv(tmp_path / "relatorio.csv", dtype=TIPOS_RELATORIO, keep_default_na=False, na_values=[""])
+    return resumo, relatorio.set_index("id_viagem")
+
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_conciliacao(tmp_path, formato):
+    viagens, esperados = _viagens(300, semente=60)
+    # "NA" é um id válido, não um valor ausente
+    viagens.loc[0, "id_viagem"] = "NA"
+    esperados["NA"] = esperados.pop("0000000")
+    gerador = random.Random(61)
+    ids = list(esperados)
+    divergentes = set(gerador.sample(ids, 20))
+    sem_pagamento = {id_viagem for id_viagem in gerador.sample(ids, 20) if id_viagem not in divergentes and esperados[id_viagem]}
+    linhas = []
+    for id_viagem in ids:
+        if id_viagem in sem_pagamento:
+            continue
+        valor = esperados[id_viagem] + (gerador.choice([-1, 1]) * gerador.randrange(1, 5000) if id_viagem in divergentes else 0)
+        # Parte dos pagamentos vem em duas parcelas
+        if gerador.random() < 0.2:
+            linhas += [(id_viagem, valor // 2 / 100), (id_viagem, (valor - valor // 2) / 100)]
+        else:
+            linhas.append((id_viagem, valor / 100))
+    linhas.append(("9999999", 12.34))
+    gerador.shuffle(linhas)
+    pagamentos = pd.DataFrame(linhas, columns=["id_viagem", "valor_pago"])
+
+    resumo, relatorio = _conciliar(tmp_path, pagamentos, viagens, formato)
+    assert (resumo.viagens, resumo.divergentes, resumo.sem_pagamento, resumo.sem_viagem) == (
+        300, len(divergentes), len(sem_pagamento), 1
+    )
+    assert resumo.conferem == 300 - len(divergentes) - len(sem_pagamento)
+    assert set(relatorio.index[relatorio["situacao"] == SITUACAO_DIVERGENTE]) == divergentes
+    assert set(relatorio.index[relatorio["situacao"] == SITUACAO_SEM_PAGAMENTO]) == sem_pagamento
+    assert list(relatorio.index[relatorio["situacao"] == SITUACAO_SEM_VIAGEM]) == ["9999999"]
+    for id_viagem in divergentes | sem_pagamento:
+        linha = relatorio.loc[id_viagem]
+        assert linha["valor_esperado_centavos"] == esperados[id_viagem]
+        assert linha["diferenca_centavos"] == (0 if pd.isna(linha["valor_pago_centavos"]) else linha["valor_pago_centavos"]) - esperados[id_viagem]
+        assert linha["detalhamento"]
+    assert resumo.diferenca_centavos == relatorio["diferenca_centavos"].sum()
+
+
+def test_viagem_duplicada(tmp_path):
+    viagens, esperados = _viagens(50, semente=62)
+    viagens = pd.concat([viagens, viagens.iloc[[7]]], ignore_index=True)
+    pagamentos = pd.DataFrame(
+        [(id_viagem, esperados[id_viagem] / 100) for id_viagem in esperados] + [("0000007", 1.0)],
+        columns=["id_viagem", "valor_pago"],
+    )
+    resumo, relatorio = _conciliar(tmp_path, pagamentos, viagens)
+    assert (resumo.viagens_duplicadas, resumo.conferem, resumo.divergentes) == (1, 49, 0)
+    linha = relatorio.loc["0000007"]
+    assert linha["situacao"] == SITUACAO_VIAGEM_DUPLICADA
+    assert linha["valor_pago_centavos"] == esperados["0000007"] + 100
+
+
+def test_viagens_invalidas_nao_interrompem(tmp_path):
+    viagens, esperados = _viagens(50, semente=63)
+    viagens = viagens.astype({"saida": object, "retorno": object})
+    viagens.loc[3, "destino"] = "Exterior"
+    viagens.loc[4, "retorno"] = None
+    viagens.loc[5, "saida"] = "ontem"
+    pagamentos = pd.DataFrame(
+        [(id_viagem, esperados[id_viagem] / 100) for id_viagem in esperados], columns=["id_viagem", "valor_pago"]
+    )
+    resumo, relatorio = _conciliar(tmp_path, pagamentos, viagens)
+    assert (resumo.viagens_invalidas, resumo.conferem, resumo.divergentes, resumo.sem_pagamento) == (3, 47, 0, 0)
+    invalidas = relatorio[relatorio["situacao"] == SITUACAO_VIAGEM_INVALIDA]
+    assert invalidas["detalhamento"].to_dict() == {
+        "0000003": "destino desconhecido: Exterior",
+        "0000004": "data de retorno ausente ou inválida",
+        "0000005": "data de saída ausente ou inválida",
+    }
+    assert invalidas["valor_pago_centavos"].to_dict() == {
+        id_viagem: esperados[id_viagem] for id_viagem in invalidas.index
+    }
+
+
+def test_valor_pago_ausente(tmp_path):
+    viagens, esperados = _viagens(30, semente=64)
+    com_valor = [id_viagem for id_viagem in esperados if esperados[id_viagem]]
+    sem_valor = com_valor[0]
+    pagamentos = pd.DataFrame(
+        [(id_viagem, None if id_viagem == sem_valor else esperados[id_viagem] / 100) for id_viagem in esperados],
+        columns=["id_viagem", "valor_pago"],
+    )
+    resumo, relatorio = _conciliar(tmp_path, pagamentos, viagens)
+    assert (resumo.sem_pagamento, resumo.divergentes) == (1, 0)
+    linha = relatorio.loc[sem_valor]
+    assert linha["situacao"] == SITUACAO_SEM_PAGAMENTO
+    assert pd.isna(linha["valor_pago_centavos"])
+    assert linha["diferenca_centavos"] == -esperados[sem_valor]
+    # As colunas Int64 do relatório podem ser formatadas diretamente
+    assert list(formatar_centavos_lote(relatorio["valor_pago_centavos"])) == [""]
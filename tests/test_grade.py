@@ -0,0 +1,37 @@
+"""Consultas à grade de 15 minutos comparadas ao motor exato."""
+import random
+
+import pytest
+
+from conftest import DESTINOS, viagens_aleatorias
+from diarias import calcular_diaria
+from diarias.grade import GradeDiarias
+
+# Cada quadro custa alguns milhares de cálculos: um destino e duas combinações de gratuidades
+DESTINO = DESTINOS[1]
+GRATUIDADES = [(False, False), (True, False)]
+
+
+def _conferir(semente):
+    grade = GradeDiarias()
+    gerador = random.Random(semente)
+    viagens = viagens_aleatorias(2000, semente, quartos_de_hora=True) + viagens_aleatorias(500, semente + 1)
+    for _, saida, retorno, _, _ in viagens:
+        alimentacao_gratuita, hospedagem_gratuita = gerador.choice(GRATUIDADES)
+        consulta = grade.consultar(DESTINO, saida, retorno, alimentacao_gratuita, hospedagem_gratuita)
+        esperado = calcular_diaria(DESTINO, saida, retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=False)
+        assert (consulta.total_centavos, consulta.tipo_calculado) == (
+            esperado.total_centavos, esperado.tipo_calculado
+        ), (saida, retorno)
+        if esperado.horas_ultimo_dia is None:
+            assert consulta.horas_ultimo_dia is None, (saida, retorno)
+        else:
+            assert consulta.horas_ultimo_dia == pytest.approx(esperado.horas_ultimo_dia), (saida, retorno)
+
+
+def test_grade_igual_ao_motor():
+    _conferir(30)
+
+
+def test_grade_igual_ao_motor_com_varias_tabelas(tabelas_multiplas):
+    _conferir(31)
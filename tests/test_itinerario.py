@@ -0,0 +1,118 @@
+"""Itinerários com vários destinos: motor escalar, referência por período e lote."""
+import math
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from conftest import DESTINOS, INICIO_VIAGENS
+from diarias import calcular_diaria
+from diarias.calculo import diaria_ultimo_dia, valor_periodo_completo
+from diarias.itinerario import Trecho, calcular_itinerario
+from diarias.lote import calcular_itinerarios_lote
+from diarias.tabelas import indice_tabelas
+
+
+def itinerarios_aleatorios(quantidade, semente):
+    """Lista de (trechos, retorno, alimentacao_gratuita, hospedagem_gratuita) com 1 a 4 trechos"""
+    gerador = random.Random(semente)
+    itinerarios = []
+    for _ in range(quantidade):
+        saida = INICIO_VIAGENS + timedelta(minutes=gerador.choice([15, 7]) * gerador.randrange(96 * 30))
+        retorno = saida + timedelta(minutes=15 * gerador.randrange(1, 96 * 10))
+        minutos = int((retorno - saida).total_seconds() // 60)
+        chegadas = []
+        if minutos > 2:
+            chegadas = sorted(
+                {saida + timedelta(minutes=gerador.randrange(1, minutos)) for _ in range(gerador.randrange(4))}
+            )
+        trechos = [Trecho(gerador.choice(DESTINOS), inicio) for inicio in [saida] + chegadas]
+        itinerarios.append((trechos, retorno, gerador.random() < 0.3, gerador.random() < 0.3))
+    return itinerarios
+
+
+def total_referencia(trechos, retorno, alimentacao_gratuita, hospedagem_gratuita):
+    """Total (centavos) procurando, para cada período de 24h, o trecho em vigor no seu fim"""
+    tabelas = indice_tabelas()
+    saida = trechos[0].inicio
+    dias = (retorno.date() - saida.date()).days
+    if (retorno - saida).total_seconds() <= 8 * 3600 or dias == 0:
+        return calcular_diaria(
+            trechos[-1].destino, saida, retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=False
+        ).total_centavos
+    total = 0
+    for dia in range(dias):
+        fim_periodo = datetime.combine(saida.date() + timedelta(days=dia + 1), saida.time())
+        trecho = [trecho for trecho in trechos if trecho.inicio < fim_periodo][-1]
+        valores = tabelas.tabela_em(saida.date() + timedelta(days=dia)).valores[trecho.destino]
+        total += valor_periodo_completo(valores, alimentacao_gratuita, hospedagem_gratuita)
+    horas_ultimo_dia = (retorno - datetime.combine(retorno.date(), saida.time())).total_seconds() / 3600
+    alimentacao = tabelas.tabela_em(retorno.date()).valores[trechos[-1].destino]["alimentacao"]
+    return total + diaria_ultimo_dia(horas_ultimo_dia, alimentacao, alimentacao_gratuita)[0]
+
+
+def _conferir(itinerarios):
+    for trechos, retorno, alimentacao_gratuita, hospedagem_gratuita in itinerarios:
+        resultado = calcular_itinerario(trechos, retorno, alimentacao_gratuita, hospedagem_gratuita)
+        assert resultado.total_centavos == total_referencia(
+            trechos, retorno, alimentacao_gratuita, hospedagem_gratuita
+        ), trechos
+        if len(trechos) == 1:
+            assert resultado == calcular_diaria(
+                trechos[0].destino, trechos[0].inicio, retorno, alimentacao_gratuita, hospedagem_gratuita
+            )
+
+    linhas = [
+        (numero, trecho.destino, trecho.inicio)
+        for numero, (trechos, _, _, _) in enumerate(itinerarios)
+        for trecho in trechos
+    ]
+    random.Random(0).shuffle(linhas)
+    viagens = pd.DataFrame(
+        [(numero, *dados) for numero, (_, *dados) in enumerate(itinerarios)],
+        columns=["id", "retorno", "alimentacao_gratuita", "hospedagem_gratuita"],
+    ).set_index("id")
+    lote = calcular_itinerarios_lote(pd.DataFrame(linhas, columns=["id_itinerario", "destino", "inicio"]), viagens)
+    for numero, (trechos, retorno, alimentacao_gratuita, hospedagem_gratuita) in enumerate(itinerarios):
+        esperado = calcular_itinerario(trechos, retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=False)
+        linha = lote.loc[numero]
+        assert (linha["total_centavos"], linha["tipo_calculado"]) == (
+            esperado.total_centavos, esperado.tipo_calculado
+        ), trechos
+        if esperado.horas_ultimo_dia is None:
+            assert math.isnan(linha["horas_ultimo_dia"]), trechos
+        else:
+            assert linha["horas_ultimo_dia"] == pytest.approx(esperado.horas_ultimo_dia), trechos
+
+
+def test_itinerarios():
+    _conferir(itinerarios_aleatorios(3000, semente=20))
+
+
+def test_itinerarios_com_varias_tabelas(tabelas_multiplas):
+    _conferir(itinerarios_aleatorios(3000, semente=21))
+
+
+def test_lote_rejeita_itinerario_sem_viagem():
+    trechos = pd.DataFrame(
+        [(1, DESTINOS[0], INICIO_VIAGENS)], columns=["id_itinerario", "destino", "inicio"]
+    )
+    viagens = pd.DataFrame(
+        [(2, INICIO_VIAGENS + timedelta(days=1), False, False)],
+        columns=["id", "retorno", "alimentacao_gratuita", "hospedagem_gratuita"],
+    ).set_index("id")
+    with pytest.raises(KeyError):
+        calcular_itinerarios_lote(trechos, viagens)
+
+
+def test_lote_rejeita_inicio_ausente():
+    trechos = pd.DataFrame(
+        [(1, DESTINOS[0], INICIO_VIAGENS), (1, DESTINOS[1], pd.NaT)], columns=["id_itinerario", "destino", "inicio"]
+    )
+    viagens = pd.DataFrame(
+        [(1, INICIO_VIAGENS + timedelta(days=1), False, False)],
+        columns=["id", "retorno", "alimentacao_gratuita", "hospedagem_gratuita"],
+    ).set_index("id")
+    with pytest.raises(ValueError, match="Início de trecho ausente na posição 1"):
+        calcular_itinerarios_lote(trechos, viagens)
@@ -0,0 +1,192 @@
+"""Cálculo em lote (`diarias.lote`, `diarias.registros`) comparado ao motor escalar."""
+import math
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DESTINOS, total_referencia, viagens_aleatorias
+from diarias import calcular_diaria, format_currency, formatar_centavos, formatar_duracao
+from diarias.lote import calcular_lote, formatar_centavos_lote, formatar_duracao_lote, formatar_moeda_lote
+from diarias.registros import (
+    DTYPE_VIAGEM,
+    ViagemCompacta,
+    calcular_registro,
+    calcular_registros,
+    empacotar_viagens,
+    resultados_para_dataframe,
+    viagens_de_dataframe,
+    viagens_para_dataframe,
+)
+
+
+def _colunas(viagens):
+    return pd.DataFrame(
+        viagens, columns=["destino", "saida", "retorno", "alimentacao_gratuita", "hospedagem_gratuita"]
+    )
+
+
+def _conferir_lote(viagens):
+    colunas = _colunas(viagens)
+    resultado = calcular_lote(
+        colunas["destino"], colunas["saida"], colunas["retorno"],
+        colunas["alimentacao_gratuita"], colunas["hospedagem_gratuita"],
+    )
+    for viagem, total, tipo, horas in zip(
+        viagens, resultado["total_centavos"], resultado["tipo_calculado"], resultado["horas_ultimo_dia"]
+    ):
+        esperado = calcular_diaria(*viagem, detalhar=False)
+        assert (total, tipo) == (esperado.total_centavos, esperado.tipo_calculado), viagem
+        if esperado.horas_ultimo_dia is None:
+            assert math.isnan(horas), viagem
+        else:
+            assert horas == pytest.approx(esperado.horas_ultimo_dia), viagem
+
+
+def test_motor_igual_a_referencia_diaria():
+    for viagem in viagens_aleatorias(5000, semente=1):
+        assert calcular_diaria(*viagem, detalhar=False).total_centavos == total_referencia(*viagem), viagem
+
+
+def test_motor_igual_a_referencia_com_varias_tabelas(tabelas_multiplas):
+    for viagem in viagens_aleatorias(5000, semente=2):
+        assert calcular_diaria(*viagem, detalhar=False).total_centavos == total_referencia(*viagem), viagem
+
+
+def test_detalhamento_soma_o_total(tabelas_multiplas):
+    for viagem in viagens_aleatorias(1000, semente=3):
+        resultado = calcular_diaria(*viagem)
+        assert sum(item.valor_centavos for item in resultado.itens()) == resultado.total_centavos, viagem
+
+
+def test_lote_igual_ao_motor():
+    _conferir_lote(viagens_aleatorias(10000, semente=4))
+
+
+def test_lote_igual_ao_motor_com_varias_tabelas(tabelas_multiplas):
+    _conferir_lote(viagens_aleatorias(10000, semente=5))
+
+
+def test_lote_preserva_indice():
+    colunas = _colunas(viagens_aleatorias(10, semente=6)).set_axis(range(100, 110))
+    resultado = calcular_lote(
+        colunas["destino"], colunas["saida"], colunas["retorno"],
+        colunas["alimentacao_gratuita"], colunas["hospedagem_gratuita"],
+    )
+    assert list(resultado.index) == list(range(100, 110))
+
+
+@pytest.mark.parametrize("varias_tabelas", [False, True])
+def test_registros_iguais_ao_motor(request, varias_tabelas):
+    if varias_tabelas:
+        request.getfixturevalue("tabelas_multiplas")
+    # Registros guardam minutos: horários com segundos perderiam precisão
+    viagens = viagens_aleatorias(10000, semente=7, quartos_de_hora=True)
+    resultados = calcular_registros(empacotar_viagens(*zip(*viagens)))
+    for viagem, total, tipo in zip(viagens, resultados["total_centavos"], resultados["tipo"]):
+        esperado = calcular_registro(ViagemCompacta.criar(*viagem))
+        assert (total, tipo) == (esperado.total_centavos, esperado.tipo), viagem
+        assert esperado.total_centavos == calcular_diaria(*viagem, detalhar=False).total_centavos, viagem
+
+
+def test_registros_ida_e_volta_pelo_pandas():
+    viagens = viagens_aleatorias(1000, semente=8, quartos_de_hora=True)
+    empacotadas = viagens_de_dataframe(_colunas(viagens))
+    tabela = viagens_para_dataframe(empacotadas)
+    assert np.shares_memory(tabela["saida"].to_numpy(), empacotadas)
+    assert np.array_equal(viagens_de_dataframe(tabela), empacotadas)
+
+    resultados = calcular_registros(empacotadas)
+    tabela_resultados = resultados_para_dataframe(resultados)
+    assert np.shares_memory(tabela_resultados["total_centavos"].to_numpy(), resultados)
+    lote = calcular_lote(*(_colunas(viagens)[coluna] for coluna in _colunas(viagens)))
+    assert tabela_resultados["total_centavos"].tolist() == lote["total_centavos"].tolist()
+    assert tabela_resultados["tipo_calculado"].astype(str).tolist() == lote["tipo_calculado"].astype(str).tolist()
+
+
+def test_registros_de_dataframe_compacto():
+    # Destino como texto ou categórico com outra ordem de categorias
+    empacotadas = viagens_de_dataframe(_colunas(viagens_aleatorias(200, semente=14, quartos_de_hora=True)))
+    tabela = viagens_para_dataframe(empacotadas)
+    for destino in [tabela["destino"].astype(str), tabela["destino"].cat.reorder_categories(sorted(DESTINOS))]:
+        assert np.array_equal(viagens_de_dataframe(tabela.assign(destino=destino)), empacotadas)
+
+
+@pytest.mark.parametrize("coluna, valores, mensagem", [
+    ("gratuidades", lambda tabela: tabela["gratuidades"] + 4, "gratuidades fora do intervalo"),
+    ("saida", lambda tabela: tabela["saida"] + 0.5, "saida deve ser uma coluna de inteiros"),
+    ("destino", lambda tabela: tabela["destino"].astype(str).replace(DESTINOS[0], "Exterior"), "Exterior"),
+])
+def test_registros_de_dataframe_compacto_invalido(coluna, valores, mensagem):
+    tabela = viagens_para_dataframe(viagens_de_dataframe(_colunas(viagens_aleatorias(50, semente=15, quartos_de_hora=True))))
+    with pytest.raises((ValueError, KeyError), match=mensagem):
+        viagens_de_dataframe(tabela.assign(**{coluna: valores(tabela)}))
+
+
+def test_formatar_centavos_lote():
+    gerador = np.random.default_rng(9)
+    centavos = np.concatenate([
+        gerador.integers(-10 ** 12, 10 ** 12, 5000),
+        gerador.integers(-2000, 2000, 1000),
+        [0, 99, 100, 99999, 100000, -1, -100000],
+    ])
+    assert list(formatar_centavos_lote(centavos)) == [formatar_centavos(int(valor)) for valor in centavos]
+
+
+def test_formatar_centavos_lote_com_ausentes():
+    # Colunas Int64 de `conciliar` (valor_esperado_centavos, diferenca_centavos)
+    centavos = pd.Series([150, None, -123456], dtype="Int64", index=[5, 6, 7])
+    textos = formatar_centavos_lote(centavos)
+    assert list(textos.index) == [5, 6, 7]
+    assert list(textos) == ["R$ 1,50", "", formatar_centavos(-123456)]
+
+
+def test_formatar_moeda_lote():
+    gerador = np.random.default_rng(10)
+    reais = np.concatenate([
+        np.round(gerador.uniform(-1e7, 1e7, 5000), 2),
+        gerador.uniform(0, 1000, 1000),
+        np.arange(0, 20) + 0.005,
+    ])
+    assert list(formatar_moeda_lote(reais)) == [format_currency(float(valor)) for valor in reais]
+    assert list(formatar_moeda_lote(pd.Series([1.5, np.nan]))) == ["R$ 1,50", ""]
+
+
+def test_formatar_duracao_lote():
+    gerador = np.random.default_rng(11)
+    horas = np.concatenate([gerador.integers(0, 96 * 400, 5000) / 4, gerador.uniform(0, 2000, 1000)])
+    assert list(formatar_duracao_lote(horas)) == [formatar_duracao(float(valor)) for valor in horas]
+
+
+def test_formatar_duracao_lote_de_horas_ultimo_dia():
+    viagens = viagens_aleatorias(500, semente=12)
+    resultado = calcular_lote(*(_colunas(viagens)[coluna] for coluna in _colunas(viagens)))
+    textos = formatar_duracao_lote(resultado["horas_ultimo_dia"])
+    for horas, texto in zip(resultado["horas_ultimo_dia"], textos):
+        assert texto == ("" if math.isnan(horas) else formatar_duracao(horas))
+
+
+def test_lote_data_ausente():
+    colunas = _colunas(viagens_aleatorias(10, semente=13))
+    colunas.loc[7, "retorno"] = pd.NaT
+    with pytest.raises(ValueError, match="Data de retorno ausente na posição 7"):
+        calcular_lote(*(colunas[coluna] for coluna in colunas))
+
+
+def test_lote_destino_desconhecido():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with pytest.raises(KeyError, match="Exterior"):
+            calcular_lote(
+                pd.Series(["Exterior", DESTINOS[0]]), np.array(["2024-05-02T08:00"] * 2, dtype="datetime64[m]"),
+                np.array(["2024-05-03T08:00"] * 2, dtype="datetime64[m]"), [False] * 2, [False] * 2,
+            )
+
+
+def test_registros_fora_do_alcance_de_date():
+    viagens = np.zeros(1, dtype=DTYPE_VIAGEM)
+    viagens["saida"] = np.iinfo(np.int32).min
+    viagens["retorno"] = viagens["saida"] + 600
+    with pytest.raises(LookupError, match="dias desde 01/01/1970"):
+        calcular_registros(viagens)
@@ -0,0 +1,56 @@
+"""Registro de métricas: contagens, exportação Prometheus e gravação em arquivo."""
+import glob
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from diarias.metricas import _DESCRICOES, RegistroMetricas
+
+
+def test_inativo_nao_registra():
+    registro = RegistroMetricas()
+    registro.contar("diarias_calculos_total", tipo_calculado="Pernoite")
+    with registro.medir("calculo"):
+        pass
+    assert registro.exportar_prometheus() == "\n"
+
+
+def test_exportacao_prometheus():
+    registro = RegistroMetricas(ativo=True)
+    registro.contar("diarias_calculos_total", tipo_calculado="Pernoite")
+    registro.contar("diarias_calculos_total", 2, tipo_calculado="Pernoite")
+    registro.contar("diarias_http_erros_internos_total", rota="/lote")
+    registro.observar("calculo", 0.002)
+    texto = registro.exportar_prometheus()
+    assert 'diarias_calculos_total{tipo_calculado="Pernoite"} 3' in texto
+    assert 'diarias_fase_segundos_bucket{fase="calculo",le="0.005"} 1' in texto
+    assert 'diarias_fase_segundos_count{fase="calculo"} 1' in texto
+    for linha in texto.splitlines():
+        if linha.startswith("# HELP "):
+            nome, descricao = linha[len("# HELP "):].split(" ", 1)
+            assert descricao == _DESCRICOES[nome][1]
+
+
+def test_todas_as_metricas_do_pacote_tem_descricao():
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    nomes = set()
+    for arquivo in [os.path.join(raiz, "app.py")] + glob.glob(os.path.join(raiz, "diarias", "*.py")):
+        with open(arquivo, encoding="utf-8") as fonte:
+            nomes.update(re.findall(r'(?:contar|definir)\(\s*"(diarias_\w+)"', fonte.read()))
+    assert "diarias_http_erros_internos_total" in nomes
+    assert nomes <= set(_DESCRICOES)
+
+
+def test_gravacoes_simultaneas(tmp_path):
+    registro = RegistroMetricas(ativo=True)
+    registro.contar("diarias_lote_linhas_total", 10)
+    caminho = tmp_path / "metricas.prom"
+
+    def gravar(_):
+        for _ in range(100):
+            registro.gravar(str(caminho))
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(gravar, range(8)))
+    assert caminho.read_text(encoding="utf-8") == registro.exportar_prometheus()
+    assert os.listdir(tmp_path) == ["metricas.prom"]
@@ -0,0 +1,21 @@
+"""Execução em vários processos: mesmo resultado e mesma ordem da execução em série."""
+import pandas as pd
+import pytest
+
+from diarias.cli import executar_lote
+from diarias.paralelo import executar_paralelo
+from test_cli import arquivo_viagens, conferir_resultado, ler_resultado
+
+
+@pytest.mark.parametrize("entrada", ["viagens.csv", "viagens.parquet"])
+def test_paralelo_igual_a_serie(tmp_path, entrada):
+    viagens = arquivo_viagens(tmp_path / entrada, 1000, semente=80)
+    opcoes = dict(campos=["total", "tipo_calculado", "horas_ultimo_dia"], manter=["id_viagem"], tamanho_bloco=64,
+                  progresso=False)
+    assert executar_paralelo(str(tmp_path / entrada), str(tmp_path / "paralelo.parquet"), trabalhadores=2, **opcoes) == 1000
+    executar_lote(str(tmp_path / entrada), str(tmp_path / "serie.parquet"), **opcoes)
+
+    paralelo = ler_resultado(tmp_path / "paralelo.parquet")
+    pd.testing.assert_frame_equal(paralelo, ler_resultado(tmp_path / "serie.parquet"))
+    conferir_resultado(paralelo, viagens)
+    assert paralelo["id_viagem"][1] == "NA"
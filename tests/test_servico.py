@@ -0,0 +1,149 @@
+"""Serviço HTTP: validação das viagens, respostas de erro e streaming do /lote."""
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from diarias import servico
+from diarias.servico import DIAS_MAXIMOS_VIAGEM, TAMANHO_MAXIMO_JSON, ErroRequisicao, ServicoDiarias, ler_viagem
+
+VIAGEM = {"destino": "Capitais de Estado", "saida": "2024-05-02T08:00", "retorno": "2024-05-04T18:00"}
+
+
+def _conversar(bruto):
+    """Envia `bruto` a um servidor local e devolve tudo o que ele responder até fechar a conexão"""
+
+    async def conversar():
+        servidor = await ServicoDiarias().iniciar("127.0.0.1", 0)
+        async with servidor:
+            porta = servidor.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+            writer.write(bruto)
+            await writer.drain()
+            resposta = await asyncio.wait_for(reader.read(), 30)
+            writer.close()
+            return resposta
+
+    return asyncio.run(conversar())
+
+
+def _post(caminho, corpo, extras=""):
+    return (
+        f"POST {caminho} HTTP/1.1\r\nHost: teste\r\nConnection: close\r\n"
+        f"Content-Length: {len(corpo)}\r\n{extras}\r\n"
+    ).encode("latin-1") + corpo
+
+
+def _status_e_corpo(resposta):
+    cabecalho, _, corpo = resposta.partition(b"\r\n\r\n")
+    return int(cabecalho.split(b" ", 2)[1]), cabecalho.decode("latin-1"), corpo
+
+
+def _linhas_chunked(corpo):
+    dados = b""
+    while True:
+        linha_tamanho, _, corpo = corpo.partition(b"\r\n")
+        tamanho = int(linha_tamanho, 16)
+        if tamanho == 0:
+            assert corpo == b"\r\n"
+            return [json.loads(linha) for linha in dados.decode("utf-8").splitlines()]
+        dados += corpo[:tamanho]
+        assert corpo[tamanho:tamanho + 2] == b"\r\n"
+        corpo = corpo[tamanho + 2:]
+
+
+@pytest.mark.parametrize(
+    "alteracao",
+    [
+        {"saida": "2024-05-02T08:00+00:00"},
+        {"destino": ["Capitais de Estado"]},
+        {"destino": "Exterior"},
+        {"detalhar": "false"},
+        {"alimentacao_gratuita": 0},
+        {"retorno": "2024-05-02T08:00"},
+        {"saida": "0001-01-01T00:00", "retorno": "9999-12-31T00:00"},
+        {"retorno": "2204-05-02T08:00"},
+    ],
+)
+def test_ler_viagem_recusa(alteracao):
+    with pytest.raises(ErroRequisicao) as erro:
+        ler_viagem({**VIAGEM, **alteracao})
+    assert erro.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_ler_viagem_aceita_a_duracao_maxima():
+    # 2024 é bissexto: 366 dias até 01/01/2025
+    assert DIAS_MAXIMOS_VIAGEM == 366
+    assert ler_viagem({**VIAGEM, "saida": "2024-01-01T08:00", "retorno": "2025-01-01T08:00"})
+    with pytest.raises(ErroRequisicao):
+        ler_viagem({**VIAGEM, "saida": "2024-01-01T08:00", "retorno": "2025-01-01T08:01"})
+
+
+def test_calcular():
+    status, _, corpo = _status_e_corpo(_conversar(_post("/calcular", json.dumps(VIAGEM).encode())))
+    assert status == 200
+    assert json.loads(corpo)["total_centavos"] > 0
+
+
+def test_content_length_invalido():
+    bruto = b"POST /calcular HTTP/1.1\r\nHost: teste\r\nContent-Length: abc\r\n\r\n"
+    status, _, corpo = _status_e_corpo(_conversar(bruto))
+    assert status == 400
+    assert json.loads(corpo) == {"erro": "Content-Length inválido"}
+
+
+def test_erro_interno_responde_500(monkeypatch):
+    def falhar(dados, detalhar_padrao=True):
+        raise RuntimeError("falha")
+
+    monkeypatch.setattr(servico, "calcular_json", falhar)
+    status, _, corpo = _status_e_corpo(_conversar(_post("/calcular", json.dumps(VIAGEM).encode())))
+    assert status == 500
+    assert json.loads(corpo) == {"erro": "erro interno"}
+
+
+def test_lote_continua_depois_de_linha_invalida(monkeypatch):
+    calcular_json = servico.calcular_json
+
+    def calcular_ou_falhar(dados, detalhar_padrao=True):
+        if dados.get("destino") == "falha":
+            raise RuntimeError("falha")
+        return calcular_json(dados, detalhar_padrao)
+
+    monkeypatch.setattr(servico, "calcular_json", calcular_ou_falhar)
+    corpo = "\n".join([json.dumps(VIAGEM), "{", json.dumps({"destino": "falha"}), json.dumps(VIAGEM)]).encode()
+    status, _, resposta = _status_e_corpo(_conversar(_post("/lote", corpo)))
+    assert status == 200
+    linhas = _linhas_chunked(resposta)
+    assert linhas[1] == {"linha": 2, "erro": "JSON inválido"}
+    assert linhas[2] == {"linha": 3, "erro": "erro interno: falha"}
+    assert linhas[0] == linhas[3]
+
+
+def test_lote_com_erro_no_corpo_encerra_o_streaming():
+    # Resultados já enviados, depois um tamanho de chunk inválido
+    linha = (json.dumps(VIAGEM) + "\n").encode()
+    bruto = (
+        b"POST /lote HTTP/1.1\r\nHost: teste\r\nTransfer-Encoding: chunked\r\n\r\n"
+        + f"{len(linha):x}\r\n".encode() + linha + b"\r\nzz\r\n"
+    )
+    status, cabecalho, resposta = _status_e_corpo(_conversar(bruto))
+    assert status == 200
+    assert "Transfer-Encoding: chunked" in cabecalho
+    assert b"HTTP/1.1" not in resposta
+    linhas = _linhas_chunked(resposta)
+    assert len(linhas) == 2
+    assert linhas[0]["total_centavos"] > 0
+    assert linhas[1] == {"erro": "codificação chunked inválida"}
+
+
+def test_lote_recusa_linha_sem_fim():
+    # Um único chunk sem quebra de linha maior que o limite
+    bruto = (
+        b"POST /lote HTTP/1.1\r\nHost: teste\r\nTransfer-Encoding: chunked\r\n\r\n"
+        + f"{TAMANHO_MAXIMO_JSON + 1:x}\r\n".encode() + b"x" * (TAMANHO_MAXIMO_JSON + 1)
+    )
+    status, _, resposta = _status_e_corpo(_conversar(bruto))
+    assert status == 200
+    assert _linhas_chunked(resposta) == [{"erro": "linha muito grande"}]
@@ -0,0 +1,47 @@
+"""Simulação de custos por horário comparada ao motor escalar."""
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from conftest import DESTINOS
+from diarias import calcular_diaria
+from diarias.simulacao import HORARIOS, matriz_custos, resumo_por_dias, simular_custos
+
+
+def _momento(dia, horario):
+    hora, minuto = map(int, horario.split(":"))
+    return datetime.combine(dia, datetime.min.time()) + timedelta(hours=hora, minutes=minuto)
+
+
+def test_simulacao_igual_ao_motor(tabelas_multiplas):
+    gerador = random.Random(40)
+    # Saída pouco antes da troca de tabela de 15/03/2024
+    data_saida = date(2024, 3, 13)
+    for alimentacao_gratuita, hospedagem_gratuita in [(False, False), (True, False), (False, True)]:
+        destino = gerador.choice(DESTINOS)
+        custos = simular_custos(destino, data_saida, 3, alimentacao_gratuita, hospedagem_gratuita)
+        assert len(custos) == 96 * 95 // 2 + 3 * 96 * 96
+        for posicao in gerador.sample(range(len(custos)), 500):
+            linha = custos.iloc[posicao]
+            saida = _momento(data_saida, linha["hora_saida"])
+            retorno = _momento(data_saida + timedelta(days=int(linha["dias"])), linha["hora_retorno"])
+            esperado = calcular_diaria(destino, saida, retorno, alimentacao_gratuita, hospedagem_gratuita, detalhar=False)
+            assert (linha["total_centavos"], linha["tipo_calculado"]) == (
+                esperado.total_centavos, esperado.tipo_calculado
+            ), (saida, retorno)
+
+
+def test_matriz_e_resumo():
+    custos = simular_custos(DESTINOS[0], date(2024, 5, 2), 1)
+    matriz = matriz_custos(custos, dias=0)
+    assert list(matriz.index) == list(HORARIOS) and list(matriz.columns) == list(HORARIOS)
+    # Retorno no mesmo dia só existe acima da diagonal
+    assert np.isnan(matriz.to_numpy()[np.tril_indices(96)]).all()
+    assert not np.isnan(matriz.to_numpy()[np.triu_indices(96, 1)]).any()
+
+    resumo = resumo_por_dias(custos)
+    assert list(resumo.columns) == ["min", "max"]
+    for dias, selecao in custos.groupby("dias"):
+        assert resumo.loc[dias, "min"] == selecao["total_centavos"].min()
+        assert resumo.loc[dias, "max"] == selecao["total_centavos"].max()